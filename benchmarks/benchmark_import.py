@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+"""
+IMPORT BENCHMARK
+
+Measures how fast the script starts, and checks it against a budget, so that
+the small conversions, and the runs within Flux, which launches the script once
+for every export, stay instant.
+
+Three times are measured, each as the best of a number of repeats, in fresh
+interpreters:
+- the import of the script as a module, as reported by `python -X importtime`;
+- the start of the script from the terminal, with the `-h` flag, beyond the
+  start of a bare interpreter;
+- a conversion of synthetic exports of 1k face elements, beyond the start of a
+  bare interpreter.
+
+The modules that only some runs need, like the optional packages, must not be
+imported along with the script, which is checked as well, and enforced by
+`tests/test_import.py`.
+
+USAGE=============
+python3 benchmarks/benchmark_import.py [--repeat <n>] [--budget <ms>]
+    [--startup-budget <ms>] [--conversion-budget <ms>]
+
+The exit status is 1 if a time is over its budget, or if one of the modules that
+must be imported lazily is imported along with the script.
+"""
+
+
+# IMPORT PYTHON LIBRARIES
+import os, sys, time        # for the paths of the script and the timings
+import shutil, tempfile     # for the scratch directory of the exports
+import subprocess           # for measuring fresh interpreters
+import argparse             # for the arguments of the command line
+
+from synthetic_exports import generate_exports
+
+
+# DEFINE CONSTANTS
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+MODULE = 'flux_to_fenics_mesh_transfer'
+SCRIPT = os.path.join(ROOT, MODULE + '.py')
+# the budgets, in milliseconds, of the import, of the start from the terminal,
+#   and of a small conversion
+DEFAULT_BUDGET = 50.0
+DEFAULT_STARTUP_BUDGET = 150.0
+DEFAULT_CONVERSION_BUDGET = 500.0
+SMALL_CONVERSION = 1000
+# the modules that are imported where they are used, and never with the script
+LAZY_MODULES = ['getopt', 'gettext', 'gzip', 'hashlib', 'numpy', 'h5py', \
+'pymetis', 'multiprocessing', 'cProfile', 'pstats', 'json']
+
+
+# DEFINE FUNCTIONS
+def compile_script():
+    '''
+    Compile the script, so that the measured imports load its bytecode.
+
+    The bytecode is written by `compileall`, even where the environment sets
+        PYTHONDONTWRITEBYTECODE, under which a first import would leave every
+        later import compiling the script again.
+    '''
+    subprocess.check_call([sys.executable, '-m', 'compileall', '-q', SCRIPT])
+
+def best_wall_time(command, repeat, cwd=None):
+    '''
+    Return the best wall time of a command over the repeats, in milliseconds.
+    '''
+    timings = []
+    with open(os.devnull, 'w') as silent:
+        for _ in range(0, repeat):
+            start = time.time()
+            subprocess.call(command, cwd=cwd, stdout=silent, stderr=silent)
+            timings.append(time.time() - start)
+    return min(timings) * 1e3
+
+def import_time(repeat):
+    '''
+    Return the best cumulative import time of the script, in milliseconds.
+    '''
+    timings = []
+    for _ in range(0, repeat):
+        report = subprocess.run([sys.executable, '-X', 'importtime', '-c', \
+        'import ' + MODULE], cwd=ROOT, stdout=subprocess.DEVNULL, \
+        stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+        for line in report.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == MODULE:
+                timings.append(int(fields[1]) / 1e3)
+    return min(timings)
+
+def eager_modules():
+    '''
+    Return the modules that must be imported lazily, but come with the script.
+    '''
+    imported = subprocess.run([sys.executable, '-c', 'import sys; ' \
+    'before = set(sys.modules); import ' + MODULE + '; ' \
+    'print("\\n".join(sorted(set(sys.modules) - before)))'], cwd=ROOT, \
+    stdout=subprocess.PIPE, universal_newlines=True, check=True).stdout.split()
+    return sorted(set(name.split('.')[0] for name in imported) \
+    & set(LAZY_MODULES))
+
+def main():
+    '''
+    Measure the times, print them along with their budgets, and check them.
+    '''
+    parser = argparse.ArgumentParser(description='Check how fast the script '
+    'starts against a budget.')
+    parser.add_argument('--repeat', type=int, default=10, \
+    help='the number of measures to keep the best of')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, \
+    help='the budget of the import of the script, in ms')
+    parser.add_argument('--startup-budget', type=float, \
+    default=DEFAULT_STARTUP_BUDGET, \
+    help='the budget of the start of the script from the terminal, in ms')
+    parser.add_argument('--conversion-budget', type=float, \
+    default=DEFAULT_CONVERSION_BUDGET, \
+    help='the budget of a conversion of 1k face elements, in ms')
+    arguments = parser.parse_args()
+    repeat = max(1, arguments.repeat)
+
+    compile_script()
+    interpreter = best_wall_time([sys.executable, '-c', 'pass'], repeat)
+    measures = [('import', import_time(repeat), arguments.budget), \
+    ('startup', best_wall_time([sys.executable, SCRIPT, '-h'], repeat) \
+    - interpreter, arguments.startup_budget)]
+
+    directory = tempfile.mkdtemp(prefix='flux-import-')
+    try:
+        inputfiles, _ = generate_exports(directory, SMALL_CONVERSION)
+        command = [sys.executable, SCRIPT]
+        for inputfile in inputfiles:
+            command += ['-i', inputfile]
+        command += ['-o', 'mesh.xml', '-o', 'physical_region.xml']
+        measures.append(('conversion', best_wall_time(command, repeat, \
+        directory) - interpreter, arguments.conversion_budget))
+    finally:
+        shutil.rmtree(directory)
+
+    print('%-12s %10s %10s' % ('', 'ms', 'budget'))
+    print('%-12s %10.1f' % ('interpreter', interpreter))
+    failures = []
+    for name, milliseconds, budget in measures:
+        print('%-12s %10.1f %10.1f' % (name, milliseconds, budget))
+        if milliseconds > budget:
+            failures.append('%s takes %.1f ms, over its budget of %.1f ms' \
+            % (name, milliseconds, budget))
+    for module in eager_modules():
+        failures.append('%s is imported along with the script' % module)
+
+    for failure in failures:
+        print('Over budget : ', failure)
+    if failures:
+        sys.exit(1)
+    print('Within budget.')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""
+MEMORY BENCHMARK
+
+Measures the peak resident memory of parsing synthetic Flux exports, with the
+memory-mapped reader of the script, with its chunked reader, and with the
+line-by-line `readlines` approach the script used before. Each measurement runs
+in a fresh process, so that the peaks do not add up.
+
+The peak of the memory-mapped reader should stay close to the size of the
+parsed arrays, whereas the `readlines` approach holds the whole text of the
+exports in memory.
+
+USAGE=============
+python3 benchmarks/benchmark_memory.py [size ...]
+
+Each size is a number of face elements. The default sizes go from 100k to 2M
+face elements. The exports are generated into a temporary directory which is
+deleted afterwards. Needs the `resource` module, so runs on Unix only.
+"""
+
+
+# IMPORT PYTHON LIBRARIES
+import os, sys              # for the paths of the script and the exports
+import shutil, tempfile     # for the scratch directory of the exports
+import subprocess           # for measuring every reader in a fresh process
+
+from synthetic_exports import generate_exports
+
+
+# DEFINE CONSTANTS
+SCRIPT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+os.pardir)
+DEFAULT_SIZES = [100000, 500000, 2000000]
+READERS = ['readlines', 'chunked', 'mmap']
+
+# the child process parses the exports and prints its peak memory in kB
+MEASURE = '''
+import sys, resource
+sys.path.insert(0, sys.argv[1])
+import flux_to_fenics_mesh_transfer as transfer
+reader, node, face, description = sys.argv[2:6]
+if reader == 'readlines':
+    with open(node) as nodes:
+        lines = nodes.readlines()
+    node_list = [float(lines[i+k]) for i, line in enumerate(lines) \\
+    if line.startswith('Node(') for k in (2, 3, 4)]
+    with open(face) as faces:
+        lines = faces.readlines()
+    face_list = [int(number) - 1 for line in lines if 'NODES' in line \\
+    for number in line.split(':')[1].strip(' ()\\n').split(',')]
+elif reader == 'chunked':
+    with open(node, 'rb') as nodes, open(face, 'rb') as faces:
+        transfer.convert(nodes, faces, description)
+else:
+    transfer.convert(node, face, description)
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+
+
+# DEFINE FUNCTIONS
+def peak_memory(reader, inputfiles):
+    '''
+    Parse the given exports with a reader in a fresh process and return its
+    peak resident memory in MB.
+    '''
+    output = subprocess.check_output([sys.executable, '-c', MEASURE, \
+SCRIPT_DIRECTORY, reader] + inputfiles)
+    return int(output.split()[-1]) / 1024.0
+
+def main():
+    '''
+    Measure each reader for each size and print a table of the peaks.
+    '''
+    sizes = [int(size) for size in sys.argv[1:]] or DEFAULT_SIZES
+
+    print('%12s %12s' % ('elements', 'input MB') + \
+''.join('%12s' % reader for reader in READERS))
+    for size in sizes:
+        directory = tempfile.mkdtemp(prefix='flux-memory-')
+        try:
+            inputfiles, number_of_faces = generate_exports(directory, size)
+            input_size = sum(os.path.getsize(inputfile) \
+for inputfile in inputfiles) / 1048576.0
+            peaks = [peak_memory(reader, inputfiles) for reader in READERS]
+        finally:
+            shutil.rmtree(directory)
+        print('%12d %12.1f' % (number_of_faces, input_size) + \
+''.join('%12.1f' % peak for peak in peaks))
+
+if __name__ == '__main__':
+    main()
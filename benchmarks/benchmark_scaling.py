@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+"""
+SCALING BENCHMARK
+
+Times a full conversion of synthetic Flux exports of growing size, and prints
+the time spent per face element. A linear-time conversion keeps the time per
+face element roughly constant from the smallest to the largest mesh.
+
+The synthetic exports are written by `synthetic_exports.py`, in the same layout
+as the txt files that Flux exports.
+
+USAGE=============
+python3 benchmarks/benchmark_scaling.py [size ...]
+
+Each size is a number of face elements. The default sizes go from 10k to 5M
+face elements. The exports are generated into a temporary directory which is
+deleted afterwards.
+"""
+
+
+# IMPORT PYTHON LIBRARIES
+import os, sys, time        # for timing the script calls
+import shutil, tempfile     # for the scratch directory of the exports
+import subprocess           # for calling the script as the user would
+
+from synthetic_exports import generate_exports
+
+
+# DEFINE CONSTANTS
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+os.pardir, 'flux_to_fenics_mesh_transfer.py')
+DEFAULT_SIZES = [10000, 50000, 250000, 1000000, 5000000]
+
+
+# DEFINE FUNCTIONS
+def time_conversion(directory, inputfiles):
+    '''
+    Call the script on the given exports and return the elapsed wall time.
+    '''
+    command = [sys.executable, SCRIPT]
+    for inputfile in inputfiles:
+        command += ['-i', inputfile]
+    command += ['-o', 'mesh.xml', '-o', 'physical_region.xml']
+
+    start = time.time()
+    with open(os.devnull, 'w') as silent:
+        subprocess.check_call(command, cwd=directory, stdout=silent)
+    return time.time() - start
+
+def main():
+    '''
+    Run the conversion for each size and print a table of the timings.
+    '''
+    sizes = [int(size) for size in sys.argv[1:]] or DEFAULT_SIZES
+
+    print('%12s %12s %16s' % ('elements', 'seconds', 'us / element'))
+    for size in sizes:
+        directory = tempfile.mkdtemp(prefix='flux-scaling-')
+        try:
+            inputfiles, number_of_faces = generate_exports(directory, size)
+            elapsed = time_conversion(directory, inputfiles)
+        finally:
+            shutil.rmtree(directory)
+        print('%12d %12.2f %16.2f' % (number_of_faces, elapsed, \
+1e6 * elapsed / number_of_faces))
+
+if __name__ == '__main__':
+    main()
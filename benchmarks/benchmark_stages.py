@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+
+"""
+STAGE BENCHMARK
+
+Times and memory-profiles every stage of a conversion of synthetic Flux exports
+of growing size, from the scrubbing of the exports to the writing of the xml
+files, and stores the results as JSON, so that a later run can be compared
+against them to catch regressions.
+
+Each stage is timed on its own, as the best of a number of repeats, then run
+once more under `tracemalloc` for the peak of the memory it allocates. The
+stages are run in this process, in the order of a conversion, each on the
+results of the stages before it.
+
+USAGE=============
+python3 benchmarks/benchmark_stages.py [size ...] [--regions <n>] [--lines]
+    [--repeat <n>] [--output <results.json>]
+    [--compare <baseline.json>] [--threshold <ratio>]
+
+Each size is a number of face elements. The default sizes go from 1k to 1M
+face elements. With `--compare`, the exit status is 1 if a stage got slower, or
+took more memory, than the baseline by more than the threshold ratio.
+"""
+
+
+# IMPORT PYTHON LIBRARIES
+import os, sys, time        # for the paths of the script and the timings
+import shutil, tempfile     # for the scratch directory of the exports
+import argparse, json       # for the arguments and the results
+import gc, platform         # for isolating the stages and describing the run
+import tracemalloc          # for the memory peaks of the stages
+
+from synthetic_exports import generate_exports
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+os.pardir))
+import flux_to_fenics_mesh_transfer as transfer
+
+
+# DEFINE CONSTANTS
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_REGIONS = 16
+# the ratio to the baseline above which a stage counts as a regression
+DEFAULT_THRESHOLD = 1.25
+# the differences below which a stage never counts as a regression
+MINIMUM_SECONDS = 0.05
+MINIMUM_MEGABYTES = 1.0
+
+
+# DEFINE STAGES
+# every stage receives the state of the conversion, made of the exports and the
+# results of the stages before it, and returns the results it adds to the state
+def scrub_nodes(state):
+    '''
+    Scrub the node element export.
+    '''
+    transfer.scrub_node_element_file(state['inputfiles'], state['directory'])
+
+def scrub_faces(state):
+    '''
+    Scrub the face element export.
+    '''
+    transfer.scrub_face_element_file(state['inputfiles'], state['directory'])
+
+def retrieve_nodes(state):
+    '''
+    Retrieve the coordinates of the nodes.
+    '''
+    return {'node_list': transfer.retrieve_node_information(state['inputfiles'][0])}
+
+def retrieve_faces(state):
+    '''
+    Retrieve the nodes and the physical regions of the face elements.
+    '''
+    face_list, region_list, region_registry = transfer.retrieve_face_information( \
+    state['inputfiles'][1], state['inputfiles'][2])
+    return {'face_list': face_list, 'region_list': region_list, \
+    'region_registry': region_registry}
+
+def validate_mesh(state):
+    '''
+    Validate and orient the face elements, and measure their quality.
+    '''
+    face_list, _, _, _ = transfer.validate_mesh(state['node_list'], \
+    state['face_list'], state['region_list'], state['region_registry'], \
+    measure_quality=True)
+    return {'face_list': face_list}
+
+def retrieve_edges(state):
+    '''
+    Collect the unique edges of the face elements.
+    '''
+    return {'edge_keys': transfer.retrieve_edge_information(state['face_list'], \
+    len(state['node_list']) // 3)}
+
+def retrieve_facets(state):
+    '''
+    Retrieve the physical line regions of the edges.
+    '''
+    facet_region_list, _ = transfer.retrieve_facet_information( \
+    state['edge_keys'], len(state['node_list']) // 3, state['inputfiles'][3], \
+    state['inputfiles'][4])
+    return {'facet_region_list': facet_region_list}
+
+def write_mesh(state):
+    '''
+    Write the xml mesh file.
+    '''
+    transfer.write_mesh(os.path.join(state['directory'], 'mesh.xml'), \
+    state['node_list'], state['face_list'])
+
+def write_physical_region(state):
+    '''
+    Write the xml physical region file.
+    '''
+    transfer.write_physical_region(os.path.join(state['directory'], \
+    'physical_region.xml'), state['region_list'])
+
+def write_facet_region(state):
+    '''
+    Write the xml facet region file.
+    '''
+    transfer.write_physical_region(os.path.join(state['directory'], \
+    'facet_region.xml'), state['facet_region_list'], 1)
+
+STAGES = [('scrub_node_element_file', scrub_nodes), \
+('scrub_face_element_file', scrub_faces), \
+('retrieve_node_information', retrieve_nodes), \
+('retrieve_face_information', retrieve_faces), \
+('validate_mesh', validate_mesh), \
+('retrieve_edge_information', retrieve_edges), \
+('retrieve_facet_information', retrieve_facets), \
+('write_mesh', write_mesh), \
+('write_physical_region', write_physical_region), \
+('write_facet_region', write_facet_region)]
+# the stages that need the line element exports
+LINE_STAGES = ['retrieve_edge_information', 'retrieve_facet_information', \
+'write_facet_region']
+
+
+# DEFINE FUNCTIONS
+def run_stages(stages, state, memory=False):
+    '''
+    Run the stages in order on the state, and return what each of them took.
+
+    Parameters
+    ----------
+    stages : list
+        The (name, function) pairs of the stages to run.
+
+    state : dict
+        The exports and the scratch directory, to which the results of every
+            stage are added.
+
+    memory : bool
+        If True, the peak of the memory allocated by each stage is traced,
+            instead of its time.
+
+    Returns
+    -------
+    measures : dict
+        The seconds, or the peak megabytes, that each stage took, by name.
+    '''
+    measures = {}
+    for name, stage in stages:
+        gc.collect()
+        if memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        state.update(stage(state) or {})
+        elapsed = time.perf_counter() - start
+        if memory:
+            measures[name] = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+        else:
+            measures[name] = elapsed
+    return measures
+
+def benchmark_size(size, regions, lines, repeat):
+    '''
+    Benchmark every stage on synthetic exports of the given size.
+
+    Returns
+    -------
+    result : dict
+        The size of the exports, and the best seconds and the peak megabytes of
+            every stage, by name.
+    '''
+    stages = [(name, stage) for name, stage in STAGES \
+    if lines or name not in LINE_STAGES]
+    directory = tempfile.mkdtemp(prefix='flux-stages-')
+    try:
+        inputfiles, number_of_faces = generate_exports(directory, size, regions, \
+        lines)
+        state = {'inputfiles': inputfiles, 'directory': directory}
+        timings = [run_stages(stages, dict(state)) for _ in range(0, repeat)]
+        peaks = run_stages(stages, dict(state), memory=True)
+    finally:
+        shutil.rmtree(directory)
+
+    return {'elements': number_of_faces, 'regions': regions, 'lines': lines, \
+    'stages': dict((name, {'seconds': min(timing[name] for timing in timings), \
+    'peak_mb': peaks[name]}) for name, _ in stages)}
+
+def find_regressions(results, baseline, threshold):
+    '''
+    Compare the results to the baseline, and return the stages that regressed.
+
+    A stage regresses when its time, or its memory peak, exceeds the one of the
+        baseline for the same exports by more than the threshold ratio, and by
+        more than `MINIMUM_SECONDS` or `MINIMUM_MEGABYTES`, below which the
+        differences are noise.
+
+    Returns
+    -------
+    regressions : list
+        The descriptions of the regressions, as printable strings.
+    '''
+    baseline_results = dict(((result['elements'], result['regions'], \
+    result['lines']), result['stages']) for result in baseline['results'])
+
+    regressions = []
+    for result in results:
+        key = (result['elements'], result['regions'], result['lines'])
+        if key not in baseline_results:
+            continue
+        for name, measures in sorted(result['stages'].items()):
+            if name not in baseline_results[key]:
+                continue
+            for measure, minimum in (('seconds', MINIMUM_SECONDS), \
+            ('peak_mb', MINIMUM_MEGABYTES)):
+                new, old = measures[measure], baseline_results[key][name][measure]
+                if new > old * threshold and new - old > minimum:
+                    regressions.append('%s on %d elements: %s %.3f -> %.3f' \
+                    % (name, key[0], measure, old, new))
+    return regressions
+
+def main():
+    '''
+    Benchmark every size, print a table of the stages, and store or compare it.
+    '''
+    parser = argparse.ArgumentParser(description='Benchmark the stages of a '
+    'conversion on synthetic Flux exports.')
+    parser.add_argument('sizes', type=int, nargs='*', default=DEFAULT_SIZES, \
+    help='the numbers of face elements')
+    parser.add_argument('--regions', type=int, default=DEFAULT_REGIONS, \
+    help='the number of physical regions')
+    parser.add_argument('--lines', action='store_true', \
+    help='export the boundary lines, and benchmark the facet stages as well')
+    parser.add_argument('--repeat', type=int, default=3, \
+    help='the number of timings to keep the best of')
+    parser.add_argument('--output', help='the JSON file to store the results into')
+    parser.add_argument('--compare', help='the JSON file of the baseline results')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, \
+    help='the ratio to the baseline above which a stage has regressed')
+    arguments = parser.parse_args()
+
+    results = []
+    print('%12s %-28s %10s %10s' % ('elements', 'stage', 'seconds', 'peak MB'))
+    for size in arguments.sizes:
+        result = benchmark_size(size, arguments.regions, arguments.lines, \
+        max(1, arguments.repeat))
+        for name, measures in result['stages'].items():
+            print('%12d %-28s %10.3f %10.1f' % (result['elements'], name, \
+            measures['seconds'], measures['peak_mb']))
+        results.append(result)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as output:
+            json.dump({'python': platform.python_version(), \
+            'platform': platform.platform(), \
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'), \
+            'repeat': arguments.repeat, 'results': results}, output, indent=2, \
+            sort_keys=True)
+
+    if arguments.compare:
+        with open(arguments.compare) as baseline:
+            regressions = find_regressions(results, json.load(baseline), \
+            arguments.threshold)
+        for regression in regressions:
+            print('Regression : ', regression)
+        if regressions:
+            sys.exit(1)
+        print('No regression against ', arguments.compare)
+
+if __name__ == '__main__':
+    main()
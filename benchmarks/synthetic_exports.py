@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+"""
+SYNTHETIC FLUX EXPORTS
+
+Writes synthetic Flux exports of a given size, in the same layout as the txt
+files that Flux exports, for benchmarking the script without a Flux licence.
+
+The mesh is a structured grid of squares over the unit square, each split into
+two triangles. The geometric faces are the blocks of a grid of blocks over the
+unit square, one per physical region. With the `--lines` flag, the four sides
+of the unit square are exported as line elements, on four physical line
+regions.
+
+USAGE=============
+python3 benchmarks/synthetic_exports.py <directory> <elements> [--regions <n>] [--lines]
+
+The elements are the approximate number of face elements, from 1k to 10M and
+beyond. The exports are streamed into the files, so that their size is only
+limited by the disk.
+"""
+
+
+# IMPORT PYTHON LIBRARIES
+import os                   # for the paths of the exports
+import argparse             # for the arguments of the command line
+
+
+# DEFINE CONSTANTS
+NUMBER_OF_REGIONS = 4
+# the names of the exports, as written by the script within Flux
+EXPORT_FILENAMES = ['mesh-node-export-first-order.txt', \
+'mesh-face-export-first-order.txt', 'face-physical-description.txt', \
+'mesh-line-export-first-order.txt', 'line-physical-description.txt']
+# the number of records formatted and written at once
+BATCH = 1 << 14
+
+NODE_RECORD = 'Node(%d)\n   coordinates :\n      %.16E\n      %.16E\n' \
+'      %.16E\n   WEIGHT : 1.0000000000000000E+00\n\n'
+FACE_RECORD = 'FaceElement(%d)\n    NODES    : (%d , %d , %d)\n' \
+'    TYPE     : TRIANGLE\n    LOC    : (%d)\n\n'
+LINE_RECORD = 'LineElement(%d)\n    NODES    : (%d , %d)\n' \
+'    TYPE     : LINE\n    LOC    : (%d)\n\n'
+LINE_NAMES = ['BOTTOM', 'RIGHT', 'TOP', 'LEFT']
+
+
+# DEFINE FUNCTIONS
+def region_blocks(regions):
+    '''
+    Return the numbers of columns and rows of the grid of blocks of the regions.
+    '''
+    columns = 1
+    while columns * columns < regions:
+        columns += 1
+    return columns, (regions + columns - 1) // columns
+
+def generate_exports(directory, face_elements, regions=NUMBER_OF_REGIONS, \
+lines=False):
+    '''
+    Write a synthetic node, face and physical description export into directory.
+
+    Parameters
+    ----------
+    directory : string
+        The directory to write the txt files into.
+
+    face_elements : int
+        The approximate number of face elements of the mesh. The grid is made
+            square, so the actual number is rounded to 2 * n * n.
+
+    regions : int
+        The number of geometric faces, each with its own physical region.
+
+    lines : bool
+        If True, the line element export and the line physical description of
+            the four sides of the unit square are written as well.
+
+    Returns
+    -------
+    inputfiles : list
+        The names of the node, face and physical description txt files,
+            followed by the names of the line exports if asked for.
+
+    number_of_faces : int
+        The actual number of face elements that has been written.
+    '''
+    n = max(1, int(round((face_elements / 2.0) ** 0.5)))
+    regions = max(1, min(regions, n * n))
+    columns, rows = region_blocks(regions)
+    inputfiles = [os.path.join(directory, filename) \
+    for filename in EXPORT_FILENAMES[:5 if lines else 3]]
+
+    with open(inputfiles[0], 'w') as nodes:
+        batch = []
+        for j in range(0, n + 1):
+            for i in range(0, n + 1):
+                batch.append(NODE_RECORD % (j * (n + 1) + i + 1, float(i) / n, \
+                float(j) / n, 0.0))
+            if len(batch) >= BATCH:
+                nodes.write(''.join(batch))
+                batch = []
+        nodes.write(''.join(batch))
+
+    with open(inputfiles[1], 'w') as faces:
+        batch = []
+        number = 1
+        for j in range(0, n):
+            row = (j * rows // n) * columns
+            for i in range(0, n):
+                a = j * (n + 1) + i + 1
+                b, c, d = a + 1, a + n + 1, a + n + 2
+                loc = (row + i * columns // n) % regions + 1
+                batch.append(FACE_RECORD % (number, a, b, d, loc))
+                batch.append(FACE_RECORD % (number + 1, a, d, c, loc))
+                number += 2
+            if len(batch) >= BATCH:
+                faces.write(''.join(batch))
+                batch = []
+        faces.write(''.join(batch))
+
+    with open(inputfiles[2], 'w') as description:
+        for face in range(1, regions + 1):
+            description.write('Face %d is : REGION_%d\n' % (face, face))
+
+    if lines:
+        # the sides of the unit square, counterclockwise from the bottom one
+        corners = [1, n + 1, (n + 1) * (n + 1), n * (n + 1) + 1]
+        steps = [1, n + 1, -1, -(n + 1)]
+        with open(inputfiles[3], 'w') as line_elements:
+            number = 1
+            for side in range(0, 4):
+                batch = []
+                for k in range(0, n):
+                    node = corners[side] + k * steps[side]
+                    batch.append(LINE_RECORD % (number, node, node + steps[side], \
+                    side + 1))
+                    number += 1
+                line_elements.write(''.join(batch))
+        with open(inputfiles[4], 'w') as description:
+            for side, name in enumerate(LINE_NAMES):
+                description.write('Line %d is : %s\n' % (side + 1, name))
+
+    return inputfiles, 2 * n * n
+
+def main():
+    '''
+    Write the exports asked for on the command line.
+    '''
+    parser = argparse.ArgumentParser(description='Write synthetic Flux exports.')
+    parser.add_argument('directory', help='the directory to write the exports into')
+    parser.add_argument('elements', type=int, \
+    help='the approximate number of face elements')
+    parser.add_argument('--regions', type=int, default=NUMBER_OF_REGIONS, \
+    help='the number of physical regions')
+    parser.add_argument('--lines', action='store_true', \
+    help='write the line element exports as well')
+    arguments = parser.parse_args()
+
+    if not os.path.isdir(arguments.directory):
+        os.makedirs(arguments.directory)
+    inputfiles, number_of_faces = generate_exports(arguments.directory, \
+    arguments.elements, arguments.regions, arguments.lines)
+    print('%d face elements written into %s' % (number_of_faces, \
+    ', '.join(inputfiles)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,923 @@
+#!/usr/bin/env python3
+
+"""
+DOLFIN XML READER
+
+A python module for reading the DOLFIN xml files written by
+flux_to_fenics_mesh_transfer.py back into NumPy arrays, without FEniCS, and for
+comparing two converted meshes.
+
+The files are read in blocks of whole lines, so that the memory taken besides
+the arrays stays the same whatever the size of the file. The records are picked
+out of the blocks by regular expressions, which match the layout of the files
+the converter writes, one record per line. The xml files of other writers, in
+which the records may be laid out differently, are read record by record with
+`xml.etree.ElementTree.iterparse` instead, clearing every element once read.
+Both ways give the same arrays.
+
+INPUTS============
+MESH_file         : a DOLFIN xml mesh file, such as mesh.xml, or mesh.xml.gz.
+
+MESH_function     : a DOLFIN xml mesh function file, such as
+                    physical_region.xml or facet_region.xml.
+
+LIBRARY===========
+    import dolfin_xml_reader as reader
+    mesh = reader.read_mesh('mesh.xml')
+    regions = reader.read_mesh_function('physical_region.xml')
+    # mesh.vertices is a (vertices, 3) float64 array, mesh.cells a
+    #   (cells, nodes per cell) int32 array, and regions.values an int64 array
+    differences = reader.diff_meshes('mesh.xml', 'old/mesh.xml',
+        [('physical_region.xml', 'old/physical_region.xml')])
+
+USAGE=============
+python3 dolfin_xml_reader.py <MESH_file> <MESH_file> [<MESH_function> \
+<MESH_function>]... [-t <tolerance>] [--strict]
+
+compares the two meshes, and the mesh functions given in pairs after them, the
+first of each pair being on the first mesh, printing their differences. The
+exit status is 1 if they differ. The meshes are compared by structure: two
+meshes whose vertices and cells are only numbered differently, for instance by
+the `--reorder` flag of the converter, are the same, unless the `--strict` flag
+is given.
+"""
+
+
+# IMPORT PYTHON LIBRARIES
+import sys, getopt          # for script I/O arguments detection
+import re                   # for the fast reading of the records
+import gzip                 # for compressed .xml.gz files
+from array import array     # for collecting the records element by element
+from itertools import chain # for joining the texts of the numbers
+from itertools import combinations # for the facets of the cells
+from contextlib import contextmanager # for accepting filenames or file objects
+
+
+# DEFINE CONSTANTS
+# the number of bytes of the file read at once, rounded to whole lines
+READ_BLOCK = 1 << 22
+# the number of vertices of the cells, by DOLFIN cell type
+CELL_WIDTHS = {'interval': 2, 'triangle': 3, 'quadrilateral': 4, \
+'tetrahedron': 4, 'hexahedron': 8}
+# the mesh function types read as integers, the others being read as float64
+INTEGER_TYPES = ('int', 'uint', 'size_t', 'bool')
+
+# DEFINE REGULAR EXPRESSIONS
+# the opening tags, which give the cell type and the sizes of the records
+MESH_TAG = re.compile(br'<mesh\s+celltype="(\w+)"\s+dim="(\d+)"')
+SIZE_TAG = re.compile(br'<(vertices|cells)\s+size="(\d+)"')
+FUNCTION_TAG = re.compile( \
+br'<mesh_function\s+type="(\w+)"\s+dim="(\d+)"\s+size="(\d+)"')
+# the records, in the layout written by the converter and by DOLFIN, where the
+#   z-coordinate is left out of 2D meshes
+VERTEX_RECORD = re.compile(br'<vertex\s+index="(\d+)"\s+x="([^"]*)"\s+' \
+br'y="([^"]*)"(?:\s+z="([^"]*)")?\s*/>')
+ENTITY_RECORD = re.compile(br'<entity\s+index="(\d+)"\s+value="([^"]*)"\s*/>')
+
+
+# DEFINE CLASSES
+class XmlMesh(object):
+    '''
+    A DOLFIN xml mesh, as returned by `read_mesh`.
+
+    Attributes
+    ----------
+    celltype : string
+        The DOLFIN cell type, such as 'triangle' or 'tetrahedron'.
+
+    dim : int
+        The topological dimension of the mesh.
+
+    vertices : numpy.ndarray
+        The float64 array of the xyz-coordinates of the vertices, one row per
+            vertex. The z-coordinates left out of a 2D mesh are 0.
+
+    cells : numpy.ndarray
+        The int32 array of the vertices of the cells, one row per cell.
+    '''
+    def __init__(self, celltype, dim, vertices, cells):
+        self.celltype = celltype
+        self.dim = dim
+        self.vertices = vertices
+        self.cells = cells
+
+class XmlMeshFunction(object):
+    '''
+    A DOLFIN xml mesh function, as returned by `read_mesh_function`.
+
+    Attributes
+    ----------
+    type : string
+        The DOLFIN value type, such as 'uint' or 'double'.
+
+    dim : int
+        The topological dimension of the mesh entities the values belong to.
+
+    values : numpy.ndarray
+        The array of the value of every entity, int64 for the integer and bool
+            types, and float64 otherwise.
+    '''
+    def __init__(self, type, dim, values):
+        self.type = type
+        self.dim = dim
+        self.values = values
+
+
+# DEFINE FUNCTIONS
+@contextmanager
+def open_xml(source):
+    '''
+    Open a filename for reading in binary, or pass an open file object through.
+
+    Parameters
+    ----------
+    source : string or file object
+        The name of the xml file, or of the `.gz` compressed xml file, to open,
+            or a binary file object open for reading. A file object is not
+            closed on exit, since it belongs to the caller.
+
+    Yields
+    ------
+    opened : file object
+        The binary file object to read from.
+    '''
+    if hasattr(source, 'read'):
+        yield source
+    elif source.endswith('.gz'):
+        with gzip.open(source, 'rb') as opened:
+            yield opened
+    else:
+        with open(source, 'rb') as opened:
+            yield opened
+
+def read_line_blocks(source):
+    '''
+    Yield the content of an xml file in blocks of whole lines.
+
+    Parameters
+    ----------
+    source : string or file object
+        The xml file, as taken by `open_xml`.
+
+    Yields
+    ------
+    block : bytes
+        About `READ_BLOCK` bytes of the file, ending at the end of a line, or
+            at the end of the file.
+    '''
+    with open_xml(source) as xml:
+        rest = b''
+        while True:
+            block = xml.read(READ_BLOCK)
+            if not block:
+                break
+            end = block.rfind(b'\n') + 1
+            if end == 0:
+                # no end of line yet, so the line goes on in the next block
+                rest += block
+                continue
+            yield rest + block[:end]
+            rest = block[end:]
+        if rest:
+            yield rest
+
+def iterparse_elements(source):
+    '''
+    Yield the tag and the attributes of every element of an xml file in order.
+
+    The elements are read by `xml.etree.ElementTree.iterparse`, and removed from
+        their parent once they end, so that the tree never grows beyond the
+        elements that are still open.
+
+    Parameters
+    ----------
+    source : string or file object
+        The xml file, as taken by `open_xml`.
+
+    Yields
+    ------
+    tag : string
+        The tag of the element, without its namespace.
+
+    attributes : dict
+        The attributes of the element.
+    '''
+    from xml.etree.ElementTree import iterparse
+
+    with open_xml(source) as xml:
+        opened = []
+        for event, element in iterparse(xml, events=('start', 'end')):
+            if event == 'start':
+                opened.append(element)
+                yield element.tag.rpartition('}')[2], element.attrib
+            else:
+                opened.pop()
+                element.clear()
+                if opened:
+                    del opened[-1][:]
+
+def import_numpy():
+    '''
+    Return the numpy module, which the arrays read from the files are made of.
+
+    Raises
+    ------
+    ImportError
+        If the `numpy` package is not installed.
+    '''
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('Reading DOLFIN xml files needs the numpy package.')
+    return numpy
+
+def parse_numbers(records, width, dtype):
+    '''
+    Parse the numbers of the records matched by a regular expression at once.
+
+    The texts of the numbers are joined, and parsed by `numpy.fromstring`, which
+        is several times faster than parsing them one by one.
+
+    Parameters
+    ----------
+    records : list
+        The tuples of the texts of the numbers of every record, as given by the
+            `findall` of the regular expression.
+
+    width : int
+        The number of numbers of a record.
+
+    dtype : string
+        The type of the numbers, 'int64' or 'float64'.
+
+    Returns
+    -------
+    numbers : numpy.ndarray
+        The numbers, one row per record.
+
+    Raises
+    ------
+    ValueError
+        If a text is not a number.
+    '''
+    numpy = import_numpy()
+
+    numbers = numpy.fromstring(b' '.join(chain.from_iterable(records)), \
+    dtype=dtype, sep=' ')
+    if len(numbers) != width * len(records):
+        # an empty text, like the z-coordinate left out of 2D meshes, is 0
+        numbers = numpy.fromstring(b' '.join(number or b'0' \
+        for number in chain.from_iterable(records)), dtype=dtype, sep=' ')
+    if len(numbers) != width * len(records):
+        raise ValueError('Records with values that are not numbers')
+    return numbers.reshape(len(records), width)
+
+def collect_records(blocks, width, dtype):
+    '''
+    Return the records parsed from the blocks of a file as a single array.
+    '''
+    numpy = import_numpy()
+
+    if not blocks:
+        return numpy.zeros((0, width), dtype=dtype)
+    return numpy.concatenate(blocks)
+
+def place_records(records, size, name, dtype):
+    '''
+    Put the records read from an xml file into an array, in the index order.
+
+    Parameters
+    ----------
+    records : numpy.ndarray
+        The array of the records, one row per record in the order of the file,
+            starting with the `index` attribute of the record.
+
+    size : int
+        The number of records given by the `size` attribute of their parent.
+
+    name : string
+        The tag of the records, for the error messages.
+
+    dtype : string
+        The type of the values of the records.
+
+    Returns
+    -------
+    values : numpy.ndarray
+        The array of the values, one row per record, the record of index `i`
+            being the row `i`.
+
+    Raises
+    ------
+    ValueError
+        If the indices are not the numbers from 0 to `size` - 1, each once.
+    '''
+    numpy = import_numpy()
+
+    index = records[:, 0].astype('int64')
+    values = records[:, 1:].astype(dtype)
+    if len(index) != size:
+        raise ValueError('Wrong number of %s records : %d for a size of %d' \
+        % (name, len(index), size))
+    if size and (index != numpy.arange(size)).any():
+        # the records are out of order, so they are put in place by index
+        if index.min() < 0 or index.max() >= size or \
+        numpy.bincount(index, minlength=size).max() > 1:
+            raise ValueError('Wrong %s indices, which must number the records '
+            'from 0 to %d once each' % (name, size - 1))
+        placed = numpy.empty_like(values)
+        placed[index] = values
+        values = placed
+    return values
+
+def parse_mesh_lines(source):
+    '''
+    Read the records of a DOLFIN xml mesh file with regular expressions.
+
+    The file is read by `read_line_blocks`, and the records of every block are
+        picked out of it by `VERTEX_RECORD`, and by a regular expression of the
+        cell records built from the cell type, and parsed by `parse_numbers`.
+        The records that do not match the expressions are missed, which
+        `place_records` finds out from the number of records.
+
+    Parameters
+    ----------
+    source : string or file object
+        The xml mesh file, as taken by `open_xml`.
+
+    Returns
+    -------
+    header : dict
+        The 'celltype' and the 'dim' of the mesh, and the sizes of the
+            'vertices' and of the 'cells'.
+
+    vertices : numpy.ndarray
+        The float64 array of the index and the xyz-coordinates of every vertex
+            record.
+
+    cells : numpy.ndarray
+        The int64 array of the index and the vertices of every cell record.
+
+    Raises
+    ------
+    ValueError
+        If the mesh tag, or the size of the vertices or of the cells, is not
+            found in a layout that the regular expressions match.
+    '''
+    header = {}
+    width = None
+    vertices, cells = [], []
+    for block in read_line_blocks(source):
+        if width is None:
+            found = MESH_TAG.search(block)
+            if found:
+                header['celltype'] = found.group(1).decode('ascii')
+                header['dim'] = int(found.group(2))
+                width = CELL_WIDTHS.get(header['celltype'])
+                if width is None:
+                    raise ValueError('Unknown cell type : ' + header['celltype'])
+                cell_record = re.compile(br'<' + found.group(1) + \
+                br'\s+index="(\d+)"' + b''.join(br'\s+v%d="(\d+)"' \
+                % vertex for vertex in range(0, width)) + br'\s*/>')
+        for found in SIZE_TAG.finditer(block):
+            header[found.group(1).decode('ascii')] = int(found.group(2))
+
+        records = VERTEX_RECORD.findall(block)
+        if records:
+            vertices.append(parse_numbers(records, 4, 'float64'))
+        if width is not None:
+            records = cell_record.findall(block)
+            if records:
+                cells.append(parse_numbers(records, width + 1, 'int64'))
+
+    if width is None or 'vertices' not in header or 'cells' not in header:
+        raise ValueError('No DOLFIN mesh found in the expected layout')
+    return header, collect_records(vertices, 4, 'float64'), \
+    collect_records(cells, width + 1, 'int64')
+
+def parse_mesh_elements(source):
+    '''
+    Read the records of a DOLFIN xml mesh file with `iterparse_elements`.
+
+    This is the general way of `parse_mesh_lines`, for the files in any layout.
+        It takes the same parameter and returns the same values.
+    '''
+    numpy = import_numpy()
+
+    header = {}
+    width = None
+    vertices, cells = array('d'), array('d')
+    for tag, attributes in iterparse_elements(source):
+        if tag == 'vertex':
+            vertices.append(float(attributes['index']))
+            vertices.extend([float(attributes.get(axis, 0.0)) for axis in 'xyz'])
+        elif tag == header.get('celltype'):
+            cells.append(float(attributes['index']))
+            cells.extend([float(attributes['v%d' % vertex]) \
+            for vertex in range(0, width)])
+        elif tag == 'mesh':
+            header['celltype'] = attributes['celltype']
+            header['dim'] = int(attributes['dim'])
+            width = CELL_WIDTHS.get(header['celltype'])
+            if width is None:
+                raise ValueError('Unknown cell type : ' + header['celltype'])
+        elif tag in ('vertices', 'cells'):
+            header[tag] = int(attributes['size'])
+
+    if width is None or 'vertices' not in header or 'cells' not in header:
+        raise ValueError('No DOLFIN mesh found')
+    return header, numpy.array(vertices).reshape(-1, 4), \
+    numpy.array(cells).reshape(-1, width + 1)
+
+def read_records(source, method, parsers, build):
+    '''
+    Read an xml file with the parsers of a reading method, and build its arrays.
+
+    Parameters
+    ----------
+    source : string or file object
+        The xml file, as taken by `open_xml`.
+
+    method : string
+        'lines' to read the records with the first parser, 'elements' to read
+            them with the second one, or 'auto' to read them with the first
+            one, and over again with the second one if their layout is not the
+            expected one. A file object is only read over again if it can seek.
+
+    parsers : tuple
+        The parser by regular expressions and the parser by elements, which
+            return the header and the records of the file.
+
+    build : function
+        The function building the arrays from the header and the records.
+
+    Returns
+    -------
+    built : object
+        What `build` returns.
+
+    Raises
+    ------
+    ValueError
+        If the reading method is unknown, or if the last parser tried raises it.
+    '''
+    if method == 'auto':
+        tried = parsers
+    elif method in ('lines', 'elements'):
+        tried = parsers[:1] if method == 'lines' else parsers[1:]
+    else:
+        raise ValueError('Unknown reading method : ' + method)
+    rewind = hasattr(source, 'seek') or not hasattr(source, 'read')
+
+    for attempt, parse in enumerate(tried):
+        if attempt > 0 and hasattr(source, 'seek'):
+            source.seek(0)
+        try:
+            return build(*parse(source))
+        except ValueError:
+            if attempt == len(tried) - 1 or not rewind:
+                raise
+
+def build_mesh(header, vertices, cells):
+    '''
+    Return the `XmlMesh` of the header and the records of a mesh file.
+    '''
+    return XmlMesh(header['celltype'], header['dim'], place_records(vertices, \
+    header['vertices'], 'vertex', 'float64'), place_records(cells, \
+    header['cells'], header['celltype'], 'int32'))
+
+def read_mesh(source, method='auto'):
+    '''
+    Read a DOLFIN xml mesh file into NumPy arrays.
+
+    Parameters
+    ----------
+    source : string or file object
+        The xml mesh file, as taken by `open_xml`.
+
+    method : string
+        'lines' to read the records with `parse_mesh_lines`, 'elements' to read
+            them with `parse_mesh_elements`, or 'auto' to read them with
+            `parse_mesh_lines`, and over again with `parse_mesh_elements` if
+            their layout is not the expected one, as done by `read_records`.
+
+    Returns
+    -------
+    mesh : XmlMesh
+        The cell type, the dimension, the vertices and the cells of the mesh.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a DOLFIN mesh, or if its records do not match the
+            sizes of the vertices and of the cells.
+    '''
+    return read_records(source, method, (parse_mesh_lines, \
+    parse_mesh_elements), build_mesh)
+
+def parse_function_lines(source):
+    '''
+    Read the records of a DOLFIN xml mesh function file with regular expressions.
+
+    Like `parse_mesh_lines`, the records of every block are picked out of it by
+        `ENTITY_RECORD`, and parsed by `parse_numbers`, which leaves the bool
+        values to `parse_function_elements`.
+
+    Parameters
+    ----------
+    source : string or file object
+        The xml mesh function file, as taken by `open_xml`.
+
+    Returns
+    -------
+    header : dict
+        The 'type', the 'dim' and the 'size' of the mesh function.
+
+    entities : numpy.ndarray
+        The float64 array of the index and the value of every entity record.
+
+    Raises
+    ------
+    ValueError
+        If the mesh function tag is not found in the layout that
+            `FUNCTION_TAG` matches.
+    '''
+    header = {}
+    entities = []
+    for block in read_line_blocks(source):
+        if not header:
+            found = FUNCTION_TAG.search(block)
+            if found:
+                header = {'type': found.group(1).decode('ascii'), \
+                'dim': int(found.group(2)), 'size': int(found.group(3))}
+        records = ENTITY_RECORD.findall(block)
+        if records:
+            entities.append(parse_numbers(records, 2, 'float64'))
+
+    if not header:
+        raise ValueError('No DOLFIN mesh function found in the expected layout')
+    return header, collect_records(entities, 2, 'float64')
+
+def parse_function_elements(source):
+    '''
+    Read the records of a DOLFIN xml mesh function file with `iterparse_elements`.
+
+    This is the general way of `parse_function_lines`, for the files in any
+        layout. It takes the same parameter and returns the same values.
+    '''
+    numpy = import_numpy()
+
+    header = {}
+    entities = array('d')
+    for tag, attributes in iterparse_elements(source):
+        if tag == 'entity':
+            entities.append(float(attributes['index']))
+            entities.append(parse_bool(attributes['value']) \
+            if header.get('type') == 'bool' else float(attributes['value']))
+        elif tag == 'mesh_function':
+            header = {'type': attributes['type'], \
+            'dim': int(attributes['dim']), 'size': int(attributes['size'])}
+
+    if not header:
+        raise ValueError('No DOLFIN mesh function found')
+    return header, numpy.array(entities).reshape(-1, 2)
+
+def parse_bool(text):
+    '''
+    Return 1.0 for the text of a true bool value, and 0.0 otherwise.
+    '''
+    return 1.0 if text in ('true', '1') else 0.0
+
+def build_function(header, entities):
+    '''
+    Return the `XmlMeshFunction` of the header and the records of a function.
+    '''
+    values = place_records(entities, header['size'], 'entity', 'float64')[:, 0]
+    if header['type'] in INTEGER_TYPES:
+        values = values.astype('int64')
+    return XmlMeshFunction(header['type'], header['dim'], values)
+
+def read_mesh_function(source, method='auto'):
+    '''
+    Read a DOLFIN xml mesh function file into a NumPy array.
+
+    Parameters
+    ----------
+    source : string or file object
+        The xml mesh function file, as taken by `open_xml`.
+
+    method : string
+        'lines', 'elements' or 'auto', as for `read_mesh`, with
+            `parse_function_lines` and `parse_function_elements`.
+
+    Returns
+    -------
+    function : XmlMeshFunction
+        The type, the dimension and the values of the mesh function.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a DOLFIN mesh function, or if its records do not
+            match its size.
+    '''
+    return read_records(source, method, (parse_function_lines, \
+    parse_function_elements), build_function)
+
+def entity_vertices(mesh, dim):
+    '''
+    Return the vertices of the mesh entities of a dimension, numbered like DOLFIN.
+
+    The entities of dimension 0 are the vertices, and those of the dimension of
+        the mesh are the cells. The others, such as the edges of a triangle
+        mesh, or the edges and the triangles of a tetrahedron mesh, are the
+        unique sorted tuples of the vertices of the cells, numbered in their
+        sorted order, as DOLFIN numbers them, and as the converter writes the
+        facet region file.
+
+    Parameters
+    ----------
+    mesh : XmlMesh
+        The mesh.
+
+    dim : int
+        The dimension of the entities.
+
+    Returns
+    -------
+    entities : numpy.ndarray
+        The int array of the vertices of the entities, one row per entity.
+    '''
+    numpy = import_numpy()
+
+    if dim == 0:
+        return numpy.arange(len(mesh.vertices)).reshape(-1, 1)
+    if dim == mesh.dim:
+        return mesh.cells
+    width = mesh.cells.shape[1]
+    entities = numpy.vstack([numpy.sort(mesh.cells[:, list(nodes)], axis=1) \
+    for nodes in combinations(range(0, width), dim + 1)])
+    return numpy.unique(entities, axis=0)
+
+def match_vertices(first, second, tolerance=0.0):
+    '''
+    Match the vertices of two meshes by their coordinates, whatever their numbering.
+
+    The vertices are sorted in the lexicographic order of their coordinates, and
+        matched by rank where the coordinates agree. The vertices left around
+        the ones that moved are merged in that order, so that a moved vertex
+        does not shift the match of the vertices after it, and the vertices
+        left unmatched are paired in that order.
+
+    Parameters
+    ----------
+    first, second : numpy.ndarray
+        The coordinates of the vertices of the meshes, of the same shape.
+
+    tolerance : float
+        The difference of the coordinates below which two vertices match.
+
+    Returns
+    -------
+    match : numpy.ndarray
+        The number in the second mesh of every vertex of the first mesh.
+    '''
+    numpy = import_numpy()
+
+    first_order = numpy.lexsort(first.T[::-1])
+    second_order = numpy.lexsort(second.T[::-1])
+    first_sorted, second_sorted = first[first_order], second[second_order]
+    agree = numpy.abs(first_sorted - second_sorted).max(axis=1) <= tolerance \
+    if len(first) else numpy.zeros(0, dtype=bool)
+    match = numpy.empty(len(first), dtype=numpy.int64)
+    match[first_order[agree]] = second_order[agree]
+
+    # the vertices left are few, unless the meshes differ widely
+    left = numpy.flatnonzero(~agree).tolist()
+    first_moved, second_moved = [], []
+    i = j = 0
+    while i < len(left) and j < len(left):
+        a, b = first_sorted[left[i]], second_sorted[left[j]]
+        if numpy.abs(a - b).max() <= tolerance:
+            match[first_order[left[i]]] = second_order[left[j]]
+            i, j = i + 1, j + 1
+        elif tuple(a) < tuple(b):
+            first_moved.append(left[i])
+            i += 1
+        else:
+            second_moved.append(left[j])
+            j += 1
+    first_moved.extend(left[i:])
+    second_moved.extend(left[j:])
+    match[first_order[numpy.array(first_moved, dtype=numpy.int64)]] = \
+    second_order[numpy.array(second_moved, dtype=numpy.int64)]
+    return match
+
+def canonical_entities(entities, numbers):
+    '''
+    Put mesh entities in an order that does not depend on the mesh numbering.
+
+    The vertices of every entity are replaced by their numbers in a common
+        numbering, as given by `match_vertices`, and sorted, and the entities
+        are sorted by them.
+
+    Returns
+    -------
+    order : numpy.ndarray
+        The number of the entity in every place of the canonical order.
+
+    canonical : numpy.ndarray
+        The common numbers of the vertices of the entities, in the canonical
+            order.
+    '''
+    numpy = import_numpy()
+
+    canonical = numpy.sort(numbers[entities], axis=1)
+    order = numpy.lexsort(canonical.T[::-1])
+    return order, canonical[order]
+
+def count_differences(name, first, second, tolerance=0.0, order=None):
+    '''
+    Describe the rows of two arrays of the same shape that differ.
+
+    Parameters
+    ----------
+    name : string
+        The name of the rows, for the description.
+
+    first, second : numpy.ndarray
+        The arrays to compare, row by row.
+
+    tolerance : float
+        The difference of the values above which two rows differ.
+
+    order : numpy.ndarray
+        The number in the first mesh of every row, for pointing out the first
+            of the rows that differ, or None if the rows are in the order of
+            the first mesh.
+
+    Returns
+    -------
+    difference : string
+        The number of the rows that differ, the first of them and the largest
+            difference, or None if no row differs.
+    '''
+    numpy = import_numpy()
+
+    first = first.reshape(len(first), -1)
+    second = second.reshape(len(second), -1)
+    if tolerance > 0.0 or first.dtype.kind == 'f':
+        gaps = numpy.abs(first.astype('float64') - second).max(axis=1) \
+        if len(first) else numpy.zeros(0)
+        differ = gaps > tolerance
+    else:
+        gaps = None
+        differ = (first != second).any(axis=1)
+    count = int(numpy.count_nonzero(differ))
+    if count == 0:
+        return None
+    first_row = int(numpy.argmax(differ))
+    if order is not None:
+        first_row = int(order[first_row])
+    description = '%s : %d of %d differ, the first being %d' % (name, count, \
+    len(differ), first_row)
+    if gaps is not None:
+        description += ', by up to %.3e' % gaps.max()
+    return description
+
+def diff_meshes(first_mesh, second_mesh, functions=(), tolerance=0.0, \
+strict=False):
+    '''
+    Compare the structure of two DOLFIN xml meshes, and of mesh functions on them.
+
+    The meshes are the same when they have the same cell type, the same vertices
+        and the same cells. Unless `strict` is True, the numbering of the
+        vertices and of the cells does not matter: if the meshes are not
+        numbered alike, that is if their cells differ, the vertices are matched
+        by their coordinates, as by `match_vertices`, and the cells, and the
+        other entities the mesh functions are on, by the sorted numbers of the
+        matched vertices, in O(n log n). The vertices of a mesh must then be at
+        distinct places, and the orientation of the cells does not matter.
+        Either way, only the vertices that moved differ.
+
+    Parameters
+    ----------
+    first_mesh, second_mesh : string or file object
+        The xml mesh files to compare, as taken by `open_xml`.
+
+    functions : list
+        The pairs of xml mesh function files to compare, the first of each
+            pair being on the first mesh, and the second on the second mesh.
+
+    tolerance : float
+        The difference of the coordinates, and of the float values of the mesh
+            functions, below which they are the same.
+
+    strict : bool
+        If True, the vertices and the cells of the meshes must be numbered
+            alike to be the same.
+
+    Returns
+    -------
+    differences : list
+        The descriptions of the differences, as printable strings, which is
+            empty if the meshes and the mesh functions are the same.
+    '''
+    numpy = import_numpy()
+
+    first, second = read_mesh(first_mesh), read_mesh(second_mesh)
+    if (first.celltype, first.dim) != (second.celltype, second.dim):
+        return ['Cell types : %s of dimension %d != %s of dimension %d' \
+        % (first.celltype, first.dim, second.celltype, second.dim)]
+    differences = ['%s : %d != %d' % (name, len(a), len(b)) for name, a, b in \
+    (('Vertices', first.vertices, second.vertices), \
+    ('Cells', first.cells, second.cells)) if len(a) != len(b)]
+    if differences:
+        return differences
+
+    # the meshes with the same cells are numbered alike, and compared entity by
+    #   entity, so that only the vertices that moved differ
+    cells = count_differences('Cells', first.cells, second.cells)
+    alike = strict or cells is None
+    if alike:
+        differences = [count_differences('Vertices', first.vertices, \
+        second.vertices, tolerance), cells]
+    else:
+        match = match_vertices(first.vertices, second.vertices, tolerance)
+        numbers = numpy.arange(len(second.vertices))
+        differences = [count_differences('Vertices', first.vertices, \
+        second.vertices[match], tolerance)]
+        orders = [canonical_entities(mesh.cells, mesh_numbers) \
+        for mesh, mesh_numbers in ((first, match), (second, numbers))]
+        differences.append(count_differences('Cells', orders[0][1], \
+        orders[1][1], order=orders[0][0]))
+
+    for first_function, second_function in functions:
+        name = getattr(first_function, 'name', first_function)
+        a, b = read_mesh_function(first_function), \
+        read_mesh_function(second_function)
+        if a.dim != b.dim or len(a.values) != len(b.values):
+            differences.append('%s : %d entities of dimension %d != %d of '
+            'dimension %d' % (name, len(a.values), a.dim, len(b.values), b.dim))
+        elif alike:
+            differences.append(count_differences(name, a.values, b.values, \
+            tolerance))
+        else:
+            orders = [canonical_entities(entity_vertices(mesh, a.dim), \
+            mesh_numbers) for mesh, mesh_numbers in ((first, match), \
+            (second, numbers))]
+            if len(orders[0][1]) != len(a.values) or \
+            len(orders[1][1]) != len(b.values):
+                differences.append('%s : %d values for %d entities of dimension '
+                '%d' % (name, len(a.values), len(orders[0][1]), a.dim))
+            elif not numpy.array_equal(orders[0][1], orders[1][1]):
+                differences.append('%s : the entities of dimension %d differ' \
+                % (name, a.dim))
+            else:
+                differences.append(count_differences(name, \
+                a.values[orders[0][0]], b.values[orders[1][0]], tolerance, \
+                orders[0][0]))
+
+    return [difference for difference in differences if difference is not None]
+
+def main():
+    '''
+    Compare the meshes and the mesh functions given on the command line.
+    '''
+    usage = 'dolfin_xml_reader.py <MESH_file> <MESH_file> [<MESH_function> \
+<MESH_function>]... [-t <tolerance>] [--strict]'
+    try:
+        opts, args = getopt.gnu_getopt(sys.argv[1:], "ht:", ["tolerance=", \
+        "strict"])
+    except getopt.GetoptError:
+        sys.exit('Error: Unrecognized option specified!')
+
+    tolerance = 0.0
+    strict = False
+    for opt, arg in opts:
+        if opt == '-h':
+            sys.exit(usage)
+        elif opt in ('-t', '--tolerance'):
+            try:
+                tolerance = float(arg)
+            except ValueError:
+                tolerance = -1.0
+            if tolerance < 0.0:
+                sys.exit('Error: Tolerance must be a non-negative number!')
+        elif opt == '--strict':
+            strict = True
+
+    if len(args) < 2 or len(args) % 2:
+        sys.exit(usage)
+
+    differences = diff_meshes(args[0], args[1], list(zip(args[2::2], \
+    args[3::2])), tolerance, strict)
+    for difference in differences:
+        print('Difference : ', difference)
+    if differences:
+        sys.exit(1)
+    print('No difference between : ', args)
+
+# RUN MAIN
+if __name__ == '__main__':
+    main()
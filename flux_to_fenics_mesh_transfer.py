@@ -34,12 +34,173 @@ MESH_output       : an xml file that this python script generates. This xml
 PHYSICAL_region   : an xml file that this python script generates. This xml
                     file contains the element numbers and their corresponding
                     physical region characteristics in coded numbers.
+
+LIBRARY===========
+The script can also be imported as a module, without any side effects. The
+`convert` function reads the Flux exports, given as filenames or as open file
+objects, and returns a `Mesh` holding the node, face element and region arrays
+in memory. The `write_*` functions write a `Mesh` into the output files:
+
+    import flux_to_fenics_mesh_transfer as flux
+    mesh = flux.convert('mesh-node-export-first-order.txt',
+                        'mesh-face-export-first-order.txt',
+                        'face-physical-description.txt')
+    flux.write_mesh_files(mesh, ['mesh.xml', 'physical_region.xml'])
+
+No file is written into the working directory behind the caller's back, so
+conversions can run concurrently, for instance from worker processes.
 """
 
 
 # IMPORT PYTHON LIBRARIES
-import sys, getopt          # for script I/O arguments detection
+# the modules that only some runs need, such as getopt for the terminal,
+#   hashlib for the conversion cache and gzip for compressed outputs, and the
+#   optional packages, are imported where they are used, so that the script
+#   starts fast within Flux, which runs it once for every export
+import sys                  # for script I/O arguments detection
+import os                   # for locating the heavy data of XDMF outputs
 from fnmatch import fnmatch # for recognizing patterns in a string of characters
+from array import array     # for compact, typed storage of the mesh data
+from collections import OrderedDict # for numbering regions in occurrence order
+from bisect import bisect_left # for looking up edges in the sorted edge table
+from itertools import groupby # for the runs of elements of the same kind
+from itertools import product # for the neighbouring cells of the spatial index
+from itertools import compress # for selecting the cells of some regions
+from math import floor, sqrt # for the spatial index, and the edges of cells
+import re                   # for bulk parsing of the numeric fields
+import struct               # for the binary files of the conversion cache
+from contextlib import contextmanager # for accepting filenames or file objects
+import time                 # for the throughput summary of batch conversions
+
+
+# DEFINE TEXT PATTERNS
+# the three coordinate values following a ` coordinates ` line of a Node
+NODE_COORDINATES = re.compile(br' coordinates [^\n]*\n(\s*\S+\s+\S+\s+\S+)')
+# the node numbers on the `NODES` line of a face element
+FACE_NODES = re.compile(br'NODES[^:\n]*:([^\n]*)')
+# the geometric face number on the ` LOC ` line of a face element
+FACE_LOC = re.compile(br' LOC [^:\n]*:[^0-9\n]*([0-9]+)')
+# any unsigned integer
+INTEGER = re.compile(br'[0-9]+')
+
+# DEFINE ELEMENT KINDS
+# the Flux elements by their number of nodes, with the columns of the corner
+#   nodes of the first-order simplices that each of them is turned into. The
+#   nodes of second-order elements are assumed to alternate between corner and
+#   mid-side nodes, and every node becomes a vertex of the first-order simplices
+FACE_ELEMENT_SPLITS = {
+    3: ((0, 1, 2),),                # triangle
+    4: ((0, 1, 2), (0, 2, 3)),      # quadrangle, split along a diagonal
+    6: ((0, 1, 5), (1, 2, 3), (3, 4, 5), (1, 3, 5)), # second-order triangle,
+                                    #   split into its four corner and middle
+                                    #   triangles
+    8: ((0, 1, 7), (1, 2, 3), (3, 4, 5), (5, 6, 7), (1, 3, 5), (1, 5, 7)),
+                                    # second-order quadrangle, split into its
+                                    #   four corner triangles and its middle
+                                    #   quadrangle, along a diagonal
+    }
+LINE_ELEMENT_SPLITS = {
+    2: ((0, 1),),                   # line
+    3: ((0, 1), (1, 2)),            # second-order line, split at its middle
+    }
+VOLUME_ELEMENT_SPLITS = {
+    4: ((0, 1, 2, 3),),             # tetrahedron
+    }
+# the cells of DOLFIN, by the topological dimension of the mesh
+CELL_TYPES = {2: 'triangle', 3: 'tetrahedron'}
+
+# DEFINE ORDERINGS
+# the orderings of the cells, which all come with the reverse Cuthill-McKee
+#   numbering of the nodes
+REORDER_METHODS = ('rcm', 'hilbert', 'morton')
+
+# DEFINE PARTITIONINGS
+# the partitioners of the cells: recursive coordinate bisection, or METIS
+PARTITION_METHODS = ('rcb', 'metis')
+# the bits of a byte, spread apart to every second and every third bit, for
+#   interleaving the coordinates of the cells into keys of space-filling curves,
+#   by dimension, as built by `spread_bits` on first use
+SPREAD_BITS = {}
+
+# DEFINE SIZES
+# the size of the chunks that the Flux exports are read in
+CHUNK_SIZE = 1 << 22
+# the number of xml lines that are formatted and written at once
+WRITE_BATCH = 1 << 16
+# the number of cells that are validated at once
+VALIDATION_BATCH = 1 << 18
+# the numbers of cells, and of values of plain arrays, from which NumPy is
+#   imported to handle them, below which its import, of about 0.1 s, takes
+#   longer than handling them without it
+NUMPY_CELLS = 1 << 13
+NUMPY_VALUES = 1 << 18
+
+# DEFINE ARRAY FILES
+# the binary files of typed arrays, as written by `write_array_file`, start with
+#   the magic bytes, the version of the format and the number of arrays
+ARRAY_FILE_MAGIC = b'FLUXARR\x00'
+ARRAY_FILE_VERSION = 1
+ARRAY_FILE_HEADER = '<8sII'
+# every array has a header of its name, typecode, item size and length, and its
+#   values are padded to a multiple of 8 bytes, so that all arrays are aligned
+ARRAY_HEADER = '<8scB6xQ'
+ARRAY_ALIGNMENT = 8
+# the names of the arrays that the conversion cache keeps, by kind of export
+CACHED_ARRAYS = {'nodes': ['nodes'], 'faces': ['cells', 'locs'], \
+'volumes': ['cells', 'locs']}
+
+# DEFINE MESH QUALITY
+# the bin edges of the histograms of the smallest angles, in degrees
+ANGLE_BINS = (0, 10, 20, 30, 40, 50, 60, 90)
+# the bin edges of the histograms of the aspect ratios, 1 for a regular simplex
+ASPECT_BINS = (1, 1.5, 2, 3, 5, 10, float('inf'))
+# the area or volume of a degenerate cell, relative to its longest edge
+DEGENERATE_TOLERANCE = 1e-12
+
+# DEFINE INSTRUMENTATION
+# the seconds between two updates of the progress indicator
+PROGRESS_INTERVAL = 0.5
+# the number of functions, by cumulative time, kept in the profile statistics
+PROFILE_FUNCTIONS = 40
+
+# DEFINE DEFAULT FILENAMES
+# the exports written by `flux_commands`: nodes, face elements, face regions,
+#   line elements and line regions, which `batch` also looks for
+EXPORT_FILENAMES = ['mesh-node-export-first-order.txt', \
+'mesh-face-export-first-order.txt', 'face-physical-description.txt', \
+'mesh-line-export-first-order.txt', 'line-physical-description.txt']
+# the exports of a Flux3D mesh: nodes, volume elements, volume regions, face
+#   elements and face regions
+VOLUME_EXPORT_FILENAMES = ['mesh-node-export-first-order.txt', \
+'mesh-volume-export-first-order.txt', 'volume-physical-description.txt', \
+'mesh-face-export-first-order.txt', 'face-physical-description.txt']
+# the mesh, physical region and facet region files
+OUTPUT_FILENAMES = ['mesh.xml', 'physical_region.xml', 'facet_region.xml']
+# the region number references of the cells and of the facets, by the
+#   topological dimension of the mesh
+REFERENCE_FILENAMES = {2: ['face_number_reference.txt', 'line_number_reference.txt'], \
+3: ['volume_number_reference.txt', 'face_number_reference.txt']}
+
+# DEFINE DEFAULT OPTIONS
+DEFAULT_OPTIONS = {
+    'keep_intermediates': False, # write the intermediate txt files
+    'precision': 16,             # digits after the decimal point of coordinates
+    'format': 'xml',             # output format, 'xml' or 'xdmf'
+    'chunk_rows': None,          # rows per HDF5 chunk, None for contiguous data
+    'jobs': 1,                   # worker processes for parsing, 0 for all CPUs
+    'cache_dir': None,           # directory of the conversion cache, or None
+    'cache_size': 1024,          # size limit of the conversion cache, in MB
+    'dim': 2,                    # 2 for Flux2D meshes, 3 for Flux3D meshes
+    'flux_export': False,        # go through txt exports when run within Flux
+    'reorder': None,             # ordering of nodes and cells, or None
+    'partitions': None,          # number of partitions to write, or None
+    'partitioner': 'rcb',        # partitioner of the cells, 'rcb' or 'metis'
+    'merge_tolerance': None,     # distance to merge nodes within, or None
+    'profile': None,             # JSON file of the profile statistics, or None
+    'quality': False,            # print the quality of the cells by region
+    'strict': False,             # stop at degenerate cells instead of reporting
+    'regions': None,             # names of the physical regions to write, or None
+    }
 
 
 # DEFINE FUNCTIONS
@@ -50,8 +211,34 @@ def check_inputoutput_arguments(script_arguments):
     The function is active when the python script is called from linux/windows
         terminal. It parses the command line call for input filenames and the
         output filenames. Input filenames are assumed to follow the `-i` flag,
-        and output filenames are assumed to follow `-o` flag. The `-h` flag
-        prints back a simple usage information.
+        and output filenames are assumed to follow `-o` flag. The optional
+        fourth and fifth input files are the line element export and the line
+        physical description, and the optional third output file is the facet
+        region file. The `-k` flag asks for the intermediate (debug) text files
+        to be written. The `-p` flag sets the number of digits written after
+        the decimal point of the node coordinates. The `-f` flag selects the output format, either the
+        legacy DOLFIN `xml` or `xdmf` with HDF5 heavy data, and the
+        `--chunk-rows` flag stores the HDF5 datasets in chunks of that many
+        rows. The `-j` flag sets the number of worker processes that parse the
+        exports. The `--cache-dir` flag keeps the parsed exports in a
+        conversion cache, whose size is limited to the number of MB given for
+        the `--cache-size` flag. The `-d 3` flag converts a Flux3D mesh, whose
+        second and third input files are the volume element export and the
+        volume physical description, and whose optional fourth and fifth
+        input files are the face element export and the face physical
+        description. The `--reorder` flag renumbers the nodes and the cells
+        for locality, with one of `REORDER_METHODS`. The `--partitions` flag
+        writes the mesh in that many partitions, each into its own files, as
+        partitioned by the method given for the `--partitioner` flag. The
+        `--merge-tolerance` flag merges the nodes closer to each other than the
+        given distance. The `--regions` flag only writes the mesh of the
+        physical regions named in the given comma-separated list, along with
+        the numbers of its nodes and cells in the whole mesh. The `--quality`
+        flag prints the quality of the cells of every physical region. The
+        `--strict` flag stops the conversion at the cells of zero area or
+        volume, which are otherwise reported. The `--profile` flag profiles the conversion, and writes the statistics
+        into the given JSON file. The `-h` flag prints back a simple usage
+        information.
 
     Parameters
     ----------
@@ -68,13 +255,40 @@ def check_inputoutput_arguments(script_arguments):
     outputfile : list
         A list of strings which contains only the filenames given for `-o`
             flag.
+
+    options : dict
+        A dictionary of the optional switches of the script call, which starts
+            as a copy of `DEFAULT_OPTIONS`. The key `keep_intermediates` is True
+            when the `-k` flag is given, the key `precision` holds the number
+            given for the `-p` flag, the key `format` holds the output format
+            given for the `-f` flag, the key `chunk_rows` holds the number
+            given for the `--chunk-rows` flag, the key `jobs` holds the
+            number given for the `-j` flag, the keys `cache_dir` and
+            `cache_size` hold the values given for the `--cache-dir` and
+            `--cache-size` flags, the key `dim` holds the number given for the
+            `-d` flag, the key `reorder` holds the method given for the
+            `--reorder` flag, the keys `partitions` and `partitioner` hold
+            the values given for the `--partitions` and `--partitioner`
+            flags, the key `merge_tolerance` holds the distance given for the
+            `--merge-tolerance` flag, the key `regions` holds the list of
+            names given for the `--regions` flag, the key `quality` is True
+            when the `--quality` flag is given, the key `strict` is True when
+            the `--strict` flag is given, and the key `profile` holds the
+            JSON file given for the `--profile` flag.
     '''
-    # initialize the input and output filenames
+    import getopt
+
+    # initialize the input and output filenames, and the optional switches
     inputfile = []
     outputfile = []
+    options = dict(DEFAULT_OPTIONS)
     # try for the options
     try:
-        opts, args = getopt.getopt(script_arguments, "hi:o:", ["ifile=","ofile="])
+        opts, args = getopt.getopt(script_arguments, "hki:o:p:f:j:d:", \
+["ifile=", "ofile=", "keep-intermediates", "precision=", "format=", \
+"chunk-rows=", "jobs=", "cache-dir=", "cache-size=", "dim=", "reorder=", \
+"partitions=", "partitioner=", "merge-tolerance=", "profile=", "quality", \
+"regions=", "strict"])
     except getopt.GetoptError:
         sys.exit("Error: Unrecognized option specified! and/or \
 input file missing!")
@@ -83,14 +297,24 @@ input file missing!")
         if opt == '-h':
             # display help
             sys.exit('flux_to_fenics_mesh_transfer.py -i <NODE_element_file> -i \
-<FACE_element_file> -i <FACE_physical_description> -o <MESH_output> -o \
-<PHYSICAL_region>')
+<FACE_element_file> -i <FACE_physical_description> [-i <LINE_element_file> -i \
+<LINE_physical_description>] -o <MESH_output> -o <PHYSICAL_region> [-o \
+<FACET_region>] [-k] [-p <digits>] [-f xml|xdmf] [--chunk-rows <rows>] [-j <jobs>] \
+[--cache-dir <directory>] [--cache-size <MB>] [-d 2|3] \
+[--reorder rcm|hilbert|morton] [--partitions <parts>] [--partitioner rcb|metis] \
+[--merge-tolerance <distance>] [--regions <name,...>] [--quality] [--strict] \
+[--profile <JSON_file>]')
         elif opt in ("-i", "--ifile"):
             # store input filename
             inputfile.append(arg)
         elif opt in ("-o", "--ofile"):
             # store output filename
             outputfile.append(arg)
+        elif opt == "--profile":
+            # profile the conversion into a JSON file
+            options['profile'] = arg
+        elif not apply_option(options, opt, arg):
+            sys.exit('Error: Unrecognized option specified!')
 
     if (inputfile == []) or (outputfile == []):
         sys.exit('Error: I/O files are not specified!')
@@ -99,9 +323,238 @@ input file missing!")
     print('Input files are : ', inputfile)
     print('Output files are : ', outputfile)
 
-    return inputfile, outputfile
+    return inputfile, outputfile, options
+
+def apply_option(options, opt, arg):
+    '''
+    Store an optional switch of the script call into the options.
+
+    The switches are shared by the conversion of a single mesh and by the
+        `batch` subcommand. Invalid values end the script with an error message,
+        and so does an output format whose packages are not installed, before
+        any export is parsed.
+
+    Parameters
+    ----------
+    options : dict
+        The options of the script call, as in `DEFAULT_OPTIONS`, which are
+            updated in place.
+
+    opt : string
+        The switch, as given by `getopt`, for instance "-p" or "--cache-dir".
+
+    arg : string
+        The value given for the switch, or an empty string.
+
+    Returns
+    -------
+    recognized : bool
+        False if `opt` is not one of the optional switches.
+    '''
+    if opt in ("-k", "--keep-intermediates"):
+        # write the intermediate txt files for debugging
+        options['keep_intermediates'] = True
+    elif opt in ("-p", "--precision"):
+        # digits after the decimal point of the node coordinates
+        try:
+            options['precision'] = int(arg)
+        except ValueError:
+            options['precision'] = -1
+        if options['precision'] < 0:
+            sys.exit('Error: Precision must be a non-negative integer!')
+    elif opt in ("-f", "--format"):
+        # output format of the mesh and the physical region files
+        if arg not in ('xml', 'xdmf'):
+            sys.exit('Error: Output format must be xml or xdmf!')
+        if arg == 'xdmf':
+            # fail before any export is parsed, rather than when writing
+            try:
+                import h5py, numpy
+            except ImportError:
+                sys.exit('Error: The xdmf output format needs the h5py and numpy \
+packages!')
+        options['format'] = arg
+    elif opt == "--chunk-rows":
+        # rows per chunk of the HDF5 datasets
+        try:
+            options['chunk_rows'] = int(arg)
+        except ValueError:
+            options['chunk_rows'] = 0
+        if options['chunk_rows'] < 1:
+            sys.exit('Error: Chunk rows must be a positive integer!')
+    elif opt in ("-j", "--jobs"):
+        # worker processes for parsing the exports
+        try:
+            options['jobs'] = int(arg)
+        except ValueError:
+            options['jobs'] = -1
+        if options['jobs'] < 0:
+            sys.exit('Error: Jobs must be a non-negative integer!')
+    elif opt in ("-d", "--dim"):
+        # topological dimension of the mesh
+        if arg not in ('2', '3'):
+            sys.exit('Error: Dimension must be 2 or 3!')
+        options['dim'] = int(arg)
+    elif opt == "--cache-dir":
+        # directory of the conversion cache
+        options['cache_dir'] = arg
+    elif opt == "--cache-size":
+        # size limit of the conversion cache, in MB
+        try:
+            options['cache_size'] = int(arg)
+        except ValueError:
+            options['cache_size'] = 0
+        if options['cache_size'] < 1:
+            sys.exit('Error: Cache size must be a positive integer!')
+    elif opt == "--reorder":
+        # ordering of the nodes and the cells
+        if arg not in REORDER_METHODS:
+            sys.exit('Error: Reordering must be rcm, hilbert or morton!')
+        options['reorder'] = arg
+    elif opt == "--partitions":
+        # number of partitions to write
+        try:
+            options['partitions'] = int(arg)
+        except ValueError:
+            options['partitions'] = 0
+        if options['partitions'] < 1:
+            sys.exit('Error: Partitions must be a positive integer!')
+    elif opt == "--partitioner":
+        # partitioner of the cells
+        if arg not in PARTITION_METHODS:
+            sys.exit('Error: Partitioner must be rcb or metis!')
+        options['partitioner'] = arg
+    elif opt == "--merge-tolerance":
+        # distance to merge the coincident nodes within
+        try:
+            options['merge_tolerance'] = float(arg)
+        except ValueError:
+            options['merge_tolerance'] = 0.0
+        if not options['merge_tolerance'] > 0.0:
+            sys.exit('Error: Merge tolerance must be a positive number!')
+    elif opt == "--regions":
+        # names of the physical regions to write, separated by commas
+        options['regions'] = [name.strip() for name in arg.split(',') \
+        if name.strip()]
+        if not options['regions']:
+            sys.exit('Error: Regions must be a list of physical region names!')
+    elif opt == "--quality":
+        # print the quality of the cells by physical region
+        options['quality'] = True
+    elif opt == "--strict":
+        # stop the conversion at degenerate cells
+        options['strict'] = True
+    else:
+        return False
+
+    return True
+
+@contextmanager
+def open_source(source, mode='rb'):
+    '''
+    Open a filename for reading, or pass an already open file object through.
+
+    Parameters
+    ----------
+    source : string or file object
+        The name of the file to open, or a file object open for reading. A file
+            object is not closed on exit, since it belongs to the caller.
+
+    mode : string
+        The mode to open a filename with.
+
+    Yields
+    ------
+    opened : file object
+        The file object to read from.
+    '''
+    if hasattr(source, 'read'):
+        yield source
+    else:
+        with open(source, mode) as opened:
+            yield opened
+
+@contextmanager
+def open_target(target, mode='w'):
+    '''
+    Open a filename for writing, or pass an already open file object through.
+
+    Parameters
+    ----------
+    target : string or file object
+        The name of the file to open, or a text file object open for writing. A
+            file object is not closed on exit, since it belongs to the caller.
+            A name ending with `.gz` is opened as a gzip-compressed file, like
+            the `.xml.gz` files that DOLFIN reads directly.
+
+    mode : string
+        The mode to open a filename with.
+
+    Yields
+    ------
+    opened : file object
+        The file object to write into.
+    '''
+    if hasattr(target, 'write'):
+        yield target
+    elif target.endswith('.gz'):
+        import gzip
+        # python 2 writes str as bytes, python 3 needs a text mode
+        with gzip.open(target, mode + ('t' if sys.version_info[0] > 2 else 'b')) \
+as opened:
+            yield opened
+    else:
+        with open(target, mode) as opened:
+            yield opened
+
+def format_record_batches(record_format, data, width):
+    '''
+    Format the rows of a flat array into xml lines, in large batches.
+
+    The function is a generator. The array is cut into rows of `width` values,
+        and every row is formatted with `record_format`, together with its index
+        as the first value. The lines of `WRITE_BATCH` rows are joined into a
+        single string, so that the file receives a few large writes instead of
+        one write per line.
+
+    Parameters
+    ----------
+    record_format : string
+        The `%` format of a single line, taking the row index followed by the
+            `width` values of the row.
+
+    data : array
+        The flat array of the values, `width` per row.
+
+    width : int
+        The number of values per row.
+
+    Yields
+    ------
+    batch : string
+        The formatted lines of up to `WRITE_BATCH` rows.
+    '''
+    count = len(data) // width
+    for start in range(0, count, WRITE_BATCH):
+        end = min(start + WRITE_BATCH, count)
+        columns = [data[width*start+k:width*end:width] for k in range(0, width)]
+        yield ''.join(map(record_format.__mod__, zip(range(start, end), *columns)))
+
+def source_name(source):
+    '''
+    Return a printable name of a filename or a file object, for error messages.
+    '''
+    return getattr(source, 'name', source)
+
+def native_string(text):
+    '''
+    Return bytes read from a Flux export as the native str of the interpreter.
+    '''
+    if isinstance(text, str):
+        return text
+    return text.decode('utf-8')
 
-def scrub_node_element_file(inputfiles):
+def scrub_node_element_file(inputfiles, directory=''):
     '''
     Brush off the irrelevant information within the node element text file.
 
@@ -112,12 +565,20 @@ def scrub_node_element_file(inputfiles):
         information are parsed according to `pattern1`, `pattern2` and `pattern3`
         as defined below.
 
+    The cleaned file is only a debugging aid. The mesh itself is built by
+        `retrieve_node_information` straight from the Flux export, so this
+        function is only called when the `-k` flag is given.
+
     Parameters
     ----------
     inputfiles : list
         A list of strings containing the filenames of input files that the user
             has provided to the script.
 
+    directory : string
+        The directory to write the cleaned file into. The working directory by
+            default.
+
     Returns
     -------
     node_element_file_cleaned : string
@@ -125,9 +586,6 @@ def scrub_node_element_file(inputfiles):
             important information as parsed by `pattern1`, `pattern2` and
             `pattern3`.
 
-    pattern2 : string
-        The string for parsing the coordinate information of the nodes.
-
     Creates
     -------
     node_element_file_cleaned : .txt file
@@ -135,7 +593,7 @@ def scrub_node_element_file(inputfiles):
     '''
     # define filenames
     node_element_file = inputfiles[0]
-    node_element_file_cleaned = 'node_element_file_cleaned.txt'
+    node_element_file_cleaned = os.path.join(directory, 'node_element_file_cleaned.txt')
 
     # define text patterns for the relevant node info
     pattern1 = '*Node*'
@@ -144,103 +602,367 @@ def scrub_node_element_file(inputfiles):
 
     with open(node_element_file_cleaned, 'w') as cleaned: # open write-only
         with open(node_element_file, 'r') as node_info:   # open read-only
-            lines = node_info.readlines() # read all the lines in the file
-            for i in range(0, len(lines)):# search through the read lines
+            for line in node_info: # stream through the lines of the file
                 # check for the patterns of text in the lines
-                if fnmatch(lines[i], pattern1):
+                if fnmatch(line, pattern1):
                     # Node number info
-                    cleaned.write(lines[i])
-                elif fnmatch(lines[i], pattern2):
+                    cleaned.write(line)
+                elif fnmatch(line, pattern2):
                     # Node coordinate info
-                    cleaned.write(lines[i]) # Node number
-                    cleaned.write(lines[i+1]) # x-coordinate value
-                    cleaned.write(lines[i+2]) # y-coordinate value
-                    cleaned.write(lines[i+3]) # z-coordinate value
-                elif fnmatch(lines[i], pattern3):
+                    cleaned.write(line) # Node number
+                    cleaned.write(next(node_info, '')) # x-coordinate value
+                    cleaned.write(next(node_info, '')) # y-coordinate value
+                    cleaned.write(next(node_info, '')) # z-coordinate value
+                elif fnmatch(line, pattern3):
                     # Node weight info
-                    cleaned.write(lines[i])
-
-    # return the name of the cleaned node info file and pattern2
-    return node_element_file_cleaned, pattern2
-
-def retrieve_node_information(node_element_file_cleaned, pattern2):
-    '''
-    Retrieve and store the xyz-coordinates of individual nodes in a list.
-
-    The function receieves the cleaned node element file, and the `pattern2`.
-        Then, it creates the `node_list` for storing the xyz-coordinates of the
-        nodes. The function follows the following convention:
-            1) `node_list` element indices designate the node number:
-                0eth element of list is Node(1)
-                1st  element of list is Node(2)
-                2nd  element of list is Node(3)
-                ...  .................. .......
-                n-1  element of list is Node(n)
-                nth  element of list is Node(n+1)
-            2) Each element of `node_list` is also a list of 3 elements:
-                node_list == [[x-coord, y-coord, z-coord], --> Node (1)
-                              [x-coord, y-coord, z-coord], --> Node (2)
-                              [x-coord, y-coord, z-coord], --> Node (3)
-                              [x-coord, y-coord, z-coord], --> Node (4)
-                               ......., ......., ....... ,     .... ...
-                              [x-coord, y-coord, z-coord], --> Node (n-1)
-                              [x-coord, y-coord, z-coord], --> Node (n)
+                    cleaned.write(line)
+
+    # return the name of the cleaned node info file
+    return node_element_file_cleaned
+
+@contextmanager
+def map_source(source):
+    '''
+    Memory-map a Flux export for reading, if it is given by its filename.
+
+    The mapped bytes are paged in by the operating system as they are scanned,
+        so the text of the export is never copied into the memory of the
+        script as a whole. File objects, empty files, and interpreters without
+        the `mmap` module, like the one of PyFlux, give None instead, and are
+        read in chunks.
+
+    Parameters
+    ----------
+    source : string or file object
+        The name of the txt file exported from Flux, or the file object of it.
+
+    Yields
+    ------
+    mapped : mmap.mmap
+        The read-only memory map of the file, or None.
+    '''
+    if hasattr(source, 'read') or os.path.getsize(source) == 0:
+        yield None
+        return
+    try:
+        import mmap
+    except ImportError:
+        yield None
+        return
+    with open(source, 'rb') as export: # open read-only, in binary
+        mapped = mmap.mmap(export.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+def release_mapped_pages(mapped, start, end):
+    '''
+    Tell the operating system that a scanned part of a memory map is not needed.
+
+    The pages of the map between `start` and `end` are dropped from the
+        resident memory of the script, where `madvise` is available, so that
+        the resident memory stays bounded while a large export is scanned.
+        Only whole pages are released.
+
+    Parameters
+    ----------
+    mapped : mmap.mmap
+        The memory map, as given by `map_source`.
+
+    start : int
+        The byte offset of the scanned part.
+
+    end : int
+        The byte offset of the end of the scanned part.
+
+    Returns
+    -------
+    released : int
+        The byte offset up to which the pages have been released.
+    '''
+    import mmap
+    if not hasattr(mapped, 'madvise') or not hasattr(mmap, 'MADV_DONTNEED'):
+        return start
+    first = start - start % mmap.PAGESIZE
+    last = end - end % mmap.PAGESIZE
+    if last > first:
+        mapped.madvise(mmap.MADV_DONTNEED, first, last - first)
+        return last
+    return start
+
+def read_record_blocks(source, marker, start=0, end=None, progress=None):
+    '''
+    Stream a Flux export in large blocks that only contain whole records.
+
+    The function is a generator. When the export is given by its filename, it
+        is memory-mapped with `map_source`, and scanned by offsets: every block
+        is about `CHUNK_SIZE` bytes long, and ends at the beginning of the line
+        holding the last `marker` within it. The scanned pages are released as
+        the scan goes on. Otherwise, the file object is read in chunks of
+        `CHUNK_SIZE` bytes, which are cut in the same way, the part after the
+        cut being carried over to the next chunk. In both cases, a record that
+        starts with the `marker` line is never split between two blocks, and
+        the blocks can be parsed with regular expressions as a whole.
+
+    Parameters
+    ----------
+    source : string or file object
+        The name of the txt file exported from Flux, or the file object of it.
+            A file object open in text mode is read as well, but a binary one
+            is faster.
+
+    marker : bytes
+        The text that appears once per record, on its first line.
+
+    start : int
+        The byte offset to start reading at, as given by `split_record_ranges`.
+            Only used with filenames and binary file objects.
+
+    end : int
+        The byte offset to stop reading at. If None, the file is read to its
+            end.
+
+    progress : callable
+        Called with the number of bytes consumed, as the file is read, for
+            instance `ConversionMonitor.advance`. Optional.
+
+    Yields
+    ------
+    block : bytes
+        A block of the text file made of whole records.
+    '''
+    with map_source(source) as mapped:
+        if mapped is not None:
+            # scan the memory map by offsets
+            stop = len(mapped) if end is None else min(end, len(mapped))
+            position = released = start
+            while position < stop:
+                limit = position + CHUNK_SIZE
+                cut = stop
+                while limit < stop:
+                    last = mapped.rfind(marker, position, limit)
+                    if last > position:
+                        cut = mapped.rfind(b'\n', position, last) + 1
+                        if cut > position:
+                            break
+                    # no record starts after the first line, look further
+                    limit += CHUNK_SIZE
+                    cut = stop
+                yield mapped[position:cut]
+                released = release_mapped_pages(mapped, released, cut)
+                if progress is not None:
+                    progress(cut - position)
+                position = cut
+            return
+
+    with open_source(source) as export: # open read-only, in binary
+        if start:
+            export.seek(start)
+        remaining = None if end is None else end - start
+        carry = b''
+        while True:
+            size = CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+            chunk = export.read(size) if size > 0 else b''
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            if progress is not None:
+                progress(len(chunk))
+            if not isinstance(chunk, bytes):
+                chunk = chunk.encode('utf-8')
+            block = carry + chunk
+            last = block.rfind(marker)
+            if last < 0:
+                # no record starts here, only keep the last partial line
+                carry = block[block.rfind(b'\n')+1:]
+                continue
+            cut = block.rfind(b'\n', 0, last) + 1
+            if cut:
+                yield block[:cut]
+            carry = block[cut:]
+        if carry:
+            yield carry
+
+def split_record_ranges(text_file, marker, parts):
+    '''
+    Split a Flux export into byte ranges that only contain whole records.
+
+    The file is cut into `parts` ranges of about the same size. Each cut is
+        moved forward to the beginning of the next line holding the `marker`,
+        by scanning the memory-mapped file from the cut offset, so that every
+        record lies within a single range, and the ranges can be parsed
+        independently, for instance in worker processes. The exports that
+        `map_source` doesn't map, the empty files, the file objects, and all
+        files on interpreters without `mmap`, make a single range.
+
+    Parameters
+    ----------
+    text_file : string or file object
+        The name of the txt file exported from Flux, or the file object of it.
+
+    marker : bytes
+        The text that appears once per record, on its first line.
+
+    parts : int
+        The number of ranges to aim for. Fewer ranges are returned for small
+            files.
+
+    Returns
+    -------
+    ranges : list
+        A list of (text_file, start, end) tuples, in the order of the file. The
+            end of the range of a file object is None, for its end.
+    '''
+    cuts = [0]
+    with map_source(text_file) as mapped:
+        if mapped is None:
+            if hasattr(text_file, 'read'):
+                return [(text_file, 0, None)]
+            return [(text_file, 0, os.path.getsize(text_file))]
+        size = len(mapped)
+        for part in range(1, parts):
+            offset = max(cuts[-1], part * size // parts)
+            # move to the beginning of the next line, then to the next record
+            line_start = mapped.find(b'\n', offset) + 1
+            found = mapped.find(marker, line_start) if line_start > 0 else -1
+            if found < 0:
+                break
+            cut = mapped.rfind(b'\n', line_start, found) + 1 or line_start
+            if cut > cuts[-1]:
+                cuts.append(cut)
+    cuts.append(size)
+
+    return [(text_file, cuts[i], cuts[i+1]) for i in range(0, len(cuts)-1) \
+    if cuts[i+1] > cuts[i]]
+
+def read_node_records(node_element_file, start=0, end=None, progress=None):
+    '''
+    Stream the xyz-coordinates of the nodes out of the node element text file.
+
+    The function is a generator. It reads the text file exported from Flux
+        exactly once, in blocks of whole node records as given by
+        `read_record_blocks`. In each block, the three values following every
+        ` coordinates ` line are picked up with `NODE_COORDINATES`, and
+        converted to float64 in bulk. Nothing is written to the disk.
+
+    Parameters
+    ----------
+    node_element_file : string or file object
+        The name, or the open file object, of the txt file exported from Flux
+            detailing the node information.
+
+    start : int
+        The byte offset to start reading at.
+
+    end : int
+        The byte offset to stop reading at. If None, the file is read to its
+            end.
+
+    progress : callable
+        Called with the number of bytes consumed, as in `read_record_blocks`.
+
+    Yields
+    ------
+    coordinates : array
+        A float64 array of the xyz-coordinates of the nodes in a block, 3 values
+            per node, in the order the nodes appear in the Flux export.
+    '''
+    for block in read_record_blocks(node_element_file, b' coordinates ', start, \
+    end, progress):
+        yield array('d', map(float, \
+        b' '.join(NODE_COORDINATES.findall(block)).split()))
+
+def retrieve_node_information(node_element_file, node_records=None):
+    '''
+    Retrieve and store the xyz-coordinates of individual nodes in an array.
+
+    The function receieves the node element file exported from Flux, and
+        consumes the node records streamed by `read_node_records`.
+        Then, it fills the `node_list` for storing the xyz-coordinates of the
+        nodes. `node_list` is a flat, typed array of float64 values, which
+        grows in amortized constant time per node and takes 24 bytes per node.
+        The function follows the following convention:
+            1) Every 3 consecutive values of `node_list` belong to one node, and
+                their position designates the node number:
+                node_list[0:3]         are the coordinates of Node(1)
+                node_list[3:6]         are the coordinates of Node(2)
+                node_list[6:9]         are the coordinates of Node(3)
+                ................       ...............................
+                node_list[3n-3:3n]     are the coordinates of Node(n)
+            2) Each triplet is ordered as x-coord, y-coord, z-coord:
+                node_list == [x-coord, y-coord, z-coord,   --> Node (1)
+                              x-coord, y-coord, z-coord,   --> Node (2)
+                              x-coord, y-coord, z-coord,   --> Node (3)
+                              ......., ......., ....... ,      .... ...
+                              x-coord, y-coord, z-coord,   --> Node (n)
                               ]
-                In this sense, len(node_list) equals to the total number of nodes
-                that Flux has created for a given geometry. However, since python
-                uses zero-index ordering, the zeroeth element of `node_list`
-                gives the xyz-coordinates for Node (1) of Flux mesh.
+                In this sense, len(node_list) // 3 equals to the total number of
+                nodes that Flux has created for a given geometry. However, since
+                python uses zero-index ordering, the zeroeth triplet of
+                `node_list` gives the xyz-coordinates for Node (1) of Flux mesh.
 
     Parameters
     ----------
-    node_element_file_cleaned : string
-        The name of the .txt file containing the simplified node information.
+    node_element_file : string or file object
+        The name, or the open file object, of the txt file exported from Flux
+            detailing the node information.
 
-    pattern2 : string
-        The pattern to parse for, in order to catch the lines detailing the
-            xyz-coordinates of the nodes.
+    node_records : iterable
+        The float64 arrays of coordinates to consume instead of
+            `read_node_records(node_element_file)`, in the order of the file.
+            `convert` uses it to pass in the results of worker processes.
 
     Returns
     -------
-    node_list : list
-        The list containing the xyz-coordinates of the nodes.
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
     '''
-    node_list = [] # initilize as an empty list
-    with open(node_element_file_cleaned, 'r') as cleaned:
-        lines = cleaned.readlines()
-        for i in range(0, len(lines)):
-            if fnmatch(lines[i], pattern2):
-                # parse the lines of the txt file
-                node_list = node_list + \
-                [[lines[i+1].replace(' ', '').replace('\n', '').replace('E','e'), \
-                lines[i+2].replace(' ', '').replace('\n', '').replace('E','e'), \
-                lines[i+3].replace(' ', '').replace('\n', '').replace('E','e')]]
+    if node_records is None:
+        node_records = read_node_records(node_element_file)
+
+    node_list = array('d') # initilize as an empty float64 array
+    for coordinates in node_records:
+        node_list.extend(coordinates)
 
     return node_list
 
-def write_nodes(outputfile, node_list):
+def write_nodes(outputfile, node_list, precision=16, dim=2):
     '''
     Write the node number and their coordinates into an xml file.
 
     The function takes the outputfile which is a string naming the xml file to
         write the coordinates of the nodes into. Example: "mesh.xml". In writing
         the xml file, the function follows a formatting that is identifiable in
-        FEniCS. `xml_header` contains the hardcoded info about the `celltype`
-        and the `dim`. Lastly, the `xml_header` contains the total number of
+        FEniCS. `xml_header` contains the info about the `celltype` and the
+        `dim`, which are "triangle" and 2 for a Flux2D mesh, and "tetrahedron"
+        and 3 for a Flux3D mesh. Lastly, the `xml_header` contains the total number of
         nodes, which is given in "<vertices size ="%d">". Here, the "%d"
         placeholder allows for writing the total node number for different mesh
-        structures.
+        structures. The coordinates are formatted from the float64 values with
+        `precision` digits after the decimal point. The default of 16 digits,
+        that is, 17 significant digits, is enough to recover the float64 values
+        exactly, while fewer digits give smaller files.
 
     This function doesn't return any values. It only creates an xml file in the
         working directory.
 
     Parameters
     ----------
-    outputfile : string
-        The name of the xml file to create.
+    outputfile : string or file object
+        The name of the xml file to create, or a text file object to write
+            the xml into.
+
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
 
-    node_list : list
-        The list containing the xyz-coordinates of the nodes.
+    precision : int
+        The number of digits after the decimal point of the coordinates, as in
+            the `%.16e` format.
+
+    dim : int
+        The topological dimension of the mesh, 2 or 3.
 
     Creates
     -------
@@ -253,18 +975,21 @@ def write_nodes(outputfile, node_list):
     """<?xml version="1.0" encoding="UTF-8"?>
 
 <dolfin xmlns:dolfin="http://www.fenicsproject.org">
-<mesh celltype="triangle" dim="2">
+<mesh celltype="%s" dim="%d">
 <vertices size="%d">
 """
-    with open(outputfile, 'w') as notepad: # open write-only
-        notepad.write(xml_header % len(node_list)) # write the xml file header
-        for i in range(0, len(node_list)): # write xyz-coordinates of nodes
-            notepad.write('      <vertex index="%d" x="%s" y="%s" z="%s"/>\n' \
-            % (i, node_list[i][0], node_list[i][1], node_list[i][2]))
+    # define the vertex line for the given precision
+    xml_vertex = '      <vertex index="%%d" x="%%.%de" y="%%.%de" z="%%.%de"/>\n' \
+    % (precision, precision, precision)
+
+    with open_target(outputfile, 'w') as notepad: # open write-only
+        notepad.write(xml_header % (CELL_TYPES[dim], dim, len(node_list) // 3))
+        for batch in format_record_batches(xml_vertex, node_list, 3):
+            notepad.write(batch) # write xyz-coordinates of nodes
 
         notepad.write('    </vertices>\n') # write the closing of vertices info
 
-def scrub_face_element_file(inputfiles):
+def scrub_face_element_file(inputfiles, directory=''):
     '''
     Brush off the irrelevant information within the face element text file.
 
@@ -275,12 +1000,19 @@ def scrub_face_element_file(inputfiles):
         information are parsed according to `pattern4`, `pattern5`, `pattern6`
         and `pattern7` as defined below.
 
+    Like `scrub_node_element_file`, this function only writes debugging files,
+        and is only called when the `-k` flag is given.
+
     Parameters
     ----------
     inputfiles : list
         A list of strings containing the filenames of input files that the user
             has provided to the script.
 
+    directory : string
+        The directory to write the debugging files into. The working directory
+            by default.
+
     Returns
     -------
     face_element_node_info : string
@@ -320,9 +1052,11 @@ def scrub_face_element_file(inputfiles):
     '''
     # define filenames
     face_element_file = inputfiles[1]
-    face_element_file_cleaned = 'face_element_file_cleaned.txt'
-    face_element_node_info = 'face_element_node_info.txt' # node information
-    face_element_face_info = 'face_element_face_info.txt' # face information
+    face_element_file_cleaned = os.path.join(directory, 'face_element_file_cleaned.txt')
+    face_element_node_info = os.path.join(directory, \
+    'face_element_node_info.txt') # node information
+    face_element_face_info = os.path.join(directory, \
+    'face_element_face_info.txt') # face information
 
     # define text patterns for the relevant face info
     pattern4 = '*FaceElement*'
@@ -330,315 +1064,4450 @@ def scrub_face_element_file(inputfiles):
     pattern6 = '*TYPE*'
     pattern7 = '* LOC *'
 
-    with open(face_element_file_cleaned, 'w') as face_cleaned: # open write-only
+    # write the three debugging files in a single pass over the Flux export
+    with open(face_element_file_cleaned, 'w') as face_cleaned, \
+         open(face_element_node_info, 'w') as face_node_cleaned, \
+         open(face_element_face_info, 'w') as face_face_cleaned: # open write-only
         with open(face_element_file, 'r') as face_info:        # open read-only
-            face_lines = face_info.readlines() # read all the lines in the file
-            for i in range(0, len(face_lines)):# search through the read lines
-                if fnmatch(face_lines[i], pattern4):
+            for line in face_info: # stream through the lines of the file
+                if fnmatch(line, pattern4):
                     # Face element number info
-                    face_cleaned.write(face_lines[i])
-                elif fnmatch(face_lines[i], pattern5):
+                    face_cleaned.write(line)
+                elif fnmatch(line, pattern5):
                     # Face element nodes info
-                    face_cleaned.write(face_lines[i])
-                elif fnmatch(face_lines[i], pattern6):
+                    face_cleaned.write(line)
+                    face_node_cleaned.write(line)
+                elif fnmatch(line, pattern6):
                     # Face element type info
-                    face_cleaned.write(face_lines[i])
-                elif fnmatch(face_lines[i], pattern7):
+                    face_cleaned.write(line)
+                elif fnmatch(line, pattern7):
                     # Face element LOC info
-                    face_cleaned.write(face_lines[i])
-
-    # further clean the face file for node numbers
-    with open(face_element_node_info, 'w') as face_super_cleaned: # open write-only
-        with open(face_element_file_cleaned, 'r') as face_info:            # open read-only
-            face_lines = face_info.readlines() # read all the lines in the file
-            for i in range(0, len(face_lines)):# search through the read lines
-                if fnmatch(face_lines[i], pattern5):
-                    # Only retain node info of the face elements
-                    face_super_cleaned.write(face_lines[i])
-
-    # further clean the face file for Face geometric entities
-    with open(face_element_face_info, 'w') as face_super_cleaned: # open write-only
-        with open(face_element_file_cleaned, 'r') as face_info:   # open read-only
-            face_lines = face_info.readlines() # read all the lines in the file
-            for i in range(0, len(face_lines)):# search through the read lines
-                if fnmatch(face_lines[i], pattern7):
-                    # Only retain node info of the face elements
-                    face_super_cleaned.write(face_lines[i])
+                    face_cleaned.write(line)
+                    face_face_cleaned.write(line)
 
     return face_element_node_info, face_element_face_info
 
-def retrieve_face_information(face_element_node_info, face_element_face_info, face_physical_description):
+def split_elements(nodes, locs, nodes_per_element, splits):
     '''
-    Retrieve and store the node numbers and physical numbers of elements in a list.
-
-    This function reads the lines of the face_element_node_info and face_element_face_info
-        files and parses those lines for the node numbers of a given face element,
-        and its physical region number.
+    Turn a run of mesh elements of the same kind into first-order simplices.
 
-    `face_list` == [[node1, node2, node3, physical-region-number], --> Face (1)
-                    [node1, node2, node3, physical-region-number], --> Face (2)
-                    [node1, node2, node3, physical-region-number], --> Face (3)
-                    ......, ....., ....., .......................,     .... ...
-                    [node1, node2, node3, physical-region-number], --> Face (n-1)
-                    [node1, node2, node3, physical-region-number], --> Face (n)
-                    ]
+    Every column of the simplices is filled with a single slice assignment
+        from a column of the elements, so that the run is split without any
+        loop over its elements. The simplices of an element follow each other,
+        and get the LOC of the element. A run of first-order triangles or lines
+        is returned as it is.
 
     Parameters
     ----------
-    face_element_node_info : string
-        The name of the txt file containing the node numbers for each faces.
-            "Face", in the context of Flux, is synonymous with "element" that
-            a mesh consists of. Nodes come together and define an element. Elements
-            come together and define a mesh.
+    nodes : array
+        The int32 array of the node numbers of the elements,
+            `nodes_per_element` per element.
 
-    face_element_face_info : string
-        The name of the txt file containing the physical face location of each
-            geometrical faces. "Geometrical face" means a single element of a
-            mesh. "Physical face" means a collection of geometrical faces which
-            have the common physical properties.
+    locs : array
+        The int32 array of the LOC of the elements.
+
+    nodes_per_element : int
+        The number of nodes of each element.
 
-    face_physical_description : string
+    splits : tuple
+        The columns of the corner nodes of each simplex of an element, as in
+            `FACE_ELEMENT_SPLITS`.
 
     Returns
     -------
-    face_list : list
-        The list containing the nodes of a face element, and physical region
-            number of a face element.
+    simplices : array
+        The int32 array of the node numbers of the simplices.
 
-    Creates
-    -------
-    face_number_reference : .txt file
-        A txt file containing the name of the physical regions as defined by the
-            Flux user, corresponding to each number. This txt file can be used
-            for reference during the import process into FEniCS and setting up
-            the finite element problem.
-    '''
-
-    face_number_reference = 'face_number_reference.txt'
-
-    # collect the node numbers for each face elements
-    with open(face_element_node_info, 'r') as face_super_cleaned: # open read-only
-        lines = face_super_cleaned.readlines() # read all the lines in the file
-        face_list = [] # initialize the face_list
-        for i in range(0, len(lines)): # append the node numbers to the face_list
-            face_list = face_list + \
-            [[str(int(lines[i].split(' ')[9].replace('(', '').replace(')', ''))-1), \
-            str(int(lines[i].split(' ')[11].replace('(', '').replace(')', ''))-1), \
-            str(int(lines[i].split(' ')[13].replace('(', '').replace(')', ''))-1)]]
-
-    # collect the Face geometric entity info for each face elements
-    with open(face_element_face_info, 'r') as face_super_cleaned: # open read-only
-        lines = face_super_cleaned.readlines() # read all the lines in the file
-        # append to the existing face_list as 4th dimension for each element
-        for i in range(0, len(lines)): # append the node numbers to the face_list
-            face_list[i] = face_list[i] + \
-            [lines[i].split(' ')[9].replace('(', '').replace(')', '')]
+    simplex_locs : array
+        The int32 array of the LOC of the simplices.
+    '''
+    corners = len(splits[0])
+    if len(splits) == 1 and splits[0] == tuple(range(0, nodes_per_element)):
+        return nodes, locs
 
-    # replace the physical number codes with their reduced equivalents
-    with open(face_physical_description, 'r') as physical_description: # open read-only
-        lines = physical_description.readlines() # read all the lines in the file
-        face_info = [] # collect face names
-        for i in range(0, len(lines)):
-            face_info = face_info + [lines[i].split(' ')[4].replace('\n', '')]
-
-    face_unique_info = [] # collect unique face names
-                              # and preserve occurrence order
-    for face in face_info:
-        if face not in face_unique_info:
-            face_unique_info.append(face)
-
-    for face in face_info:
-        for index, s in enumerate(face_unique_info):
-            if face == s:
-                face_info[face_info.index(face)] = [index+1, face]
-
-    # now update the face_list's physical-region-number according to face_info
-    for element in face_list:
-        element[3] = face_info[int(element[3])-1][0]
-
-    # write face_unique_info into a txt file for user's reference
-    with open(face_number_reference, 'w') as face_ref: # open write-only
-        for index, s in enumerate(face_unique_info):
-            write_string = str(index+1) + ' ' + (s) + '\n'
-            face_ref.write(write_string)
+    stride = corners * len(splits)
+    simplices = array('i', [0]) * (stride * len(locs))
+    simplex_locs = array('i', [0]) * (len(splits) * len(locs))
+    for piece, columns in enumerate(splits):
+        for corner, column in enumerate(columns):
+            simplices[piece*corners+corner::stride] = nodes[column::nodes_per_element]
+        simplex_locs[piece::len(splits)] = locs
 
-    return face_list
+    return simplices, simplex_locs
 
-def write_faces(outputfile, face_list):
+def read_element_records(element_file, splits=FACE_ELEMENT_SPLITS, start=0, \
+end=None, progress=None):
     '''
-    Write the face number and their node numbers into an xml file.
+    Stream the node numbers and the LOC of the mesh elements out of a text file.
 
-    The function appends the information contained in `face_list` into the same
-        xml file containing the node coordinate information. Example: "mesh.xml".
-        In writing the xml file, the function follows a formatting that is identifiable
-        in FEniCS.
+    The function is a generator. It reads the text file exported from Flux
+        exactly once, in blocks of whole element records as given by
+        `read_record_blocks`. In each block, the node numbers of the elements
+        are picked up from their `NODES` lines with `FACE_NODES`, and their
+        geometric entity (LOC) from their ` LOC ` lines with `FACE_LOC`.
+        Both are converted to int32 in bulk, wherever the numbers are placed on
+        their lines. The face elements (`FaceElement[ALL]`) and the line
+        elements (`LineElement[ALL]`) of Flux share the same layout.
 
-    This function doesn't return any values. It only appends to an xml file in the
-        working directory.
+    The kind of each element is told by its number of nodes, which is enough
+        to tell apart the kinds of `splits`, whatever the language of the
+        `TYPE` line. Every run of elements of the same kind is turned into
+        first-order simplices by `split_elements`, in the order of the file.
+        When a block only holds first-order elements, which is told by its
+        total number of nodes, the nodes are not even counted per element.
 
     Parameters
     ----------
-    outputfile : list
-        The name of the xml file to append.
+    element_file : string or file object
+        The name, or the open file object, of the txt file exported from Flux
+            detailing the face or line element information.
 
-    face_list : list
-        The list containing the nodes of a face element, and physical region
-            number of a face element.
-    '''
-    # define the footer of the xml file
-    xml_footer = \
-    """    </cells>
-  </mesh>
-</dolfin>
+    splits : dict
+        The kinds of elements, by their number of nodes, as in
+            `FACE_ELEMENT_SPLITS` for the face elements, and in
+            `LINE_ELEMENT_SPLITS` for the line elements.
 
-"""
-    with open(outputfile, 'a') as notepadtwo: # open append-only
-        notepadtwo.write('    <cells size="%d">\n' % len(face_list))
-        for i in range(0, len(face_list)): # write the node numbers for each faces
-            notepadtwo.write('      <triangle index="%d" v0="%s" v1="%s" v2="%s"/>\n' \
-            % (i, face_list[i][0], face_list[i][1], face_list[i][2]))
+    start : int
+        The byte offset to start reading at.
 
-        notepadtwo.write(xml_footer) # end of the xml file
+    end : int
+        The byte offset to stop reading at. If None, the file is read to its
+            end.
 
-def write_physical_region(outputfile ,face_list):
+    progress : callable
+        Called with the number of bytes consumed, as in `read_record_blocks`.
+
+    Yields
+    ------
+    nodes : array
+        An int32 array of the node numbers of the simplices in a block, 3 per
+            triangle or 2 per line, in the order the elements appear in the Flux
+            export. The node numbers are shifted to the zero-index ordering of
+            `node_list`.
+
+    locs : array
+        An int32 array of the geometric entity numbers, as given by Flux, of the
+            simplices in the block.
+
+    Raises
+    ------
+    ValueError
+        If an element has a number of nodes that is not in `splits`, or if the
+            number of node numbers does not match the number of LOC.
     '''
-    Write the face number and their phyical region numbers into an xml file.
+    first_order = min(splits)
+    for block in read_record_blocks(element_file, b'NODES', start, end, progress):
+        fields = FACE_NODES.findall(block)
+        nodes = array('i', [int(node)-1 for node in INTEGER.findall(b' '.join(fields))])
+        locs = array('i', map(int, FACE_LOC.findall(block)))
+        if len(fields) != len(locs):
+            raise ValueError('%s: %d node lists found for %d elements' \
+            % (source_name(element_file), len(fields), len(locs)))
+        if len(nodes) == first_order * len(locs):
+            # only first-order elements, the fewest nodes of all kinds
+            yield split_elements(nodes, locs, first_order, splits[first_order])
+            continue
 
-    This function doesn't return any values. It only writes to an xml file in the
-        working directory.
+        counts = [field.count(b',') + 1 for field in fields]
+        for simplices in split_element_runs(nodes, locs, counts, splits, \
+        source_name(element_file)):
+            yield simplices
+
+def split_element_runs(nodes, locs, counts, splits, name):
+    '''
+    Turn mesh elements of mixed kinds into first-order simplices, run by run.
+
+    The function is a generator. Every run of elements with the same number of
+        nodes is handed over to `split_elements` at once, in the order of the
+        elements.
 
     Parameters
     ----------
-    outputfile : list
-        The name of the xml file to write into.
+    nodes : array
+        The int32 array of the node numbers of the elements, one after the
+            other.
 
-    face_list : list
-        The list containing the nodes of a face element, and physical region
-            number of a face element.
+    locs : array
+        The int32 array of the LOC of the elements.
 
-    Creates
-    -------
-    outputfile : .xml file
-        The xml file, which contains the face numbers and their corresponding
-            physical region numbers.
-    '''
-    # define xml header
-    xml_header = \
-    """<?xml version="1.0" encoding="UTF-8"?>
-<dolfin xmlns:dolfin="http://fenicsproject.org">
-  <mesh_function type="uint" dim="2" size="%d">
-"""
-    # define xml footer
-    xml_footer = \
-    """  </mesh_function>
-</dolfin>
-"""
+    counts : list
+        The number of nodes of each element.
 
-    # write xml_header
-    # write the face element indices and the corresponding physical region number code
-    with open(outputfile, 'w') as physical_region: # open write-only
-        physical_region.write(xml_header % len(face_list))
-        for i in range(0, len(face_list)): # write the node numbers for each faces
-            physical_region.write('      <entity index="%s" value="%s"/>\n' \
-            % (i, face_list[i][3]))
+    splits : dict
+        The kinds of elements, by their number of nodes, as in
+            `FACE_ELEMENT_SPLITS`.
 
-    # write xml footer
-        physical_region.write(xml_footer) # end of the xml file
+    name : string
+        The name of the source of the elements, for error messages.
 
+    Yields
+    ------
+    simplices : array
+        The int32 array of the node numbers of the simplices of a run.
 
-def flux_commands():
+    simplex_locs : array
+        The int32 array of the LOC of the simplices of the run.
+
+    Raises
+    ------
+    ValueError
+        If an element has a number of nodes that is not in `splits`, or if the
+            number of node numbers does not match the counts.
     '''
-    Commands that are executed when the script is executed within Flux.
+    if len(nodes) != sum(counts):
+        raise ValueError('%s: %d node numbers found for %d elements' \
+        % (name, len(nodes), len(locs)))
+    offset, position = 0, 0
+    for count, run in groupby(counts):
+        size = len(list(run))
+        if count not in splits:
+            raise ValueError('%s: elements with %d nodes are not supported' \
+            % (name, count))
+        yield split_elements(nodes[offset:offset+count*size], \
+        locs[position:position+size], count, splits[count])
+        offset += count * size
+        position += size
 
-    Following commands specify the .txt and .xml filenames for the script, for
-        future use by other function within the script. Further, the commands
-        below export all node and face element information into a txt file in the
-        working directory. Lastly, it compiles the names of different physical
-        faces in the given Flux geometry.
+def parse_node_range(node_range):
+    '''
+    Parse the nodes of a byte range of the node element text file.
+
+    The function is meant to be mapped over the ranges given by
+        `split_record_ranges` in worker processes.
+
+    Parameters
+    ----------
+    node_range : tuple
+        The (node_element_file, start, end) of the range.
 
     Returns
     -------
-    inputfile : list
-        A list of strings which contains only the filenames that the script
-            will use to read informaion from.
+    coordinates : array
+        A float64 array of the xyz-coordinates of the nodes in the range.
+    '''
+    coordinates = array('d')
+    for block in read_node_records(*node_range):
+        coordinates.extend(block)
+    return coordinates
 
-    outputfile : list
-        A list of strings which contains only the filenames that the script
-            will use to write information into.
+def parse_face_range(face_range):
+    '''
+    Parse the face elements of a byte range of the face element text file.
 
-    Creates
-    -------
-    node_element_file : .txt file
-        A txt file exported from Flux containing the various information about
-            the nodes in a given Flux geometry.
+    The function is meant to be mapped over the ranges given by
+        `split_record_ranges` in worker processes. The volume elements of a
+        3D mesh are parsed in the same way.
 
-    face_element_file : .txt file
-        A txt file exported from Flux containing the various information about
-            the faces in a given Flux geometry.
+    Parameters
+    ----------
+    face_range : tuple
+        The (face_element_file, start, end, splits) of the range, where
+            `splits` is `FACE_ELEMENT_SPLITS`, or `VOLUME_ELEMENT_SPLITS`.
 
-    face_physical_description : .txt file
-        A txt file containing the names of the various physical regions in a
-            given Flux geometry.
+    Returns
+    -------
+    nodes : array
+        An int32 array of the node numbers of the face elements in the range.
 
+    locs : array
+        An int32 array of the geometric face numbers of the face elements in
+            the range.
     '''
-    # define filenames
-    node_element_file = 'mesh-node-export-first-order.txt'
-    face_element_file = 'mesh-face-export-first-order.txt'
-    mesh_output = 'mesh.xml'
-    face_physical_description='face-physical-description.txt'
-    physical_region = 'physical_region.xml'
-
-    # Flux commands to export node, and face information into txt files
-    Node[ALL].exportTXT(txtFile=node_element_file, mode='replace')
-    FaceElement[ALL].exportTXT(txtFile=face_element_file, mode='replace')
+    face_element_file, start, end, splits = face_range
+    nodes, locs = array('i'), array('i')
+    for block_nodes, block_locs in read_element_records(face_element_file, \
+    splits, start, end):
+        nodes.extend(block_nodes)
+        locs.extend(block_locs)
+    return nodes, locs
 
-    # create a text file describing the physical region names and the
-    #   corresponding geometric face entities
-    with open(face_physical_description, 'w') as face_description:
-        i = 1
-        j = True
-        while j:
-            try:
-                k = Face[i].region.name
-                face_description.write('Face %d is : ' % (i))
-                face_description.write(k)
-                face_description.write('\n')
-                i += 1
-            except:
-                j = False
+def register_physical_regions(face_physical_description):
+    '''
+    Number the physical regions in the order of their first occurrence.
 
-    inputfile = [node_element_file, face_element_file, face_physical_description]
-    outputfile = [mesh_output, physical_region]
+    The function reads the physical description file line by line. The n-th
+        line holds the name of the physical region of the geometric face
+        Face (n). Every region name that has not been seen before is given the
+        next number, starting from 1, so that the numbering follows the order
+        of first occurrence in the file. Each name is looked up once in a
+        hash table, which keeps the function linear in the number of
+        geometric faces. A geometric entity without a name, which happens for
+        the lines that are not assigned to any line region, gets the number 0.
+        The line physical description file follows the same layout. The names
+        can also be given as a list, as gathered by `flux_region_names`.
 
-    return inputfile, outputfile
+    Parameters
+    ----------
+    face_physical_description : string, file object or list
+        The name, or the open file object, of the txt file containing the names
+            of the physical regions of the geometrical faces, or the list of
+            the names themselves.
 
-def main():
-    '''
-    The main function calling all the other functions.
+    Returns
+    -------
+    region_registry : OrderedDict
+        The physical region names, mapped to their numbers, in numbering order.
 
-    The first if-else block below checks for whether the script is being called
-        from a linux/windows terminal, or from within the Flux.
+    face_info : array
+        The int32 array giving the physical region number of each geometric
+            face. `face_info[n]` is the number of Face (n), and `face_info[0]`
+            is an unused placeholder, so that the LOC numbers of Flux can be
+            used as indices directly.
     '''
+    region_registry = OrderedDict() # physical region name -> number
+    face_info = array('i', [0])     # physical region number of each Face
 
-    if sys.argv == ['pydb.py']:
-        inputfiles, outputfiles = flux_commands()
+    if isinstance(face_physical_description, list):
+        names = face_physical_description
     else:
-        inputfiles, outputfiles = check_inputoutput_arguments(sys.argv[1:])
+        names = read_region_names(face_physical_description)
+
+    for name in names:
+        if name == '':
+            face_info.append(0)
+        else:
+            face_info.append(region_registry.setdefault(name, \
+            len(region_registry)+1))
 
-    node_element_file_cleaned, pattern2 = scrub_node_element_file(inputfiles)
+    return region_registry, face_info
 
-    node_list = retrieve_node_information(node_element_file_cleaned, pattern2)
+def read_region_names(face_physical_description):
+    '''
+    Stream the physical region names out of a physical description file.
 
-    write_nodes(outputfiles[0], node_list)
+    The function is a generator, which reads the file line by line. The name is
+        the fifth field of the line "Face 1 is : NAME", and is empty for the
+        entities which are not assigned to any region.
 
-    face_element_node_info, face_element_face_info = scrub_face_element_file(inputfiles)
+    Parameters
+    ----------
+    face_physical_description : string or file object
+        The name, or the open file object, of the txt file containing the names
+            of the physical regions of the geometrical faces.
 
-    face_list = retrieve_face_information(face_element_node_info, face_element_face_info, \
-inputfiles[2])
+    Yields
+    ------
+    name : string
+        The physical region name of every geometric entity, in the order of
+            the file.
+    '''
+    with open_source(face_physical_description) as physical_description: # open read-only
+        for line in physical_description: # stream through the lines of the file
+            yield native_string(line).split(' ')[4].replace('\n', '')
 
-    write_faces(outputfiles[0], face_list)
+def retrieve_face_information(face_element_file, face_physical_description, \
+face_records=None):
+    '''
+    Retrieve and store the node numbers and physical numbers of elements in arrays.
+
+    This function consumes the face element records streamed by
+        `read_element_records` for the node numbers of a given face element,
+        and its physical region number. Both are kept in flat, typed arrays of
+        int32 values, which grow in amortized constant time per face element.
+
+    `face_list` == [node1, node2, node3,   --> Face (1)
+                    node1, node2, node3,   --> Face (2)
+                    node1, node2, node3,   --> Face (3)
+                    ....., ....., .....,       .... ...
+                    node1, node2, node3,   --> Face (n)
+                    ]
+
+    `region_list` == [physical-region-number,  --> Face (1)
+                      physical-region-number,  --> Face (2)
+                      .......................,     .... ...
+                      physical-region-number,  --> Face (n)
+                      ]
+
+    Parameters
+    ----------
+    face_element_file : string or file object
+        The name, or the open file object, of the txt file exported from Flux
+            detailing the face information. "Face", in the context of Flux, is
+            synonymous with "element" that a mesh consists of. Nodes come
+            together and define an element. Elements come together and define a
+            mesh.
+
+    face_physical_description : string or file object
+        The name, or the open file object, of the txt file containing the names
+            of the physical regions of the geometrical faces. "Geometrical face"
+            means a single element of a mesh. "Physical face" means a collection
+            of geometrical faces which have the common physical properties.
+
+    face_records : iterable
+        The (nodes, locs) pairs of int32 arrays to consume instead of
+            `read_element_records(face_element_file)`, in the order of the
+            file. `convert` uses it to pass in the results of worker processes.
+
+    Returns
+    -------
+    face_list : array
+        The int32 array containing the nodes of the face elements, 3 per face
+            element.
+
+    region_list : array
+        The int32 array containing the physical region number of the face
+            elements.
+
+    region_registry : OrderedDict
+        The physical region names, mapped to their numbers, in numbering order.
+            It is written into `face_number_reference.txt` by
+            `write_number_reference`.
+    '''
+
+    face_list, loc_list = retrieve_face_locations(face_element_file, face_records)
+
+    region_list, region_registry = assign_physical_regions(loc_list, \
+    face_physical_description)
+
+    return face_list, region_list, region_registry
+
+def retrieve_face_locations(face_element_file, face_records=None, \
+splits=FACE_ELEMENT_SPLITS):
+    '''
+    Retrieve the node numbers and the geometric face numbers of the elements.
+
+    This is the part of `retrieve_face_information` that reads the face
+        element export. Its results don't depend on the physical description,
+        so they can be cached, and given regions again by
+        `assign_physical_regions` when only the region names change.
+
+    Parameters
+    ----------
+    face_element_file : string or file object
+        The name, or the open file object, of the txt file exported from Flux
+            detailing the face information.
+
+    face_records : iterable
+        The (nodes, locs) pairs of int32 arrays to consume instead of
+            `read_element_records(face_element_file)`, in the order of the
+            file.
+
+    splits : dict
+        The kinds of the elements, `FACE_ELEMENT_SPLITS` for the face elements,
+            or `VOLUME_ELEMENT_SPLITS` for the volume elements of a 3D mesh.
+
+    Returns
+    -------
+    face_list : array
+        The int32 array containing the nodes of the face elements, 3 per face
+            element, or of the volume elements, 4 per volume element.
+
+    loc_list : array
+        The int32 array containing the geometric face number of the face
+            elements.
+    '''
+    # collect the node numbers and the Face geometric entity info for each
+    #   face elements
+    face_list = array('i') # node numbers, 3 per face element
+    loc_list = array('i')  # Face geometric entity of each face element
+    if face_records is None:
+        face_records = read_element_records(face_element_file, splits)
+
+    for nodes, locs in face_records:
+        face_list.extend(nodes)
+        loc_list.extend(locs)
+
+    return face_list, loc_list
+
+def assign_physical_regions(loc_list, face_physical_description):
+    '''
+    Give the face elements the physical region numbers of their geometric faces.
+
+    Parameters
+    ----------
+    loc_list : array
+        The int32 array containing the geometric face number of the face
+            elements, as given by `retrieve_face_locations`.
+
+    face_physical_description : string, file object or list
+        The name, or the open file object, of the txt file containing the names
+            of the physical regions of the geometrical faces, or the list of
+            the names, as read by `register_physical_regions`.
+
+    Returns
+    -------
+    region_list : array
+        The int32 array containing the physical region number of the face
+            elements.
+
+    region_registry : OrderedDict
+        The physical region names, mapped to their numbers, in numbering order.
+
+    Raises
+    ------
+    ValueError
+        If a face element lies on a geometric face that the physical
+            description doesn't name, as checked by `check_locations`.
+    '''
+    # replace the physical number codes with their reduced equivalents
+    region_registry, face_info = register_physical_regions(face_physical_description)
+    check_locations(loc_list, face_info, face_physical_description)
+
+    # now collect the physical-region-number of each face element with a
+    #   single lookup of face_info per face element
+    region_list = array('i', map(face_info.__getitem__, loc_list))
+
+    return region_list, region_registry
+
+def import_numpy(size, threshold):
+    '''
+    Return the NumPy module for handling `size` values or cells, or None.
+
+    NumPy is only imported for at least `threshold` of them, since its import
+        takes longer than handling fewer of them without it, unless it has been
+        imported already. None is also returned where NumPy is not available.
+    '''
+    if size < threshold and 'numpy' not in sys.modules:
+        return None
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def array_bounds(values):
+    '''
+    Return the smallest and the largest value of a typed array, or None if empty.
+
+    Large arrays are scanned by NumPy where it is available, since the built-in
+        `min` and `max` make an object of every value.
+    '''
+    if not len(values):
+        return None
+    numpy = import_numpy(len(values), NUMPY_VALUES)
+    if numpy is None:
+        return min(values), max(values)
+    view = numpy.frombuffer(values, dtype=numpy.dtype(values.typecode))
+    return view.min().item(), view.max().item()
+
+def check_locations(loc_list, region_info, description):
+    '''
+    Check that every LOC of the elements is a geometric entity of the description.
+
+    Parameters
+    ----------
+    loc_list : array
+        The int32 array containing the geometric entity number of the elements.
+
+    region_info : array
+        The physical region number of every geometric entity, as given by
+            `register_physical_regions`.
+
+    description : string, file object or list
+        The physical description the region numbers come from, for the error
+            message.
+
+    Raises
+    ------
+    ValueError
+        If a LOC is not one of the geometric entities of the description.
+    '''
+    bounds = array_bounds(loc_list)
+    if bounds is None or (bounds[0] >= 1 and bounds[1] < len(region_info)):
+        return
+    missing = sorted(set(loc for loc in loc_list \
+    if loc < 1 or loc >= len(region_info)))
+    raise ValueError('%s: no physical region for the LOC %s, out of %d geometric \
+entities' % ('the physical description' if isinstance(description, list) \
+else source_name(description), ', '.join(map(str, missing[:10])), \
+len(region_info) - 1))
+
+def check_node_numbers(face_list, number_of_nodes, width):
+    '''
+    Check that every node of the elements is one of the nodes of the export.
+
+    Parameters
+    ----------
+    face_list : array
+        The int32 array containing the nodes of the cells, numbered from 0.
+
+    number_of_nodes : int
+        The number of nodes in the node export.
+
+    width : int
+        The number of nodes per cell.
+
+    Raises
+    ------
+    ValueError
+        If a cell refers to a node number out of the node export, including the
+            node 0, which Flux never uses.
+    '''
+    bounds = array_bounds(face_list)
+    if bounds is None or (bounds[0] >= 0 and bounds[1] < number_of_nodes):
+        return
+    index = next(index for index, node in enumerate(face_list) \
+    if node < 0 or node >= number_of_nodes)
+    raise ValueError('Element %d refers to the node %d, out of the %d nodes of \
+the node export' % (index // width + 1, face_list[index] + 1, number_of_nodes))
+
+def compute_facet_keys(columns, number_of_nodes):
+    '''
+    Compute the keys of edges or triangles, given their nodes column by column.
+
+    The key of an edge is `smaller * number_of_nodes + larger`, and the key of
+        a triangle is `(smallest * number_of_nodes + middle) * number_of_nodes
+        + largest`, so that the keys sort in the lexicographic order of the
+        sorted node numbers. The smallest and the largest nodes of the
+        triangles are picked with `min` and `max` over the columns, without
+        sorting each triangle.
+
+    Parameters
+    ----------
+    columns : tuple
+        The two or three columns of the node numbers, as int32 arrays.
+
+    number_of_nodes : int
+        The total number of nodes of the mesh.
+
+    Returns
+    -------
+    keys : list
+        The keys, in the order of the columns.
+    '''
+    n = number_of_nodes
+    if len(columns) == 2:
+        return [a*n+b if a < b else b*n+a for a, b in zip(*columns)]
+    a, b, c = columns
+    return [(low*n + a+b+c-low-high)*n + high for a, b, c, low, high \
+    in zip(a, b, c, map(min, a, b, c), map(max, a, b, c))]
+
+def decode_facet_keys(keys, number_of_nodes, width):
+    '''
+    Turn the keys of `compute_facet_keys` back into the nodes of the facets.
+
+    Parameters
+    ----------
+    keys : list
+        The keys of the edges or triangles.
+
+    number_of_nodes : int
+        The total number of nodes of the mesh.
+
+    width : int
+        The number of nodes of each facet, 2 for edges, and 3 for triangles.
+
+    Returns
+    -------
+    facets : array
+        The int32 array of the nodes of the facets, `width` per facet, in
+            increasing order within each facet.
+    '''
+    facets = array('i', [0]) * (width * len(keys))
+    for column in range(width - 1, -1, -1):
+        facets[column::width] = array('i', [key % number_of_nodes for key in keys])
+        keys = [key // number_of_nodes for key in keys]
+
+    return facets
+
+def retrieve_edge_information(face_list, number_of_nodes):
+    '''
+    Collect the unique edges of the face elements, numbered the way DOLFIN does.
+
+    Every edge is identified by a single integer key, built from its two node
+        numbers as `smaller * number_of_nodes + larger`. The keys of the three
+        edges of all face elements are gathered column by column into a hash
+        set, which drops the edges shared by two face elements, and then
+        sorted. DOLFIN numbers the edges of a mesh in the lexicographic order
+        of their sorted node numbers, which is exactly the order of the keys,
+        so that the position of a key in `edge_keys` is the index of the edge
+        in a MeshFunction of dimension 1. The function runs in O(n log n).
+
+    Parameters
+    ----------
+    face_list : array
+        The int32 array containing the nodes of the face elements, 3 per face
+            element.
+
+    number_of_nodes : int
+        The total number of nodes of the mesh.
+
+    Returns
+    -------
+    edge_keys : list
+        The sorted keys of the unique edges. The nodes of the edge with the key
+            `k` are `k // number_of_nodes` and `k % number_of_nodes`.
+    '''
+    edge_keys = set()
+    # the edges of a face element are (node2, node3), (node1, node3), (node1, node2)
+    for columns in ((face_list[1::3], face_list[2::3]), \
+                    (face_list[0::3], face_list[2::3]), \
+                    (face_list[0::3], face_list[1::3])):
+        edge_keys.update(compute_facet_keys(columns, number_of_nodes))
+
+    return sorted(edge_keys)
+
+def retrieve_triangle_information(volume_list, number_of_nodes):
+    '''
+    Collect the unique triangles of the volume elements, numbered like DOLFIN.
+
+    This is `retrieve_edge_information` one dimension up. The keys of the four
+        triangles of all tetrahedra, as given by `compute_facet_keys`, are
+        gathered column by column into a hash set, which drops the triangles
+        shared by two tetrahedra, and then sorted, which is the order DOLFIN
+        numbers the faces of a mesh in. The function runs in O(n log n).
+
+    Parameters
+    ----------
+    volume_list : array
+        The int32 array containing the nodes of the volume elements, 4 per
+            volume element.
+
+    number_of_nodes : int
+        The total number of nodes of the mesh.
+
+    Returns
+    -------
+    triangle_keys : list
+        The sorted keys of the unique triangles.
+    '''
+    triangle_keys = set()
+    # the triangles of a tetrahedron leave out one of its nodes each
+    for left_out in range(0, 4):
+        columns = [volume_list[k::4] for k in range(0, 4) if k != left_out]
+        triangle_keys.update(compute_facet_keys(columns, number_of_nodes))
+
+    return sorted(triangle_keys)
+
+def merge_duplicate_nodes(node_list, tolerance):
+    '''
+    Find the nodes that coincide with an earlier node, within a tolerance.
+
+    The nodes are put into a spatial index, a hash table of cubic cells four
+        times the tolerance wide, in their order. Every node is looked up only
+        in its own cell and in the neighbouring cells that are closer to it
+        than the tolerance, and merged into the first earlier node within the
+        tolerance, if any. Otherwise it is added to the index. The function
+        runs in O(n) expected time.
+
+    Parameters
+    ----------
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
+
+    tolerance : float
+        The largest distance between two nodes that are merged.
+
+    Returns
+    -------
+    representative : array
+        The int32 array of the node that every node is merged into, which is the
+            node itself for the nodes that are kept.
+
+    merged : int
+        The number of nodes that are merged into another node.
+    '''
+    width = 4.0 * tolerance
+    squared = tolerance * tolerance
+    xs, ys, zs = node_list[0::3], node_list[1::3], node_list[2::3]
+    representative = array('i', range(0, len(xs)))
+    merged = 0
+    grid = {} # cell of the index -> nodes kept in the cell
+
+    for node in range(0, len(xs)):
+        x, y, z = xs[node], ys[node], zs[node]
+        i, j, k = int(floor(x / width)), int(floor(y / width)), int(floor(z / width))
+        # the cells within the tolerance of the node, along every axis
+        ranges = []
+        for value, index in ((x, i), (y, j), (z, k)):
+            if value - index * width < tolerance:
+                ranges.append((index, index - 1))
+            elif (index + 1) * width - value < tolerance:
+                ranges.append((index, index + 1))
+            else:
+                ranges.append((index,))
+
+        found = -1
+        for near in product(*ranges):
+            for other in grid.get(near, ()):
+                dx, dy, dz = x - xs[other], y - ys[other], z - zs[other]
+                if dx * dx + dy * dy + dz * dz <= squared:
+                    found = other
+                    break
+            if found >= 0:
+                break
+
+        if found >= 0:
+            representative[node] = found
+            merged += 1
+        else:
+            grid.setdefault((i, j, k), []).append(node)
+
+    return representative, merged
+
+def drop_unused_nodes(node_list, face_list):
+    '''
+    Drop the nodes that no face element refers to, and renumber the others.
+
+    Flux exports sometimes hold orphan nodes, which no element refers to,
+        like the nodes merged away by `merge_duplicate_nodes`. Left in the
+        mesh, they would be vertices without any cell, and would give singular
+        systems in FEniCS. The kept nodes keep their order.
+
+    Parameters
+    ----------
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
+
+    face_list : array
+        The int32 array containing the nodes of the face elements.
+
+    Returns
+    -------
+    node_list : array
+        The coordinates of the kept nodes, or the given array if all nodes are
+            kept.
+
+    face_list : array
+        The face elements on the new node numbers, or the given array if all
+            nodes are kept.
+
+    node_map : array
+        The int32 array of the new number of every node of the given
+            `node_list`, -1 for the dropped ones, or None if all nodes are kept.
+    '''
+    used = sorted(set(face_list))
+    if len(used) == len(node_list) // 3:
+        return node_list, face_list, None
+
+    node_map = array('i', [-1]) * (len(node_list) // 3)
+    for new, old in enumerate(used):
+        node_map[old] = new
+    kept = array('d', [0.0]) * (3 * len(used))
+    for k in range(0, 3):
+        kept[k::3] = array('d', map(node_list[k::3].__getitem__, used))
+
+    return kept, array('i', map(node_map.__getitem__, face_list)), node_map
+
+def orient_cells(node_list, face_list, dim=2):
+    '''
+    Check the cells of a mesh for degeneracy, and orient them, without NumPy.
+
+    The signed areas or volumes are computed cell by cell, with the same
+        operations and tolerance as in `validate_mesh`, so that the cells come
+        out the same whether NumPy is available or not.
+
+    Parameters
+    ----------
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
+
+    face_list : array
+        The int32 array containing the nodes of the cells.
+
+    dim : int
+        The topological dimension of the mesh, 2 or 3.
+
+    Returns
+    -------
+    face_list : array
+        The nodes of the reoriented cells, or the given array if every cell is
+            oriented already.
+
+    reoriented : int
+        The number of cells that have been reoriented.
+
+    degenerate : array
+        The int32 array of the numbers of the degenerate cells.
+    '''
+    width = dim + 1
+    pairs = [(i, j) for i in range(0, width) for j in range(i + 1, width)]
+    oriented, reoriented, degenerate = None, 0, array('i')
+    for cell in range(0, len(face_list) // width):
+        start = cell * width
+        corners = [node_list[3 * node:3 * node + dim] \
+        for node in face_list[start:start + width]]
+        # the edges from the first node come first, as in `pairs`
+        edges = [[corners[j][axis] - corners[i][axis] for axis in range(0, dim)] \
+        for i, j in pairs]
+        longest = max([sqrt(sum([component * component for component in edge])) \
+        for edge in edges])
+
+        if dim == 2:
+            # twice the signed area
+            (ux, uy), (vx, vy) = edges[0], edges[1]
+            measure = ux * vy - uy * vx
+        else:
+            # six times the signed volume
+            u, v, w = edges[0], edges[1], edges[2]
+            measure = u[0] * (v[1] * w[2] - v[2] * w[1]) \
+            + u[1] * (v[2] * w[0] - v[0] * w[2]) + u[2] * (v[0] * w[1] - v[1] * w[0])
+
+        if abs(measure) <= DEGENERATE_TOLERANCE * longest ** dim:
+            degenerate.append(cell)
+        if measure < 0:
+            if oriented is None:
+                oriented = array('i', face_list)
+            oriented[start + dim - 1], oriented[start + dim] = \
+            oriented[start + dim], oriented[start + dim - 1]
+            reoriented += 1
+
+    return face_list if oriented is None else oriented, reoriented, degenerate
+
+def validate_mesh(node_list, face_list, region_list, region_registry, dim=2, \
+measure_quality=False):
+    '''
+    Check the cells of a mesh for degeneracy, orient them, and measure them.
+
+    The cells are handled by NumPy, `VALIDATION_BATCH` cells at a time, so that
+        the memory taken stays bounded. The signed area of every triangle,
+        in the xy-plane, or the signed volume of every tetrahedron, is computed
+        from its corners. A cell whose area or volume is negligible next to its
+        longest edge, as told by `DEGENERATE_TOLERANCE`, is degenerate, and
+        would give a singular system in FEniCS, so it is reported, with a
+        smallest angle of 0 and an infinite aspect ratio. The clockwise
+        triangles, and the tetrahedra of negative volume, are reoriented by
+        swapping their last two nodes. Without NumPy, or for fewer than
+        `NUMPY_CELLS` cells whose quality is not asked for, the cells are
+        checked and oriented by `orient_cells` instead, and not measured.
+
+    The quality of every cell is measured by its smallest angle, the dihedral
+        one for a tetrahedron, in degrees, and by its aspect ratio, the ratio of
+        its circumradius to its inradius for a triangle, or of its longest edge
+        to its inradius for a tetrahedron, scaled so that it is 1 for the
+        regular simplex. Both are counted in the histograms of `ANGLE_BINS` and
+        `ASPECT_BINS` for every physical region.
+
+    Parameters
+    ----------
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
+
+    face_list : array
+        The int32 array containing the nodes of the cells.
+
+    region_list : array
+        The int32 array containing the physical region number of the cells.
+
+    region_registry : OrderedDict
+        The physical region names, mapped to their numbers.
+
+    dim : int
+        The topological dimension of the mesh, 2 or 3.
+
+    measure_quality : bool
+        Whether the quality of the cells is measured however few they are.
+
+    Returns
+    -------
+    face_list : array
+        The nodes of the reoriented cells, or the given array if every cell is
+            oriented already.
+
+    reoriented : int
+        The number of cells that have been reoriented.
+
+    degenerate : array
+        The int32 array of the numbers of the degenerate cells.
+
+    quality : OrderedDict
+        For every physical region name with cells, in numbering order, a
+            dictionary of its number of 'cells', of its smallest angle
+            'min_angle' and largest aspect ratio 'max_aspect', and of the
+            'angle_histogram' and 'aspect_histogram' counts. None if the cells
+            were not measured.
+    '''
+    numpy = import_numpy(len(region_list), 0 if measure_quality else NUMPY_CELLS)
+    if numpy is None:
+        face_list, reoriented, degenerate = orient_cells(node_list, face_list, dim)
+        return face_list, reoriented, degenerate, None
+
+    width = dim + 1
+    pairs = [(i, j) for i in range(0, width) for j in range(i + 1, width)]
+    nodes = numpy.frombuffer(node_list, dtype=numpy.float64).reshape(-1, 3)
+    coordinates = [numpy.ascontiguousarray(nodes[:, axis]) for axis in range(0, dim)]
+    cells = numpy.frombuffer(face_list, dtype=numpy.int32).reshape(-1, width)
+    regions = numpy.frombuffer(region_list, dtype=numpy.int32)
+
+    # the histograms and the extremes of every region number
+    rows = len(region_registry) + 1
+    angle_bins, aspect_bins = numpy.array(ANGLE_BINS), numpy.array(ASPECT_BINS)
+    angle_counts = numpy.zeros(rows * (len(ANGLE_BINS) - 1), dtype=numpy.int64)
+    aspect_counts = numpy.zeros(rows * (len(ASPECT_BINS) - 1), dtype=numpy.int64)
+    min_angles = numpy.full(rows, numpy.inf)
+    max_aspects = numpy.zeros(rows)
+
+    oriented, reoriented, degenerate_cells = None, 0, array('i')
+    for start in range(0, len(cells), VALIDATION_BATCH):
+        batch = cells[start:start + VALIDATION_BATCH]
+        batch_regions = regions[start:start + VALIDATION_BATCH]
+        corners = [[coordinates[axis][batch[:, k]] for axis in range(0, dim)] \
+        for k in range(0, width)]
+        edges = dict(((i, j), [corners[j][axis] - corners[i][axis] \
+        for axis in range(0, dim)]) for i, j in pairs)
+        lengths = dict((pair, numpy.sqrt(sum(component * component \
+        for component in edges[pair]))) for pair in pairs)
+        longest = numpy.max([lengths[pair] for pair in pairs], axis=0)
+
+        if dim == 2:
+            # twice the signed area
+            (ux, uy), (vx, vy) = edges[0, 1], edges[0, 2]
+            measure = ux * vy - uy * vx
+        else:
+            # six times the signed volume
+            u, v, w = edges[0, 1], edges[0, 2], edges[0, 3]
+            measure = u[0] * (v[1] * w[2] - v[2] * w[1]) \
+            + u[1] * (v[2] * w[0] - v[0] * w[2]) + u[2] * (v[0] * w[1] - v[1] * w[0])
+
+        degenerate = numpy.abs(measure) <= DEGENERATE_TOLERANCE * longest ** dim
+        if degenerate.any():
+            degenerate_cells.extend(int(cell) \
+            for cell in numpy.flatnonzero(degenerate) + start)
+
+        # the degenerate cells divide by zero, and get their limit values
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            if dim == 2:
+                a, b, c = lengths[1, 2], lengths[0, 2], lengths[0, 1]
+                product = a * b * c
+                shortest = numpy.minimum(numpy.minimum(a, b), c)
+                # the smallest angle is the one opposite to the shortest edge
+                cosine = (a * a + b * b + c * c - 2 * shortest * shortest) * shortest \
+                / (2 * product)
+                angle = numpy.degrees(numpy.arccos(numpy.clip(cosine, -1.0, 1.0)))
+                # R / 2r, with R = abc / 4A and r = 2A / (a + b + c)
+                aspect = product * (a + b + c) / (4 * measure * measure)
+            else:
+                # the outward normals of the faces, the k-th one opposite to node k
+                normals = []
+                for k in range(0, width):
+                    p, q, r = [m for m in range(0, width) if m != k]
+                    e, f = edges[p, q], edges[p, r]
+                    normal = [e[1] * f[2] - e[2] * f[1], e[2] * f[0] - e[0] * f[2], \
+                    e[0] * f[1] - e[1] * f[0]]
+                    inward = sum((corners[k][axis] - corners[p][axis]) * normal[axis] \
+                    for axis in range(0, 3))
+                    flip = numpy.where(inward > 0, -1.0, 1.0)
+                    normals.append([flip * component for component in normal])
+                norms = [numpy.sqrt(sum(component * component for component in normal)) \
+                for normal in normals]
+                # the dihedral angle at an edge is pi minus the angle between the
+                #   normals of the faces opposite to the two other nodes
+                cosine = numpy.min([sum(normals[k][axis] * normals[l][axis] \
+                for axis in range(0, 3)) / (norms[k] * norms[l]) for k, l in pairs], \
+                axis=0)
+                angle = 180.0 - numpy.degrees(numpy.arccos(numpy.clip(cosine, \
+                -1.0, 1.0)))
+                # longest / (2 sqrt(6) r), with r = 3V / (sum of the face areas)
+                aspect = longest * sum(norms) / (2 * numpy.sqrt(6.0) * numpy.abs(measure))
+            angle = numpy.where(degenerate, 0.0, angle)
+            aspect = numpy.where(degenerate, numpy.inf, aspect)
+
+        inverted = numpy.flatnonzero(measure < 0)
+        if len(inverted):
+            if oriented is None:
+                oriented = array('i', face_list)
+            view = numpy.frombuffer(oriented, dtype=numpy.int32).reshape(-1, width)
+            rows_inverted = inverted + start
+            last = view[rows_inverted, dim].copy()
+            view[rows_inverted, dim] = view[rows_inverted, dim - 1]
+            view[rows_inverted, dim - 1] = last
+            reoriented += len(inverted)
+
+        for values, bins, counts in ((angle, angle_bins, angle_counts), \
+        (aspect, aspect_bins, aspect_counts)):
+            number_of_bins = len(bins) - 1
+            index = numpy.clip(numpy.searchsorted(bins, values, 'right') - 1, 0, \
+            number_of_bins - 1)
+            counts += numpy.bincount(batch_regions * number_of_bins + index, \
+            minlength=len(counts))
+        numpy.minimum.at(min_angles, batch_regions, angle)
+        numpy.maximum.at(max_aspects, batch_regions, aspect)
+
+    names = ['(none)'] + list(region_registry)
+    cell_counts = numpy.bincount(regions, minlength=rows)
+    angle_counts = angle_counts.reshape(rows, -1)
+    aspect_counts = aspect_counts.reshape(rows, -1)
+    quality = OrderedDict()
+    for number in range(0, rows):
+        if cell_counts[number]:
+            quality[names[number]] = {'cells': int(cell_counts[number]), \
+            'min_angle': float(min_angles[number]), \
+            'max_aspect': float(max_aspects[number]), \
+            'angle_histogram': angle_counts[number].tolist(), \
+            'aspect_histogram': aspect_counts[number].tolist()}
+
+    return face_list if oriented is None else oriented, reoriented, \
+    degenerate_cells, quality
+
+def mesh_bandwidth(face_list, width):
+    '''
+    Return the bandwidth of the matrices assembled on the nodes of the cells.
+
+    The bandwidth is the largest difference between two node numbers of the same
+        cell, which bounds the distance of the nonzero entries of a matrix of
+        first-order elements from its diagonal.
+
+    Parameters
+    ----------
+    face_list : array
+        The int32 array containing the nodes of the cells.
+
+    width : int
+        The number of nodes of each cell, 3 for triangles, and 4 for tetrahedra.
+
+    Returns
+    -------
+    bandwidth : int
+        The bandwidth, 0 for a mesh without cells.
+    '''
+    columns = [face_list[k::width] for k in range(0, width)]
+    return max([high - low for high, low in \
+    zip(map(max, *columns), map(min, *columns))] or [0])
+
+def node_adjacency(face_list, width, number_of_nodes):
+    '''
+    Build the graph of the nodes of the mesh, in compressed sparse row form.
+
+    Two nodes are neighbours when they share a cell. The edges of all cells are
+        gathered column pair by column pair into a hash set of keys, as given
+        by `compute_facet_keys`, which drops the edges shared by several
+        cells. The keys are sorted, so that the neighbours of every node, and
+        hence the reordering, do not depend on the iteration order of the set,
+        which differs between Python versions. The graph is then built by
+        `adjacency_from_pairs`.
+
+    Parameters
+    ----------
+    face_list : array
+        The int32 array containing the nodes of the cells.
+
+    width : int
+        The number of nodes of each cell.
+
+    number_of_nodes : int
+        The total number of nodes of the mesh.
+
+    Returns
+    -------
+    offsets : array
+        The int32 array of the offsets of the neighbours of every node.
+
+    neighbours : array
+        The int32 array of the neighbours of all nodes, node by node.
+    '''
+    n = number_of_nodes
+    edge_keys = set()
+    for first in range(0, width):
+        for second in range(first + 1, width):
+            edge_keys.update(compute_facet_keys((face_list[first::width], \
+            face_list[second::width]), n))
+    edge_keys = sorted(edge_keys)
+
+    return adjacency_from_pairs([key // n for key in edge_keys], \
+    [key % n for key in edge_keys], n)
+
+def adjacency_from_pairs(heads, tails, size):
+    '''
+    Build a graph in compressed sparse row form out of its edges.
+
+    The neighbours of every vertex are filled in with a counting sort, in O(n),
+        every edge being listed at both of its ends.
+
+    Parameters
+    ----------
+    heads : sequence
+        The first vertex of every edge.
+
+    tails : sequence
+        The second vertex of every edge.
+
+    size : int
+        The number of vertices of the graph.
+
+    Returns
+    -------
+    offsets : array
+        The int32 array of the offsets of the neighbours of every vertex, so
+            that the neighbours of the vertex `v` are
+            `neighbours[offsets[v]:offsets[v+1]]`.
+
+    neighbours : array
+        The int32 array of the neighbours of all vertices, vertex by vertex.
+    '''
+    # count the neighbours of every vertex, and turn the counts into offsets
+    offsets = array('i', [0]) * (size + 1)
+    for vertex in heads:
+        offsets[vertex+1] += 1
+    for vertex in tails:
+        offsets[vertex+1] += 1
+    for vertex in range(0, size):
+        offsets[vertex+1] += offsets[vertex]
+
+    neighbours = array('i', [0]) * (2 * len(heads))
+    filled = offsets[:-1] # the next free place of every vertex
+    for head, tail in zip(heads, tails):
+        neighbours[filled[head]] = tail
+        filled[head] += 1
+        neighbours[filled[tail]] = head
+        filled[tail] += 1
+
+    return offsets, neighbours
+
+def reverse_cuthill_mckee(offsets, neighbours):
+    '''
+    Order the nodes of a graph by the reverse Cuthill-McKee algorithm.
+
+    Every connected part of the graph is walked breadth first, from a node of
+        low degree at the far end of the part, and the unvisited neighbours of
+        every node are taken in increasing order of degree. The start is found
+        by a first breadth first walk from the node of the lowest degree left,
+        whose last level holds the nodes the farthest from it. Reversing the
+        order of the walk gives the ordering, which keeps the neighbours of
+        every node close to it in numbers.
+
+    Parameters
+    ----------
+    offsets : array
+        The int32 array of the offsets of the neighbours of every node, as given
+            by `node_adjacency`.
+
+    neighbours : array
+        The int32 array of the neighbours of all nodes, node by node.
+
+    Returns
+    -------
+    order : array
+        The int32 array of the nodes, in their new order. `order[k]` is the old
+            number of the node numbered `k`.
+    '''
+    number_of_nodes = len(offsets) - 1
+    degree = array('i', [offsets[node+1] - offsets[node] \
+    for node in range(0, number_of_nodes)])
+    order = array('i')
+    placed = bytearray(number_of_nodes)
+    seen = array('i', [-1]) * number_of_nodes # the root of the last walk
+
+    for root in sorted(range(0, number_of_nodes), key=degree.__getitem__):
+        if placed[root]:
+            continue
+        # walk from the root to the last level of its part of the graph
+        last, level = [root], [root]
+        seen[root] = root
+        while level:
+            last, level = level, []
+            for node in last:
+                for neighbour in neighbours[offsets[node]:offsets[node+1]]:
+                    if seen[neighbour] != root:
+                        seen[neighbour] = root
+                        level.append(neighbour)
+
+        # walk again from the node of the lowest degree of the last level
+        start = min(last, key=degree.__getitem__)
+        head = len(order)
+        order.append(start)
+        placed[start] = 1
+        while head < len(order):
+            node = order[head]
+            head += 1
+            fresh = [neighbour for neighbour in \
+            neighbours[offsets[node]:offsets[node+1]] if not placed[neighbour]]
+            fresh.sort(key=degree.__getitem__)
+            for neighbour in fresh:
+                placed[neighbour] = 1
+            order.extend(fresh)
+
+    order.reverse()
+    return order
+
+def spread_bits(dim):
+    '''
+    Return the table of the bits of every byte, spread apart to every dim-th bit.
+    '''
+    if dim not in SPREAD_BITS:
+        SPREAD_BITS[dim] = [sum(((byte >> bit) & 1) << (dim * bit) \
+for bit in range(0, 8)) for byte in range(0, 256)]
+    return SPREAD_BITS[dim]
+
+def interleave_bits(columns, bits):
+    '''
+    Interleave the bits of two or three columns of integers into single integers.
+
+    The bits of the first column are the most significant of every group. Every
+        byte of a whole column is spread apart with the `spread_bits` table at
+        once, so that the loops only run over the bytes and the axes.
+
+    Parameters
+    ----------
+    columns : list
+        The two or three lists of integers, with one value per point each.
+
+    bits : int
+        The number of bits of the values.
+
+    Returns
+    -------
+    keys : list
+        The interleaved integer of every point.
+    '''
+    dim = len(columns)
+    spread = spread_bits(dim)
+    keys = [0] * len(columns[0])
+    for axis, column in enumerate(columns):
+        for byte in range(0, (bits + 7) // 8):
+            shift = dim * 8 * byte + dim - 1 - axis
+            keys = [key | spread[(value >> (8 * byte)) & 255] << shift \
+            for key, value in zip(keys, column)]
+    return keys
+
+def hilbert_keys(columns, bits):
+    '''
+    Return the positions of points of an integer grid along the Hilbert curve.
+
+    The coordinates are turned into the transposed Hilbert index by the
+        algorithm of Skilling (2004), whose bits are then interleaved by
+        `interleave_bits`. Every step of the algorithm is done on whole
+        columns. The grid has `2 ** bits` points along each of its two or
+        three axes.
+
+    Parameters
+    ----------
+    columns : list
+        The two or three lists of the integer coordinates of the points.
+
+    bits : int
+        The number of bits of the coordinates.
+
+    Returns
+    -------
+    keys : list
+        The position of every point along the curve.
+    '''
+    columns = [list(column) for column in columns]
+    dim = len(columns)
+    # undo the excess work of the Gray code
+    q = 1 << (bits - 1)
+    while q > 1:
+        p = q - 1
+        columns[0] = [value ^ p if value & q else value for value in columns[0]]
+        for axis in range(1, dim):
+            # where the bit is set, flip the lower bits of the first axis,
+            #   and elsewhere swap them with the ones of this axis
+            swaps = [0 if value & q else (first ^ value) & p \
+            for first, value in zip(columns[0], columns[axis])]
+            columns[0] = [first ^ p if value & q else first ^ swap \
+            for first, value, swap in zip(columns[0], columns[axis], swaps)]
+            columns[axis] = list(map(int.__xor__, columns[axis], swaps))
+        q >>= 1
+    # Gray encode
+    for axis in range(1, dim):
+        columns[axis] = list(map(int.__xor__, columns[axis], columns[axis-1]))
+    flips = [0] * len(columns[0])
+    q = 1 << (bits - 1)
+    while q > 1:
+        flips = [flip ^ (q - 1) if value & q else flip \
+        for flip, value in zip(flips, columns[dim-1])]
+        q >>= 1
+    columns = [list(map(int.__xor__, column, flips)) for column in columns]
+
+    return interleave_bits(columns, bits)
+
+def cell_centroids(node_list, face_list, width):
+    '''
+    Compute the centroids of the cells, axis by axis.
+
+    The centroids are left as the sums of the coordinates of the nodes of the
+        cells, which only differ from the centroids by a constant factor. The
+        triangles get their xy-coordinates, and the tetrahedra their
+        xyz-coordinates.
+
+    Parameters
+    ----------
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
+
+    face_list : array
+        The int32 array containing the nodes of the cells.
+
+    width : int
+        The number of nodes of each cell, 3 for triangles, and 4 for tetrahedra.
+
+    Returns
+    -------
+    centroids : list
+        The lists of the x-coordinates, the y-coordinates, and for tetrahedra
+            the z-coordinates, of the centroids of the cells, times `width`.
+    '''
+    centroids = []
+    for axis in range(0, width - 1):
+        coordinates = node_list[axis::3]
+        sums = [0.0] * (len(face_list) // width)
+        for k in range(0, width):
+            sums = [total + coordinate for total, coordinate in \
+            zip(sums, map(coordinates.__getitem__, face_list[k::width]))]
+        centroids.append(sums)
+    return centroids
+
+def curve_keys(node_list, face_list, width, method):
+    '''
+    Compute the keys of the cells along the Hilbert or the Morton curve.
+
+    The centroids of the cells, as given by `cell_centroids`, are scaled onto an
+        integer grid that is fine enough for about one cell per grid point, up
+        to 16 bits per axis, and the keys are the positions of the grid points
+        along the curve.
+
+    Parameters
+    ----------
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
+
+    face_list : array
+        The int32 array containing the nodes of the cells.
+
+    width : int
+        The number of nodes of each cell, 3 for triangles, and 4 for tetrahedra.
+
+    method : string
+        'hilbert' or 'morton'.
+
+    Returns
+    -------
+    keys : list
+        The key of every cell.
+    '''
+    dim = width - 1
+    number_of_cells = len(face_list) // width
+    bits = 1
+    while bits < 16 and 1 << (dim * bits) < 4 * number_of_cells:
+        bits += 1
+
+    grid = []
+    for centroids in cell_centroids(node_list, face_list, width):
+        low, high = min(centroids or [0.0]), max(centroids or [0.0])
+        scale = ((1 << bits) - 1) / (high - low) if high > low else 0.0
+        grid.append([int((centroid - low) * scale) for centroid in centroids])
+
+    if method == 'hilbert':
+        return hilbert_keys(grid, bits)
+    return interleave_bits(grid, bits)
+
+def reorder_mesh(node_list, face_list, region_list, method, dim=2):
+    '''
+    Renumber the nodes and the cells of the mesh for locality.
+
+    The nodes are numbered by `reverse_cuthill_mckee` on the graph of
+        `node_adjacency`, which brings down the bandwidth of the matrices
+        assembled on the mesh. The cells are then sorted by their lowest node
+        for the 'rcm' method, or by the keys of `curve_keys` for the 'hilbert'
+        and the 'morton' methods, so that neighbouring cells follow each other
+        during assembly. The physical regions follow their cells. The sorts
+        are stable, and the whole stage runs in O(n log n).
+
+    Parameters
+    ----------
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
+
+    face_list : array
+        The int32 array containing the nodes of the cells.
+
+    region_list : array
+        The int32 array containing the physical region number of the cells.
+
+    method : string
+        One of `REORDER_METHODS`.
+
+    dim : int
+        The topological dimension of the mesh, 2 or 3.
+
+    Returns
+    -------
+    node_list : array
+        The coordinates of the nodes, in their new order.
+
+    face_list : array
+        The cells, in their new order, on the new node numbers.
+
+    region_list : array
+        The physical region numbers of the cells, in their new order.
+
+    permutation : array
+        The int32 array of the new number of every node.
+
+    bandwidths : tuple
+        The bandwidth of the mesh before and after the reordering, as given by
+            `mesh_bandwidth`.
+    '''
+    width = dim + 1
+    before = mesh_bandwidth(face_list, width)
+    order = reverse_cuthill_mckee(*node_adjacency(face_list, width, \
+    len(node_list) // 3))
+
+    permutation = array('i', [0]) * len(order)
+    for new, old in enumerate(order):
+        permutation[old] = new
+    reordered = array('d', [0.0]) * len(node_list)
+    for k in range(0, 3):
+        reordered[k::3] = array('d', map(node_list[k::3].__getitem__, order))
+    face_list = array('i', map(permutation.__getitem__, face_list))
+
+    if method == 'rcm':
+        cell_keys = list(map(min, *[face_list[k::width] for k in range(0, width)]))
+    else:
+        cell_keys = curve_keys(reordered, face_list, width, method)
+    cells = sorted(range(0, len(region_list)), key=cell_keys.__getitem__)
+
+    sorted_faces = array('i', [0]) * len(face_list)
+    for k in range(0, width):
+        sorted_faces[k::width] = array('i', map(face_list[k::width].__getitem__, \
+        cells))
+    region_list = array('i', map(region_list.__getitem__, cells))
+
+    return reordered, sorted_faces, region_list, permutation, \
+    (before, mesh_bandwidth(sorted_faces, width))
+
+def dual_adjacency(face_list, width, number_of_nodes):
+    '''
+    Build the graph of the cells of the mesh, in compressed sparse row form.
+
+    Two cells are neighbours when they share a facet. The keys of the facets of
+        all cells, as given by `compute_facet_keys`, are sorted along with
+        their cells, so that the cells of the same facet follow each other.
+        The graph is then built by `adjacency_from_pairs`.
+
+    Parameters
+    ----------
+    face_list : array
+        The int32 array containing the nodes of the cells.
+
+    width : int
+        The number of nodes of each cell, 3 for triangles, and 4 for tetrahedra.
+
+    number_of_nodes : int
+        The total number of nodes of the mesh.
+
+    Returns
+    -------
+    offsets : array
+        The int32 array of the offsets of the neighbours of every cell.
+
+    neighbours : array
+        The int32 array of the neighbours of all cells, cell by cell.
+    '''
+    number_of_cells = len(face_list) // width
+    keys = []
+    # the facets of a cell leave out one of its nodes each
+    for left_out in range(0, width):
+        keys.extend(compute_facet_keys([face_list[k::width] \
+        for k in range(0, width) if k != left_out], number_of_nodes))
+    order = sorted(range(0, len(keys)), key=keys.__getitem__)
+
+    heads, tails = array('i'), array('i')
+    for previous, current in zip(order, order[1:]):
+        if keys[previous] == keys[current]:
+            heads.append(previous % number_of_cells)
+            tails.append(current % number_of_cells)
+
+    return adjacency_from_pairs(heads, tails, number_of_cells)
+
+def partition_cells_rcb(node_list, face_list, width, parts):
+    '''
+    Partition the cells of the mesh by recursive coordinate bisection.
+
+    The cells are split in two along the axis of the largest extent of their
+        centroids, as given by `cell_centroids`, and each half again, until
+        there are `parts` partitions. An odd number of partitions is split
+        into two numbers of partitions that differ by one, and the cells are
+        shared between the halves in proportion, so that all partitions get
+        the same number of cells, give or take one. The function runs in
+        O(n log n log parts).
+
+    Parameters
+    ----------
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
+
+    face_list : array
+        The int32 array containing the nodes of the cells.
+
+    width : int
+        The number of nodes of each cell, 3 for triangles, and 4 for tetrahedra.
+
+    parts : int
+        The number of partitions.
+
+    Returns
+    -------
+    membership : array
+        The int32 array of the partition of every cell.
+    '''
+    centroids = cell_centroids(node_list, face_list, width)
+    membership = array('i', [0]) * (len(face_list) // width)
+
+    pending = [(list(range(0, len(membership))), 0, parts)]
+    while pending:
+        cells, first, count = pending.pop()
+        if count == 1:
+            for cell in cells:
+                membership[cell] = first
+            continue
+        # the axis of the largest extent of the centroids
+        extents = []
+        for axis, coordinates in enumerate(centroids):
+            values = list(map(coordinates.__getitem__, cells))
+            extents.append((max(values) - min(values) if values else 0.0, axis))
+        cells.sort(key=centroids[max(extents)[1]].__getitem__)
+        lower = count // 2
+        split = len(cells) * lower // count
+        pending.append((cells[:split], first, lower))
+        pending.append((cells[split:], first + lower, count - lower))
+
+    return membership
+
+def partition_cells_metis(face_list, width, number_of_nodes, parts):
+    '''
+    Partition the cells of the mesh with METIS, through the pymetis package.
+
+    METIS partitions the graph of `dual_adjacency`, keeping the number of
+        facets shared by partitions low.
+
+    Parameters
+    ----------
+    face_list : array
+        The int32 array containing the nodes of the cells.
+
+    width : int
+        The number of nodes of each cell, 3 for triangles, and 4 for tetrahedra.
+
+    number_of_nodes : int
+        The total number of nodes of the mesh.
+
+    parts : int
+        The number of partitions.
+
+    Returns
+    -------
+    membership : array
+        The int32 array of the partition of every cell.
+
+    Raises
+    ------
+    ImportError
+        If the pymetis package is not installed.
+    '''
+    try:
+        import pymetis
+    except ImportError:
+        raise ImportError('The metis partitioner needs the pymetis package.')
+
+    offsets, neighbours = dual_adjacency(face_list, width, number_of_nodes)
+    if parts == 1:
+        return array('i', [0]) * (len(offsets) - 1)
+    cut, membership = pymetis.part_graph(parts, xadj=offsets, adjncy=neighbours)
+
+    return array('i', membership)
+
+def retrieve_facet_information(facet_keys, number_of_nodes, line_element_file, \
+line_physical_description, node_map=None, splits=LINE_ELEMENT_SPLITS, \
+line_records=None):
+    '''
+    Retrieve the physical line region number of every edge of the mesh.
+
+    The function consumes the line element records streamed by
+        `read_element_records`. The two nodes of each line element are turned
+        into an edge key, which is looked up in the sorted `facet_keys` by
+        bisection. The edge then gets the physical region number of the
+        geometric line (LOC) of the line element, as numbered by
+        `register_physical_regions`. The edges that are not on any line region
+        keep the number 0.
+
+    For a 3D mesh, the same is done with the face elements of the boundaries
+        and the interfaces, whose three nodes are turned into a triangle key,
+        to give the triangles of the mesh the physical face region numbers.
+
+    Parameters
+    ----------
+    facet_keys : list
+        The sorted keys of the unique edges, as given by
+            `retrieve_edge_information`, or of the unique triangles, as given
+            by `retrieve_triangle_information`.
+
+    number_of_nodes : int
+        The total number of nodes of the mesh.
+
+    line_element_file : string or file object
+        The name, or the open file object, of the txt file exported from Flux
+            detailing the line element information.
+
+    line_physical_description : string, file object or list
+        The name, or the open file object, of the txt file containing the names
+            of the physical regions of the geometrical lines, or the list of
+            the names, as read by `register_physical_regions`.
+
+    node_map : array
+        The new numbers of the nodes, as given by `drop_unused_nodes`, to
+            renumber the nodes of the line elements with. If None, the nodes
+            keep their numbers.
+
+    splits : dict
+        The kinds of the elements of `line_element_file`, `LINE_ELEMENT_SPLITS`
+            for line elements, or `FACE_ELEMENT_SPLITS` for the face elements
+            of a 3D mesh.
+
+    line_records : iterable
+        The (nodes, locs) pairs of int32 arrays to consume instead of
+            `read_element_records(line_element_file, splits)`, in which case
+            `line_element_file` only names them in error messages.
+
+    Returns
+    -------
+    facet_region_list : array
+        The int32 array containing the physical region number of the edges, in
+            the DOLFIN numbering of the edges, or of the triangles.
+
+    region_registry : OrderedDict
+        The physical line region names, mapped to their numbers, in numbering
+            order. It is written into `line_number_reference.txt` by
+            `write_number_reference`.
+
+    Raises
+    ------
+    ValueError
+        If a line element is not an edge of any face element, or a face element
+            not a triangle of any volume element, or if it lies on a geometric
+            line that the physical description doesn't name.
+    '''
+    width = len(splits[min(splits)][0])
+    facet_region_list = array('i', [0]) * len(facet_keys)
+    region_registry, line_info = register_physical_regions(line_physical_description)
+    if line_records is None:
+        line_records = read_element_records(line_element_file, splits)
+
+    # tag the facets of the line elements with their physical region number
+    for nodes, locs in line_records:
+        check_locations(locs, line_info, line_physical_description)
+        if node_map is not None:
+            nodes = array('i', map(node_map.__getitem__, nodes))
+        keys = compute_facet_keys([nodes[k::width] for k in range(0, width)], \
+        number_of_nodes)
+        for key, loc in zip(keys, locs):
+            index = bisect_left(facet_keys, key)
+            if index == len(facet_keys) or facet_keys[index] != key:
+                raise ValueError('%s: element on nodes %s is not a facet of the \
+mesh' % (source_name(line_element_file), ', '.join('%d' % (node+1) \
+for node in decode_facet_keys([key], number_of_nodes, width))))
+            facet_region_list[index] = line_info[loc]
+
+    return facet_region_list, region_registry
+
+def write_number_reference(outputfile, region_registry):
+    '''
+    Write the physical region numbers and their names into a txt file.
+
+    The txt file contains the name of the physical regions as defined by the
+        Flux user, corresponding to each number. This txt file can be used
+        for reference during the import process into FEniCS and setting up
+        the finite element problem.
+
+    Parameters
+    ----------
+    outputfile : string or file object
+        The name of the txt file to write into, or a text file object.
+            Example: "face_number_reference.txt".
+
+    region_registry : OrderedDict
+        The physical region names, mapped to their numbers, in numbering order.
+    '''
+    # write region_registry into a txt file for user's reference
+    with open_target(outputfile, 'w') as face_ref: # open write-only
+        for s, index in region_registry.items():
+            write_string = str(index) + ' ' + (s) + '\n'
+            face_ref.write(write_string)
+
+def write_faces(outputfile, face_list, dim=2):
+    '''
+    Write the face number and their node numbers into an xml file.
+
+    The function appends the information contained in `face_list` into the same
+        xml file containing the node coordinate information. Example: "mesh.xml".
+        In writing the xml file, the function follows a formatting that is identifiable
+        in FEniCS. The cells of a 3D mesh are the volume elements, written as
+        tetrahedra.
+
+    This function doesn't return any values. It only appends to an xml file in the
+        working directory.
+
+    Parameters
+    ----------
+    outputfile : string or file object
+        The name of the xml file to append, or the text file object that
+            `write_nodes` has written into.
+
+    face_list : array
+        The int32 array containing the nodes of the cells, 3 per face element,
+            or 4 per volume element.
+
+    dim : int
+        The topological dimension of the mesh, 2 or 3.
+    '''
+    # define the footer of the xml file
+    xml_footer = \
+    """    </cells>
+  </mesh>
+</dolfin>
+
+"""
+    # define the cell line, as '<triangle index="%d" v0="%d" v1="%d" v2="%d"/>'
+    xml_cell = '      <%s index="%%d" %s/>\n' % (CELL_TYPES[dim], \
+    ' '.join('v%d="%%d"' % i for i in range(0, dim + 1)))
+
+    with open_target(outputfile, 'a') as notepadtwo: # open append-only
+        notepadtwo.write('    <cells size="%d">\n' % (len(face_list) // (dim + 1)))
+        for batch in format_record_batches(xml_cell, face_list, dim + 1):
+            notepadtwo.write(batch) # write the node numbers for each faces
+
+        notepadtwo.write(xml_footer) # end of the xml file
+
+def write_mesh(outputfile, node_list, face_list, precision=16, dim=2):
+    '''
+    Write the nodes and the face elements into an xml mesh file, in one pass.
+
+    The file is opened once, and streamed through by `write_nodes` and
+        `write_faces`, instead of being reopened in append mode for the faces.
+        A name ending with `.xml.gz` gives a gzip-compressed mesh file, which
+        DOLFIN reads directly.
+
+    Parameters
+    ----------
+    outputfile : string or file object
+        The name of the xml file to create, or a text file object to write
+            the xml into.
+
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
+
+    face_list : array
+        The int32 array containing the nodes of the cells, 3 per face element,
+            or 4 per volume element.
+
+    precision : int
+        The number of digits after the decimal point of the coordinates.
+
+    dim : int
+        The topological dimension of the mesh, 2 or 3.
+
+    Creates
+    -------
+    outputfile : .xml or .xml.gz file
+        The xml file for the mesh, which contains the node coordinates and the
+            nodes of the face elements.
+    '''
+    with open_target(outputfile, 'w') as notepad: # open write-only
+        write_nodes(notepad, node_list, precision, dim)
+
+        write_faces(notepad, face_list, dim)
+
+def write_physical_region(outputfile ,region_list, dim=2):
+    '''
+    Write the face number and their phyical region numbers into an xml file.
+
+    The same function writes the edge numbers and their physical line region
+        numbers, when `dim` is 1.
+
+    This function doesn't return any values. It only writes to an xml file in the
+        working directory.
+
+    Parameters
+    ----------
+    outputfile : string or file object
+        The name of the xml file to write into, or a text file object to write
+            the xml into.
+
+    region_list : array
+        The int32 array containing the physical region number of the face
+            elements, or of the edges.
+
+    dim : int
+        The topological dimension of the mesh entities, 2 for the face
+            elements, and 1 for the edges, or 3 for the volume elements, and 2
+            for the faces of a 3D mesh.
+
+    Creates
+    -------
+    outputfile : .xml file
+        The xml file, which contains the face numbers and their corresponding
+            physical region numbers.
+    '''
+    # define xml header
+    xml_header = \
+    """<?xml version="1.0" encoding="UTF-8"?>
+<dolfin xmlns:dolfin="http://fenicsproject.org">
+  <mesh_function type="uint" dim="%d" size="%d">
+"""
+    # define xml footer
+    xml_footer = \
+    """  </mesh_function>
+</dolfin>
+"""
+
+    # write xml_header
+    # write the face element indices and the corresponding physical region number code
+    with open_target(outputfile, 'w') as physical_region: # open write-only
+        physical_region.write(xml_header % (dim, len(region_list)))
+        for batch in format_record_batches( \
+        '      <entity index="%d" value="%d"/>\n', region_list, 1):
+            physical_region.write(batch) # write the region numbers for each faces
+
+    # write xml footer
+        physical_region.write(xml_footer) # end of the xml file
+
+def xdmf_mesh_items(topology_data, geometry_data, number_of_elements, \
+number_of_nodes, nodes_per_element=3, dim=2):
+    '''
+    Compose the XDMF Topology and Geometry items of a grid.
+
+    The items point into the HDF5 datasets written by `write_xdmf_mesh`, or by
+        `write_xdmf_facet_region` for the edges. The geometry of a Flux2D mesh
+        is written as XY, which makes FEniCS read it as a mesh of geometric
+        dimension 2, just like the legacy DOLFIN XML mesh. The geometry of a
+        Flux3D mesh is written as XYZ.
+
+    Parameters
+    ----------
+    topology_data : string
+        The HDF5 file and dataset of the connectivity, as in
+            "mesh.h5:/Mesh/mesh/topology", relative to the XDMF file.
+
+    geometry_data : string
+        The HDF5 file and dataset of the coordinates, as in
+            "mesh.h5:/Mesh/mesh/geometry", relative to the XDMF file.
+
+    number_of_elements : int
+        The number of rows of the connectivity.
+
+    number_of_nodes : int
+        The number of rows of the coordinates.
+
+    nodes_per_element : int
+        The number of nodes of each element, 3 for the face elements, and 2
+            for the edges, or 4 for the volume elements, and 3 for the
+            triangles of a 3D mesh.
+
+    dim : int
+        The geometric dimension of the mesh, 2 or 3.
+
+    Returns
+    -------
+    items : string
+        The Topology and Geometry items, ready to be placed inside a Grid.
+    '''
+    topology_type = {2: 'Polyline', 3: 'Triangle', 4: 'Tetrahedron'}[nodes_per_element]
+    geometry_type = {2: 'XY', 3: 'XYZ'}[dim]
+    xml_items = \
+    """      <Topology NumberOfElements="%d" TopologyType="%s" NodesPerElement="%d">
+        <DataItem Dimensions="%d %d" NumberType="Int" Precision="4" Format="HDF">%s</DataItem>
+      </Topology>
+      <Geometry GeometryType="%s">
+        <DataItem Dimensions="%d %d" NumberType="Float" Precision="8" Format="HDF">%s</DataItem>
+      </Geometry>
+"""
+    return xml_items % (number_of_elements, topology_type, nodes_per_element, \
+    number_of_elements, nodes_per_element, topology_data, geometry_type, \
+    number_of_nodes, dim, geometry_data)
+
+def write_hdf_dataset(hdf, name, data, chunk_rows=None):
+    '''
+    Write a two dimensional dataset into an open HDF5 file.
+
+    Parameters
+    ----------
+    hdf : h5py.File
+        The HDF5 file opened for writing.
+
+    name : string
+        The path of the dataset within the HDF5 file.
+
+    data : numpy.ndarray
+        The two dimensional data to write.
+
+    chunk_rows : int
+        The number of rows per chunk of the dataset. If None, the dataset is
+            stored contiguously.
+    '''
+    chunks = None
+    if chunk_rows is not None and len(data) > 0:
+        chunks = (min(chunk_rows, len(data)), data.shape[1])
+    hdf.create_dataset(name, data=data, chunks=chunks)
+
+def write_xdmf_mesh(outputfile, node_list, face_list, chunk_rows=None, dim=2):
+    '''
+    Write the nodes and the face elements into an XDMF file with HDF5 heavy data.
+
+    The coordinates and the connectivity are written as binary datasets into
+        an HDF5 file next to the XDMF file, with the same name but the `.h5`
+        extension. The XDMF file itself only describes the datasets, and can be
+        read with `XDMFFile.read` of FEniCS, also in parallel. The function
+        needs the `h5py` package, which is only imported when it is called.
+
+    Parameters
+    ----------
+    outputfile : string
+        The name of the XDMF file to create. Example: "mesh.xdmf".
+
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
+
+    face_list : array
+        The int32 array containing the nodes of the cells, 3 per face element,
+            or 4 per volume element.
+
+    chunk_rows : int
+        The number of rows per chunk of the HDF5 datasets. If None, the
+            datasets are stored contiguously.
+
+    dim : int
+        The dimension of the mesh, 2 or 3.
+
+    Raises
+    ------
+    ImportError
+        If the `h5py` or the `numpy` package is not installed.
+
+    Creates
+    -------
+    outputfile : .xdmf file
+        The XDMF file describing the mesh.
+
+    heavy_data : .h5 file
+        The HDF5 file holding the node coordinates at `/Mesh/mesh/geometry` and
+            the connectivity at `/Mesh/mesh/topology`.
+    '''
+    try:
+        import h5py, numpy
+    except ImportError:
+        raise ImportError('The xdmf output format needs the h5py and numpy \
+packages.')
+
+    # define the XDMF file
+    xml_file = \
+    """<?xml version="1.0"?>
+<!DOCTYPE Xdmf SYSTEM "Xdmf.dtd" []>
+<Xdmf Version="3.0" xmlns:xi="http://www.w3.org/2001/XInclude">
+  <Domain>
+    <Grid Name="mesh" GridType="Uniform">
+%s    </Grid>
+  </Domain>
+</Xdmf>
+"""
+    heavy_data = os.path.splitext(outputfile)[0] + '.h5'
+
+    # write the coordinates, without the z-coordinates in 2D, and the connectivity
+    with h5py.File(heavy_data, 'w') as hdf:
+        geometry = numpy.frombuffer(node_list, dtype=numpy.float64).reshape(-1, 3)
+        topology = numpy.frombuffer(face_list, dtype=numpy.int32).reshape(-1, dim + 1)
+        write_hdf_dataset(hdf, '/Mesh/mesh/geometry', geometry[:, :dim], chunk_rows)
+        write_hdf_dataset(hdf, '/Mesh/mesh/topology', topology, chunk_rows)
+
+    heavy_data = os.path.basename(heavy_data)
+    with open(outputfile, 'w') as notepad: # open write-only
+        notepad.write(xml_file % xdmf_mesh_items(heavy_data + ':/Mesh/mesh/topology', \
+        heavy_data + ':/Mesh/mesh/geometry', len(face_list) // (dim + 1), \
+        len(node_list) // 3, dim + 1, dim))
+
+def write_xdmf_physical_region(outputfile, mesh_outputfile, node_list, face_list, \
+region_list, chunk_rows=None, dim=2):
+    '''
+    Write the phyical region numbers into an XDMF file with HDF5 heavy data.
+
+    The region numbers are written as a cell attribute named
+        `physical_region`, on a grid that refers to the mesh written by
+        `write_xdmf_mesh`. In FEniCS, the file is read into a
+        MeshValueCollection of the dimension of the mesh with
+        `XDMFFile.read(mvc, "physical_region")`. The function needs the `h5py` package, which is
+        only imported when it is called.
+
+    Parameters
+    ----------
+    outputfile : string
+        The name of the XDMF file to create. Example: "physical_region.xdmf".
+
+    mesh_outputfile : string
+        The name of the XDMF file written by `write_xdmf_mesh`.
+
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
+
+    face_list : array
+        The int32 array containing the nodes of the cells, 3 per face element,
+            or 4 per volume element.
+
+    region_list : array
+        The int32 array containing the physical region number of the cells.
+
+    chunk_rows : int
+        The number of rows per chunk of the HDF5 dataset. If None, the dataset
+            is stored contiguously.
+
+    dim : int
+        The dimension of the mesh, 2 or 3.
+
+    Raises
+    ------
+    ImportError
+        If the `h5py` or the `numpy` package is not installed.
+
+    Creates
+    -------
+    outputfile : .xdmf file
+        The XDMF file describing the physical regions.
+
+    heavy_data : .h5 file
+        The HDF5 file holding the region numbers at `/MeshFunction/0/values`.
+    '''
+    try:
+        import h5py, numpy
+    except ImportError:
+        raise ImportError('The xdmf output format needs the h5py and numpy \
+packages.')
+
+    # define the XDMF file
+    xml_file = \
+    """<?xml version="1.0"?>
+<!DOCTYPE Xdmf SYSTEM "Xdmf.dtd" []>
+<Xdmf Version="3.0" xmlns:xi="http://www.w3.org/2001/XInclude">
+  <Domain>
+    <Grid Name="physical_region" GridType="Uniform">
+%s      <Attribute Name="physical_region" AttributeType="Scalar" Center="Cell">
+        <DataItem Dimensions="%d 1" NumberType="UInt" Precision="4" Format="HDF">%s:/MeshFunction/0/values</DataItem>
+      </Attribute>
+    </Grid>
+  </Domain>
+</Xdmf>
+"""
+    heavy_data = os.path.splitext(outputfile)[0] + '.h5'
+    mesh_heavy_data = os.path.relpath(os.path.splitext(mesh_outputfile)[0] + '.h5', \
+    os.path.dirname(os.path.abspath(outputfile)))
+
+    # write the region numbers as a column of unsigned integers
+    with h5py.File(heavy_data, 'w') as hdf:
+        values = numpy.frombuffer(region_list, dtype=numpy.int32).astype(numpy.uint32)
+        write_hdf_dataset(hdf, '/MeshFunction/0/values', values.reshape(-1, 1), \
+        chunk_rows)
+
+    with open(outputfile, 'w') as notepad: # open write-only
+        notepad.write(xml_file % (xdmf_mesh_items(mesh_heavy_data + \
+        ':/Mesh/mesh/topology', mesh_heavy_data + ':/Mesh/mesh/geometry', \
+        len(face_list) // (dim + 1), len(node_list) // 3, dim + 1, dim), \
+        len(region_list), os.path.basename(heavy_data)))
+
+def write_xdmf_facet_region(outputfile, mesh_outputfile, node_list, facet_keys, \
+facet_region_list, chunk_rows=None, dim=2):
+    '''
+    Write the edges and their phyical line region numbers into an XDMF file.
+
+    The edges are written as a Polyline topology of their own, on the
+        coordinates of the mesh written by `write_xdmf_mesh`, and their region
+        numbers as a cell attribute named `facet_region`. In FEniCS, the file
+        is read into a MeshValueCollection of dimension 1 with
+        `XDMFFile.read(mvc, "facet_region")`. For a 3D mesh, the triangles and
+        their physical face region numbers are written in the same way, as a
+        Triangle topology, to be read with a MeshValueCollection of dimension
+        2. The function needs the `h5py`
+        package, which is only imported when it is called.
+
+    Parameters
+    ----------
+    outputfile : string
+        The name of the XDMF file to create. Example: "facet_region.xdmf".
+
+    mesh_outputfile : string
+        The name of the XDMF file written by `write_xdmf_mesh`.
+
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
+
+    facet_keys : list
+        The sorted keys of the unique edges, as given by
+            `retrieve_edge_information`, or of the unique triangles, as given
+            by `retrieve_triangle_information`.
+
+    facet_region_list : array
+        The int32 array containing the physical region number of the facets.
+
+    chunk_rows : int
+        The number of rows per chunk of the HDF5 datasets. If None, the
+            datasets are stored contiguously.
+
+    dim : int
+        The dimension of the mesh, 2 or 3.
+
+    Raises
+    ------
+    ImportError
+        If the `h5py` or the `numpy` package is not installed.
+
+    Creates
+    -------
+    outputfile : .xdmf file
+        The XDMF file describing the edges and their physical regions.
+
+    heavy_data : .h5 file
+        The HDF5 file holding the nodes of the edges at
+            `/MeshFunction/0/topology`, and their region numbers at
+            `/MeshFunction/0/values`.
+    '''
+    try:
+        import h5py, numpy
+    except ImportError:
+        raise ImportError('The xdmf output format needs the h5py and numpy \
+packages.')
+
+    # define the XDMF file
+    xml_file = \
+    """<?xml version="1.0"?>
+<!DOCTYPE Xdmf SYSTEM "Xdmf.dtd" []>
+<Xdmf Version="3.0" xmlns:xi="http://www.w3.org/2001/XInclude">
+  <Domain>
+    <Grid Name="facet_region" GridType="Uniform">
+%s      <Attribute Name="facet_region" AttributeType="Scalar" Center="Cell">
+        <DataItem Dimensions="%d 1" NumberType="UInt" Precision="4" Format="HDF">%s:/MeshFunction/0/values</DataItem>
+      </Attribute>
+    </Grid>
+  </Domain>
+</Xdmf>
+"""
+    heavy_data = os.path.splitext(outputfile)[0] + '.h5'
+    mesh_heavy_data = os.path.relpath(os.path.splitext(mesh_outputfile)[0] + '.h5', \
+    os.path.dirname(os.path.abspath(outputfile)))
+    number_of_nodes = len(node_list) // 3
+
+    # write the nodes of the facets, and their region numbers
+    with h5py.File(heavy_data, 'w') as hdf:
+        topology = numpy.frombuffer(decode_facet_keys(facet_keys, number_of_nodes, \
+        dim), dtype=numpy.int32).reshape(-1, dim)
+        values = numpy.frombuffer(facet_region_list, dtype=numpy.int32).astype(numpy.uint32)
+        write_hdf_dataset(hdf, '/MeshFunction/0/topology', topology, chunk_rows)
+        write_hdf_dataset(hdf, '/MeshFunction/0/values', values.reshape(-1, 1), \
+        chunk_rows)
+
+    heavy_data = os.path.basename(heavy_data)
+    with open(outputfile, 'w') as notepad: # open write-only
+        notepad.write(xml_file % (xdmf_mesh_items(heavy_data + \
+        ':/MeshFunction/0/topology', mesh_heavy_data + ':/Mesh/mesh/geometry', \
+        len(facet_keys), number_of_nodes, dim, dim), len(facet_region_list), \
+        heavy_data))
+
+def write_array_file(outputfile, arrays, names):
+    '''
+    Write named typed arrays into a compact binary file.
+
+    The file starts with a header of 16 bytes, packed as `ARRAY_FILE_HEADER`:
+        the magic bytes `ARRAY_FILE_MAGIC`, and the version of the format and
+        the number of arrays, as little-endian unsigned 32-bit integers. Every
+        array follows, as a header of 24 bytes, packed as `ARRAY_HEADER`: its
+        name, NUL-padded to 8 bytes, its one-byte typecode, as for the `array`
+        module, its item size in bytes, 6 bytes of padding, and its length, as
+        a little-endian unsigned 64-bit integer. Then come its values in
+        little-endian byte order, padded with zeros to a multiple of
+        `ARRAY_ALIGNMENT` bytes. The values of every array thus start at a
+        multiple of 8 bytes, and can be memory-mapped in place, as done by
+        `map_array_file`.
+
+    Parameters
+    ----------
+    outputfile : string
+        The name of the binary file to create.
+
+    arrays : list
+        The arrays to write, in order.
+
+    names : list
+        The names of the arrays, of up to 8 ASCII characters each.
+    '''
+    with open(outputfile, 'wb') as binary: # open write-only, in binary
+        binary.write(struct.pack(ARRAY_FILE_HEADER, ARRAY_FILE_MAGIC, \
+ARRAY_FILE_VERSION, len(arrays)))
+        for name, values in zip(names, arrays):
+            binary.write(struct.pack(ARRAY_HEADER, name.encode('ascii'), \
+values.typecode.encode('ascii'), values.itemsize, len(values)))
+            if sys.byteorder == 'big':
+                values = array(values.typecode, values)
+                values.byteswap()
+            values.tofile(binary)
+            binary.write(b'\0' * (-len(values) * values.itemsize % ARRAY_ALIGNMENT))
+
+def array_file_entries(binary, inputfile):
+    '''
+    Read the headers of the arrays of a binary file written by `write_array_file`.
+
+    Parameters
+    ----------
+    binary : file object
+        The binary file, open for reading at its start. It is left at the
+            values of every array when the array is yielded, and moved past
+            them when the next one is asked for.
+
+    inputfile : string
+        The name of the binary file, for the error messages.
+
+    Yields
+    ------
+    name : string
+        The name of the array.
+
+    typecode : string
+        The typecode of the array.
+
+    length : int
+        The number of values of the array.
+
+    Raises
+    ------
+    ValueError
+        If the file is not an array file, or if its version or the item size of
+            an array is not the one of this script.
+
+    EOFError
+        If the file is truncated.
+    '''
+    file_header_size = struct.calcsize(ARRAY_FILE_HEADER)
+    header_size = struct.calcsize(ARRAY_HEADER)
+    header = binary.read(file_header_size)
+    if len(header) < file_header_size:
+        raise EOFError('Truncated array file %s' % inputfile)
+    magic, version, count = struct.unpack(ARRAY_FILE_HEADER, header)
+    if magic != ARRAY_FILE_MAGIC:
+        raise ValueError('Not an array file : %s' % inputfile)
+    if version != ARRAY_FILE_VERSION:
+        raise ValueError('Unsupported version %d of the array file %s' \
+% (version, inputfile))
+
+    for _ in range(0, count):
+        header = binary.read(header_size)
+        if len(header) < header_size:
+            raise EOFError('Truncated array file %s' % inputfile)
+        name, typecode, itemsize, length = struct.unpack(ARRAY_HEADER, header)
+        typecode = native_string(typecode)
+        if array(typecode).itemsize != itemsize:
+            raise ValueError('Wrong item size %d of the typecode %s in %s' \
+% (itemsize, typecode, inputfile))
+        start = binary.tell()
+        yield native_string(name.rstrip(b'\0')), typecode, length
+        size = length * itemsize
+        binary.seek(start + size + (-size % ARRAY_ALIGNMENT))
+
+def read_array_file(inputfile):
+    '''
+    Read the typed arrays of a binary file written by `write_array_file`.
+
+    Parameters
+    ----------
+    inputfile : string
+        The name of the binary file to read.
+
+    Returns
+    -------
+    arrays : OrderedDict
+        The arrays of the file, by name, in order.
+
+    Raises
+    ------
+    ValueError
+        If the file is not an array file of this version.
+
+    EOFError
+        If the file is truncated.
+    '''
+    arrays = OrderedDict()
+    with open(inputfile, 'rb') as binary: # open read-only, in binary
+        for name, typecode, length in array_file_entries(binary, inputfile):
+            values = array(typecode)
+            values.fromfile(binary, length)
+            if sys.byteorder == 'big':
+                values.byteswap()
+            arrays[name] = values
+
+    return arrays
+
+def map_array_file(inputfile):
+    '''
+    Memory-map the typed arrays of a binary file written by `write_array_file`.
+
+    Unlike `read_array_file`, no value is read or copied until it is used, so
+        that the arrays of a large file can be inspected at once.
+
+    Parameters
+    ----------
+    inputfile : string
+        The name of the binary file to map.
+
+    Returns
+    -------
+    arrays : OrderedDict
+        The read-only `numpy.memmap` of every array of the file, by name, in
+            order.
+
+    Raises
+    ------
+    ValueError
+        If the file is not an array file of this version.
+
+    EOFError
+        If the file is truncated.
+
+    ImportError
+        If the `numpy` package is not installed.
+    '''
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('Mapping array files needs the numpy package.')
+
+    arrays = OrderedDict()
+    file_size = os.path.getsize(inputfile)
+    with open(inputfile, 'rb') as binary: # open read-only, in binary
+        for name, typecode, length in array_file_entries(binary, inputfile):
+            dtype = numpy.dtype(typecode).newbyteorder('<')
+            offset = binary.tell()
+            if offset + length * dtype.itemsize > file_size:
+                raise EOFError('Truncated array file %s' % inputfile)
+            arrays[name] = numpy.memmap(inputfile, dtype=dtype, mode='r', \
+offset=offset, shape=(length,)) if length else numpy.zeros(0, dtype=dtype)
+
+    return arrays
+
+def convert_array(values, typecode):
+    '''
+    Return a typed array converted to another typecode.
+
+    Large arrays are converted by NumPy where it is available, since the
+        `array` module makes an object of every value.
+    '''
+    if values.typecode == typecode:
+        return values
+    numpy = import_numpy(len(values), NUMPY_VALUES)
+    if numpy is None:
+        return array(typecode, values)
+    converted = array(typecode)
+    if len(values):
+        data = numpy.frombuffer(values, dtype=numpy.dtype(values.typecode)) \
+.astype(numpy.dtype(typecode)).tobytes()
+        # python 2 arrays only have fromstring
+        getattr(converted, 'frombytes', getattr(converted, 'fromstring', None))(data)
+    return converted
+
+def narrow_codes(values):
+    '''
+    Return an int32 array of codes as a uint16 array, if all of them fit in one.
+    '''
+    bounds = array_bounds(values)
+    if bounds is None or bounds[0] < 0 or bounds[1] > 65535:
+        return values
+    return convert_array(values, 'H')
+
+class ConversionCache(object):
+    '''
+    A directory of parsed Flux exports, keyed by the hash of their contents.
+
+    The arrays parsed from a node or face element export are stored in a
+        binary file named after the SHA-1 hash of the export, and loaded back
+        instead of parsing an unchanged export again.
+
+    The cache also records, for every output file, the hash of the inputs and
+        options it was written from, so that an output file that would come out
+        the same is not written again.
+
+    The least recently used arrays and records are deleted once the directory
+        holds more than `max_size` bytes. An output whose record is deleted is
+        just written again.
+
+    Attributes
+    ----------
+    directory : string
+        The directory holding the cached files. It is created if needed.
+
+    max_size : int
+        The size limit of the cached arrays and output records, in bytes.
+    '''
+    def __init__(self, directory, max_size=1024):
+        self.directory = directory
+        self.max_size = max_size * 1048576
+        self.hashes = {}
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.evict() # in case the size limit has been lowered
+
+    def key(self, source):
+        '''
+        The SHA-1 hash of the contents of a file, computed once per run.
+        '''
+        stat = os.stat(source)
+        identity = (os.path.abspath(source), stat.st_size, stat.st_mtime)
+        if identity not in self.hashes:
+            import hashlib
+            digest = hashlib.sha1()
+            with open(source, 'rb') as export: # open read-only, in binary
+                for chunk in iter(lambda: export.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            self.hashes[identity] = digest.hexdigest()
+        return self.hashes[identity]
+
+    def path(self, name):
+        '''
+        The path of a file of the cache directory.
+        '''
+        return os.path.join(self.directory, name)
+
+    def load(self, source, kind):
+        '''
+        Return the arrays cached for an export, or None if there are none.
+
+        Parameters
+        ----------
+        source : string
+            The name of the export.
+
+        kind : string
+            What the arrays hold, 'nodes' or 'faces'.
+        '''
+        cached = self.path('%s.%s.bin' % (self.key(source), kind))
+        if not os.path.isfile(cached):
+            return None
+        try:
+            arrays = read_array_file(cached)
+            arrays = [arrays[name] for name in CACHED_ARRAYS[kind]]
+        except (EOFError, ValueError, KeyError, struct.error):
+            return None # a damaged or outdated file is parsed again, and overwritten
+        os.utime(cached, None) # mark as recently used
+
+        # the codes narrowed by `store` are widened back
+        return [convert_array(values, 'i') if values.typecode == 'H' else values \
+for values in arrays]
+
+    def store(self, source, kind, arrays):
+        '''
+        Cache the arrays parsed from an export, then evict old files if needed.
+
+        The arrays are named after `CACHED_ARRAYS`, and the geometric entity
+            codes of the cells are stored as uint16 values if they fit.
+        '''
+        cached = self.path('%s.%s.bin' % (self.key(source), kind))
+        names = CACHED_ARRAYS[kind]
+        arrays = [narrow_codes(values) if name == 'locs' else values \
+for name, values in zip(names, arrays)]
+        # write aside first, so that a concurrent run never reads a partial file
+        partial = '%s.%d.tmp' % (cached, os.getpid())
+        write_array_file(partial, arrays, names)
+        try:
+            os.rename(partial, cached)
+        except OSError: # windows doesn't replace an existing file
+            os.remove(cached)
+            os.rename(partial, cached)
+        self.evict()
+
+    def evict(self):
+        '''
+        Delete the least recently used files until the cache fits `max_size`.
+        '''
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(('.bin', '.output')):
+                try:
+                    stat = os.stat(self.path(name))
+                except OSError: # evicted by a concurrent conversion
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+        entries.sort()
+        total = sum(entry[1] for entry in entries)
+        for mtime, size, name in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(self.path(name))
+            except OSError: # evicted by a concurrent conversion
+                pass
+            total -= size
+
+    def recipe(self, sources, settings):
+        '''
+        The hash of the inputs and the settings that an output is written from.
+
+        Parameters
+        ----------
+        sources : list
+            The names of the exports the output depends on.
+
+        settings : tuple
+            The options and output names the output depends on.
+        '''
+        import hashlib
+        digest = hashlib.sha1(repr(settings).encode('utf-8'))
+        for source in sources:
+            digest.update(self.key(source).encode('ascii'))
+        return digest.hexdigest()
+
+    def output_record(self, outputfile):
+        '''
+        The path of the file recording how an output file was written.
+        '''
+        import hashlib
+        name = hashlib.sha1(os.path.abspath(outputfile).encode('utf-8')).hexdigest()
+        return self.path(name + '.output')
+
+    def output_state(self, outputfile, recipe):
+        '''
+        The recipe of an output file, along with its size and modification time.
+        '''
+        stat = os.stat(outputfile)
+        return '%s %d %r\n' % (recipe, stat.st_size, stat.st_mtime)
+
+    def is_current(self, outputfile, recipe):
+        '''
+        Whether an output file is there, untouched, and written from `recipe`.
+        '''
+        record = self.output_record(outputfile)
+        if not os.path.isfile(outputfile) or not os.path.isfile(record):
+            return False
+        with open(record) as state: # open read-only
+            current = state.read() == self.output_state(outputfile, recipe)
+        if current:
+            os.utime(record, None) # mark as recently used
+        return current
+
+    def record(self, outputfile, recipe):
+        '''
+        Record that an output file has been written from `recipe`.
+        '''
+        with open(self.output_record(outputfile), 'w') as state: # open write-only
+            state.write(self.output_state(outputfile, recipe))
+
+def peak_memory():
+    '''
+    Return the peak resident memory of the script so far, in MB.
+
+    The peak is taken from the `resource` module, so it is None where that
+        module is missing, like on Windows and within PyFlux. The memory of the
+        worker processes is not included.
+    '''
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # in bytes on macOS, in kB elsewhere
+    return peak / (1048576.0 if sys.platform == 'darwin' else 1024.0)
+
+def source_size(source):
+    '''
+    Return the size in bytes of a Flux export given by its filename, else 0.
+    '''
+    if hasattr(source, 'read') or not os.path.isfile(source):
+        return 0
+    return os.path.getsize(source)
+
+def advance_ranges(results, ranges, progress):
+    '''
+    Pass through the parsed byte ranges of a file, counting their bytes.
+
+    The function is a generator, which yields the results of the worker
+        processes as they come, and calls `progress` with the size of every
+        range of `split_record_ranges` once it is parsed, but for the range of
+        a file object, whose size is unknown.
+    '''
+    for result, (_, start, end) in zip(results, ranges):
+        if end is not None:
+            progress(end - start)
+        yield result
+
+class ConversionMonitor(object):
+    '''
+    The wall time, the records and the peak memory of the stages of a conversion.
+
+    Every stage runs within `stage`, which records how long it took, how many
+        records it went through, and the peak resident memory of the script at
+        its end, as given by `peak_memory`. The stages which read an export
+        count the bytes they consume with `advance`, which drives the progress
+        indicator. The stages are printed as a table by `report`, and returned
+        as plain data by `statistics`, for instance for a JSON file.
+
+    Attributes
+    ----------
+    stages : list
+        The records of the finished stages, in order, as dictionaries with the
+            keys 'name', 'seconds', 'records', 'bytes' and 'peak_mb'.
+
+    progress : bool
+        If True, the share of the export consumed by the current stage is shown
+            on a single line of `stream`, every `PROGRESS_INTERVAL` seconds.
+
+    stream : file object
+        Where the progress indicator is shown, the standard error by default.
+    '''
+    def __init__(self, progress=False, stream=None):
+        self.stages = []
+        self.progress = progress
+        self.stream = sys.stderr if stream is None else stream
+        self.current = None
+        self.consumed = 0
+        self.shown = 0.0
+        self.width = 0
+
+    @contextmanager
+    def stage(self, name, size=0):
+        '''
+        Time a stage, whose record is yielded for the stage to fill 'records' in.
+
+        Parameters
+        ----------
+        name : string
+            The name of the stage, after the function which does its work.
+
+        size : int
+            The number of bytes the stage is going to read, or 0 if it doesn't
+                read an export.
+        '''
+        record = {'name': name, 'seconds': 0.0, 'records': 0, 'bytes': size, \
+        'peak_mb': None}
+        self.current, self.consumed = record, 0
+        start = time.time()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.time() - start
+            record['peak_mb'] = peak_memory()
+            self.stages.append(record)
+            self.current = None
+            self.show('')
+
+    def advance(self, consumed):
+        '''
+        Count the bytes consumed by the current stage, and show its progress.
+        '''
+        self.consumed += consumed
+        record = self.current
+        if not self.progress or record is None or not record['bytes']:
+            return
+        now = time.time()
+        if now - self.shown >= PROGRESS_INTERVAL:
+            self.shown = now
+            self.show('%s : %5.1f %% of %.1f MB' % (record['name'], \
+            min(100.0, 100.0 * self.consumed / record['bytes']), \
+            record['bytes'] / 1048576.0))
+
+    def show(self, line):
+        '''
+        Write over the progress indicator with a line, which may be empty.
+        '''
+        if not self.progress or (not line and not self.width):
+            return
+        self.stream.write('\r' + line.ljust(self.width) + ('' if line else '\r'))
+        self.stream.flush()
+        self.width = len(line)
+
+    def statistics(self):
+        '''
+        Return the stages as a dictionary of plain data, with their throughput.
+        '''
+        stages = []
+        for record in self.stages:
+            seconds = max(record['seconds'], 1e-9)
+            stages.append(dict(record, records_per_second=record['records'] \
+            / seconds, megabytes_per_second=record['bytes'] / 1048576.0 / seconds))
+        return {'stages': stages, \
+        'seconds': sum(record['seconds'] for record in self.stages), \
+        'peak_mb': peak_memory()}
+
+    def report(self):
+        '''
+        Print the stages as a table, followed by their total.
+        '''
+        if not self.stages:
+            return
+        print('%-32s %10s %12s %12s %10s' % ('Stage', 'seconds', 'records', \
+        'records/s', 'peak MB'))
+        statistics = self.statistics()
+        for record in statistics['stages'] + [dict(name='total', records=0, \
+        records_per_second=0.0, seconds=statistics['seconds'], \
+        peak_mb=statistics['peak_mb'])]:
+            print('%-32s %10.2f %12s %12s %10s' % (record['name'], \
+            record['seconds'], record['records'] or '', \
+            '%.0f' % record['records_per_second'] if record['records'] else '', \
+            '%.1f' % record['peak_mb'] if record['peak_mb'] is not None else ''))
+
+class Mesh(object):
+    '''
+    A Flux mesh held in memory, as returned by `convert`.
+
+    Attributes
+    ----------
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes, 3 per
+            node.
+
+    face_list : array
+        The int32 array containing the nodes of the cells, which are the face
+            elements of a 2D mesh, 3 per face element, and the volume elements
+            of a 3D mesh, 4 per volume element.
+
+    region_list : array
+        The int32 array containing the physical region number of the cells.
+
+    region_registry : OrderedDict
+        The physical region names, mapped to their numbers.
+
+    dim : int
+        The topological dimension of the mesh, 2 or 3.
+
+    facet_keys : list
+        The sorted keys of the unique facets, which are the edges of a 2D mesh,
+            as given by `retrieve_edge_information`, and the triangles of a 3D
+            mesh, as given by `retrieve_triangle_information`, or None if the
+            facets were not asked for.
+
+    facet_region_list : array
+        The int32 array containing the physical line region number of the
+            edges, or the physical face region number of the triangles, or None
+            if the facets were not asked for.
+
+    line_region_registry : OrderedDict
+        The physical line region names, or the physical face region names of a
+            3D mesh, mapped to their numbers, or None if no line export, or face
+            export for a 3D mesh, was given.
+
+    node_map : array
+        The int32 array of the number in `node_list` of every node of the Flux
+            export, -1 for the nodes that no face element refers to, like the
+            orphan nodes of the export, or None if all nodes are kept in their
+            order. The merged nodes get the number of the node
+            they are merged into.
+
+    merged_nodes : int
+        The number of nodes merged into a coincident node, or None if the mesh
+            was not cleaned up with a merge tolerance.
+
+    pruned_nodes : int
+        The number of nodes dropped since no face element refers to them, or
+            None if the mesh was not cleaned up with a merge tolerance.
+
+    bandwidths : tuple
+        The bandwidth of the mesh before and after the nodes were reordered, as
+            given by `reorder_mesh`, or None if they were not reordered.
+
+    reoriented_cells : int
+        The number of clockwise triangles, or of tetrahedra of negative volume,
+            reoriented by `validate_mesh`.
+
+    degenerate_cells : array
+        The int32 array of the numbers of the cells of zero area or volume, in
+            the order of the export, as found by `validate_mesh`.
+
+    quality : OrderedDict
+        The number of cells, the extremes of their quality and its histograms,
+            by physical region name, as given by `validate_mesh`, or None if
+            they were not measured.
+    '''
+    def __init__(self, node_list, face_list, region_list, region_registry, dim=2):
+        self.node_list = node_list
+        self.face_list = face_list
+        self.region_list = region_list
+        self.region_registry = region_registry
+        self.dim = dim
+        self.facet_keys = None
+        self.facet_region_list = None
+        self.line_region_registry = None
+        self.node_map = None
+        self.bandwidths = None
+        self.merged_nodes = None
+        self.pruned_nodes = None
+        self.reoriented_cells = 0
+        self.degenerate_cells = array('i')
+        self.quality = None
+
+    @property
+    def number_of_nodes(self):
+        '''
+        The total number of nodes of the mesh.
+        '''
+        return len(self.node_list) // 3
+
+    @property
+    def number_of_faces(self):
+        '''
+        The total number of cells of the mesh, that is, of face elements in 2D,
+            and of volume elements in 3D.
+        '''
+        return len(self.face_list) // (self.dim + 1)
+
+def convert(node_element_file, face_element_file, face_physical_description, \
+line_element_file=None, line_physical_description=None, facets=False, jobs=1, \
+cache=None, dim=2, reorder=None, merge_tolerance=None, monitor=None, \
+measure_quality=False):
+    '''
+    Convert the Flux exports of a mesh into a `Mesh` held in memory.
+
+    This is the entry point for using the script as a library. It only reads
+        the given exports, and doesn't write any file.
+
+    A Flux3D mesh is converted with `dim` set to 3. Then, the face element
+        arguments are the volume element export and the volume physical
+        description, and the line element arguments are the face element
+        export and the face physical description, since the cells of a 3D mesh
+        are its volume elements, and its facets are triangles.
+
+    Parameters
+    ----------
+    node_element_file : string or file object
+        The name, or the open file object, of the txt file exported from Flux
+            detailing the node information.
+
+    face_element_file : string or file object
+        The name, or the open file object, of the txt file exported from Flux
+            detailing the face information.
+
+    face_physical_description : string or file object
+        The name, or the open file object, of the txt file containing the names
+            of the physical regions of the geometrical faces.
+
+    line_element_file : string or file object
+        The name, or the open file object, of the txt file exported from Flux
+            detailing the line element information. Optional.
+
+    line_physical_description : string or file object
+        The name, or the open file object, of the txt file containing the names
+            of the physical regions of the geometrical lines. Optional.
+
+    facets : bool
+        If True, the edges of the mesh are collected even without a line
+            export, in which case all of them get the physical region number 0.
+
+    jobs : int
+        The number of worker processes for parsing the node and face element
+            exports. With more than one job, both exports are split into byte
+            ranges of whole records by `split_record_ranges`, and all ranges of
+            both files are parsed at the same time in a `multiprocessing` pool,
+            then merged in the order of the files. 0 stands for the number of
+            CPUs. Exports given as file objects are always parsed in this
+            process.
+
+    cache : ConversionCache
+        The cache to load the parsed node and face element exports from, and to
+            store them into after parsing. Exports given as file objects are
+            not cached. If None, the exports are always parsed.
+
+    dim : int
+        The topological dimension of the mesh, 2 for a Flux2D mesh of face
+            elements, and 3 for a Flux3D mesh of volume elements.
+
+    reorder : string
+        The method to renumber the nodes and the cells with for locality, one of
+            `REORDER_METHODS`, as done by `reorder_mesh`. If None, they keep
+            the order of Flux.
+
+    merge_tolerance : float
+        The largest distance between two nodes that are merged, as done by
+            `merge_duplicate_nodes`. If None, the nodes are not merged.
+
+    monitor : ConversionMonitor
+        The monitor to record the stages of the conversion into, and to report
+            the bytes read from the exports to. If None, they are not recorded.
+
+    measure_quality : bool
+        Whether the quality of the cells is measured by `validate_mesh`, even
+            for small meshes.
+
+    Returns
+    -------
+    mesh : Mesh
+        The nodes, face elements and physical regions of the mesh, along with
+            the edges and their physical line regions, if asked for.
+    '''
+    if monitor is None:
+        monitor = ConversionMonitor()
+    # the kind of cells
+    if dim == 3:
+        cell_splits, cell_kind = VOLUME_ELEMENT_SPLITS, 'volumes'
+    else:
+        cell_splits, cell_kind = FACE_ELEMENT_SPLITS, 'faces'
+
+    node_cached = cache is not None and not hasattr(node_element_file, 'read')
+    face_cached = cache is not None and not hasattr(face_element_file, 'read')
+    node_list = cache.load(node_element_file, 'nodes') if node_cached else None
+    face_locs = cache.load(face_element_file, cell_kind) if face_cached else None
+
+    node_records, face_records, pool = None, None, None
+    if jobs != 1 and not hasattr(node_element_file, 'read') \
+    and not hasattr(face_element_file, 'read') \
+    and (node_list is None or face_locs is None):
+        import multiprocessing
+        jobs = jobs or multiprocessing.cpu_count()
+        pool = multiprocessing.Pool(jobs)
+        # queue the ranges of both exports at once, and collect them in order
+        if face_locs is None:
+            face_ranges = split_record_ranges(face_element_file, b'NODES', jobs)
+            face_records = advance_ranges(pool.imap(parse_face_range, \
+            [face_range + (cell_splits,) for face_range in face_ranges]), \
+            face_ranges, monitor.advance)
+        if node_list is None:
+            node_ranges = split_record_ranges(node_element_file, b' coordinates ', \
+            jobs)
+            node_records = advance_ranges(pool.imap(parse_node_range, \
+            node_ranges), node_ranges, monitor.advance)
+
+    try:
+        with monitor.stage('retrieve_node_information', 0 if node_list \
+        is not None else source_size(node_element_file)) as stage:
+            if node_list is None:
+                if node_records is None:
+                    node_records = read_node_records(node_element_file, \
+                    progress=monitor.advance)
+                node_list = retrieve_node_information(node_element_file, \
+                node_records)
+                if node_cached:
+                    cache.store(node_element_file, 'nodes', [node_list])
+            else:
+                node_list, = node_list
+            stage['records'] = len(node_list) // 3
+
+        with monitor.stage('retrieve_face_locations', 0 if face_locs \
+        is not None else source_size(face_element_file)) as stage:
+            if face_locs is None:
+                if face_records is None:
+                    face_records = read_element_records(face_element_file, \
+                    cell_splits, progress=monitor.advance)
+                face_locs = retrieve_face_locations(face_element_file, \
+                face_records, cell_splits)
+                if face_cached:
+                    cache.store(face_element_file, cell_kind, face_locs)
+            face_list, loc_list = face_locs
+            stage['records'] = len(loc_list)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return assemble_mesh(node_list, face_list, loc_list, \
+    face_physical_description, line_element_file, line_physical_description, \
+    facets, dim, reorder=reorder, merge_tolerance=merge_tolerance, \
+    monitor=monitor, measure_quality=measure_quality)
+
+def assemble_mesh(node_list, face_list, loc_list, face_physical_description, \
+line_element_file=None, line_physical_description=None, facets=False, dim=2, \
+line_records=None, reorder=None, merge_tolerance=None, monitor=None, \
+measure_quality=False):
+    '''
+    Assemble a `Mesh` out of the parsed nodes and cells, and the region names.
+
+    This is the part of `convert` that follows the parsing of the node and face
+        element exports, which `extract_flux_mesh` shares. The cells are given
+        their physical regions, and their node numbers are checked, the
+        coincident nodes are merged, the unused nodes are dropped, the cells
+        are validated and oriented by `validate_mesh`, the nodes and the cells
+        are reordered, and the facets are collected and tagged, if asked for.
+
+    Parameters
+    ----------
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
+
+    face_list : array
+        The int32 array containing the nodes of the cells.
+
+    loc_list : array
+        The int32 array containing the geometric entity number of the cells.
+
+    face_physical_description : string, file object or list
+        The physical description of the geometric entities of the cells, as
+            read by `register_physical_regions`.
+
+    line_element_file : string or file object
+        The name, or the open file object, of the element export of the facets,
+            or the name of `line_records`. Optional.
+
+    line_physical_description : string, file object or list
+        The physical description of the geometric entities of the facets, as
+            read by `register_physical_regions`. Optional.
+
+    facets : bool
+        If True, the facets of the mesh are collected even without a line
+            export, in which case all of them get the physical region number 0.
+
+    dim : int
+        The topological dimension of the mesh, 2 or 3.
+
+    line_records : iterable
+        The (nodes, locs) pairs of int32 arrays of the facet elements, to
+            consume instead of reading `line_element_file`.
+
+    reorder : string
+        The method of `reorder_mesh`, one of `REORDER_METHODS`, or None to keep
+            the order of Flux.
+
+    merge_tolerance : float
+        The largest distance between two nodes that are merged by
+            `merge_duplicate_nodes`, after which the nodes that no face element
+            refers to are dropped by `drop_unused_nodes`, or None to keep all
+            nodes apart, and in the mesh.
+
+    monitor : ConversionMonitor
+        The monitor to record the stages into, or None.
+
+    measure_quality : bool
+        Whether the quality of the cells is measured by `validate_mesh`, even
+            for small meshes.
+
+    Returns
+    -------
+    mesh : Mesh
+        The nodes, cells and physical regions of the mesh, along with the
+            facets and their physical regions, if asked for.
+
+    Raises
+    ------
+    ValueError
+        If a cell lies on a geometric entity without physical region, refers to
+            a node out of `node_list`, or if two nodes of the same cell are
+            merged.
+    '''
+    if monitor is None:
+        monitor = ConversionMonitor()
+    facet_splits = FACE_ELEMENT_SPLITS if dim == 3 else LINE_ELEMENT_SPLITS
+    with monitor.stage('assign_physical_regions') as stage:
+        region_list, region_registry = assign_physical_regions(loc_list, \
+        face_physical_description)
+        stage['records'] = len(region_list)
+    with monitor.stage('check_node_numbers') as stage:
+        check_node_numbers(face_list, len(node_list) // 3, dim + 1)
+        stage['records'] = len(region_list)
+
+    # merge the coincident nodes into the first of them
+    merged_nodes = None
+    if merge_tolerance is not None:
+        with monitor.stage('merge_duplicate_nodes') as stage:
+            representative, merged_nodes = merge_duplicate_nodes(node_list, \
+            merge_tolerance)
+            stage['records'] = len(node_list) // 3
+    if merged_nodes:
+        face_list = array('i', map(representative.__getitem__, face_list))
+        width = dim + 1
+        for first in range(0, width):
+            for second in range(first + 1, width):
+                if any(a == b for a, b in zip(face_list[first::width], \
+                face_list[second::width])):
+                    raise ValueError('Merging the nodes within %g of each other \
+collapses cells' % merge_tolerance)
+
+    # leave out the nodes merged away, and the orphan nodes, only when the mesh
+    #   is cleaned up, so that the default conversion keeps every node
+    node_map = None
+    pruned_nodes = None
+    if merge_tolerance is not None:
+        number_of_nodes = len(node_list) // 3
+        with monitor.stage('drop_unused_nodes') as stage:
+            node_list, face_list, node_map = drop_unused_nodes(node_list, \
+            face_list)
+            stage['records'] = number_of_nodes
+        pruned_nodes = number_of_nodes - len(node_list) // 3 - merged_nodes
+    if merged_nodes:
+        # the merged nodes take the new numbers of the nodes they are merged into
+        node_map = array('i', map(node_map.__getitem__, representative))
+
+    with monitor.stage('validate_mesh') as stage:
+        face_list, reoriented_cells, degenerate_cells, quality = \
+        validate_mesh(node_list, face_list, region_list, region_registry, dim, \
+        measure_quality)
+        stage['records'] = len(region_list)
+
+    bandwidths = None
+    if reorder is not None:
+        with monitor.stage('reorder_mesh') as stage:
+            node_list, face_list, region_list, permutation, bandwidths = \
+            reorder_mesh(node_list, face_list, region_list, reorder, dim)
+            stage['records'] = len(region_list)
+        if node_map is None:
+            node_map = permutation
+        else:
+            node_map = array('i', [permutation[node] if node >= 0 else -1 \
+            for node in node_map])
+
+    mesh = Mesh(node_list, face_list, region_list, region_registry, dim)
+    mesh.node_map = node_map
+    mesh.bandwidths = bandwidths
+    mesh.merged_nodes = merged_nodes
+    mesh.pruned_nodes = pruned_nodes
+    mesh.reoriented_cells = reoriented_cells
+    mesh.degenerate_cells = degenerate_cells
+    mesh.quality = quality
+
+    with_lines = line_element_file is not None \
+    and line_physical_description is not None
+    if with_lines or facets:
+        with monitor.stage('retrieve_triangle_information' if dim == 3 \
+        else 'retrieve_edge_information') as stage:
+            if dim == 3:
+                mesh.facet_keys = retrieve_triangle_information(face_list, \
+                mesh.number_of_nodes)
+            else:
+                mesh.facet_keys = retrieve_edge_information(face_list, \
+                mesh.number_of_nodes)
+            stage['records'] = len(mesh.facet_keys)
+    if with_lines:
+        with monitor.stage('retrieve_facet_information', 0 if line_records \
+        is not None else source_size(line_element_file)) as stage:
+            if line_records is None:
+                line_records = read_element_records(line_element_file, \
+                facet_splits, progress=monitor.advance)
+            mesh.facet_region_list, mesh.line_region_registry = \
+            retrieve_facet_information(mesh.facet_keys, mesh.number_of_nodes, \
+            line_element_file, line_physical_description, node_map, \
+            facet_splits, line_records)
+            stage['records'] = len(mesh.facet_keys)
+    elif facets:
+        mesh.facet_region_list = array('i', [0]) * len(mesh.facet_keys)
+
+    return mesh
+
+def write_mesh_files(mesh, outputfiles, output_format='xml', precision=16, \
+chunk_rows=None, skip=(), monitor=None):
+    '''
+    Write a `Mesh` into the mesh, physical region and facet region files.
+
+    Parameters
+    ----------
+    mesh : Mesh
+        The mesh, as returned by `convert`.
+
+    outputfiles : list
+        The names of the mesh file and of the physical region file, optionally
+            followed by the name of the facet region file, which is only
+            written when the facets of `mesh` have been collected.
+
+    output_format : string
+        Either 'xml' for the legacy DOLFIN xml files, or 'xdmf' for XDMF files
+            with HDF5 heavy data.
+
+    precision : int
+        The number of digits after the decimal point of the coordinates in the
+            xml mesh file.
+
+    chunk_rows : int
+        The number of rows per chunk of the HDF5 datasets. If None, the
+            datasets are stored contiguously.
+
+    skip : collection
+        The names of the output files to leave as they are, for instance
+            because the cache tells that they are up to date.
+
+    monitor : ConversionMonitor
+        The monitor to record the writing of every file into, or None.
+    '''
+    if monitor is None:
+        monitor = ConversionMonitor()
+    dim = mesh.dim
+    xdmf = output_format == 'xdmf'
+    if outputfiles[0] not in skip:
+        with monitor.stage('write_xdmf_mesh' if xdmf else 'write_mesh') as stage:
+            if xdmf:
+                write_xdmf_mesh(outputfiles[0], mesh.node_list, mesh.face_list, \
+                chunk_rows, dim)
+            else:
+                write_mesh(outputfiles[0], mesh.node_list, mesh.face_list, \
+                precision, dim)
+            stage['records'] = mesh.number_of_faces
+
+    if outputfiles[1] not in skip:
+        with monitor.stage('write_xdmf_physical_region' if xdmf \
+        else 'write_physical_region') as stage:
+            if xdmf:
+                write_xdmf_physical_region(outputfiles[1], outputfiles[0], \
+                mesh.node_list, mesh.face_list, mesh.region_list, chunk_rows, dim)
+            else:
+                write_physical_region(outputfiles[1], mesh.region_list, dim)
+            stage['records'] = mesh.number_of_faces
+
+    if len(outputfiles) > 2 and mesh.facet_keys is not None \
+    and outputfiles[2] not in skip:
+        # the facet region file is asked for
+        with monitor.stage('write_xdmf_facet_region' if xdmf \
+        else 'write_facet_region') as stage:
+            if xdmf:
+                write_xdmf_facet_region(outputfiles[2], outputfiles[0], \
+                mesh.node_list, mesh.facet_keys, mesh.facet_region_list, \
+                chunk_rows, dim)
+            else:
+                write_physical_region(outputfiles[2], mesh.facet_region_list, \
+                dim - 1)
+            stage['records'] = len(mesh.facet_keys)
+
+def partition_mesh(mesh, parts, method='rcb'):
+    '''
+    Partition the cells of a `Mesh`, for running FEniCS on as many MPI ranks.
+
+    Parameters
+    ----------
+    mesh : Mesh
+        The mesh, as returned by `convert`.
+
+    parts : int
+        The number of partitions.
+
+    method : string
+        One of `PARTITION_METHODS`, 'rcb' for `partition_cells_rcb`, or
+            'metis' for `partition_cells_metis`.
+
+    Returns
+    -------
+    membership : array
+        The int32 array of the partition of every cell.
+
+    Raises
+    ------
+    ValueError
+        If there are more partitions than cells.
+    '''
+    width = mesh.dim + 1
+    if parts > mesh.number_of_faces:
+        raise ValueError('%d partitions asked for a mesh of %d cells' \
+        % (parts, mesh.number_of_faces))
+    if method == 'metis':
+        return partition_cells_metis(mesh.face_list, width, mesh.number_of_nodes, \
+        parts)
+    return partition_cells_rcb(mesh.node_list, mesh.face_list, width, parts)
+
+def split_partitions(mesh, membership, parts):
+    '''
+    Split a `Mesh` into the meshes of its partitions.
+
+    The function is a generator. The cells of every partition keep their
+        order, and so do their nodes, which are numbered from 0 in every
+        partition. The facets of a partition are the facets of its cells, and
+        since the nodes keep their order, they are numbered by DOLFIN in the
+        same order as in the whole mesh. A node on the boundary of several
+        partitions belongs to all of them, and is owned by the lowest of them.
+        The whole mesh is walked once for all partitions.
+
+    Parameters
+    ----------
+    mesh : Mesh
+        The mesh, as returned by `convert`.
+
+    membership : array
+        The int32 array of the partition of every cell, as given by
+            `partition_mesh`.
+
+    parts : int
+        The number of partitions.
+
+    Yields
+    ------
+    submesh : Mesh
+        The mesh of a partition, with the region registries of the whole mesh.
+
+    global_nodes : array
+        The int32 array of the number in the whole mesh of every node of the
+            partition.
+
+    owners : array
+        The int32 array of the partition that owns every node of the partition.
+            The nodes owned by another partition are shared with it.
+
+    global_cells : array
+        The int32 array of the number in the whole mesh of every cell of the
+            partition.
+    '''
+    width = mesh.dim + 1
+    columns = [mesh.face_list[k::width] for k in range(0, width)]
+    node_columns = [mesh.node_list[k::3] for k in range(0, 3)]
+
+    # the lowest partition of the cells of every node
+    owners = array('i', [parts]) * mesh.number_of_nodes
+    for column in columns:
+        for node, partition in zip(column, membership):
+            if partition < owners[node]:
+                owners[node] = partition
+
+    # the cells of every partition, in their order
+    cells_of = [array('i') for partition in range(0, parts)]
+    for cell, partition in enumerate(membership):
+        cells_of[partition].append(cell)
+
+    for cells in cells_of:
+        submesh, global_nodes = extract_submesh(mesh, cells, columns, node_columns)
+        yield submesh, global_nodes, \
+        array('i', map(owners.__getitem__, global_nodes)), cells
+
+def extract_submesh(mesh, cells, columns, node_columns):
+    '''
+    Extract the mesh of some of the cells of a `Mesh`.
+
+    The cells keep their order, and so do their nodes, which are numbered from
+        0 through a renumbering map of the nodes of the cells only, so that
+        extracting many small submeshes doesn't go over all the nodes of the
+        whole mesh for each of them. The facets
+        of the submesh are the facets of its cells, whose physical regions are
+        looked up in the whole mesh.
+
+    Parameters
+    ----------
+    mesh : Mesh
+        The whole mesh.
+
+    cells : array
+        The int32 array of the numbers of the cells to extract, in increasing
+            order.
+
+    columns : list
+        The node columns of the cells of the whole mesh, `mesh.face_list[k::width]`
+            for every node k of a cell, which are sliced once by the caller.
+
+    node_columns : list
+        The coordinate columns of the whole mesh, `mesh.node_list[k::3]`.
+
+    Returns
+    -------
+    submesh : Mesh
+        The mesh of the cells, with the region registries of the whole mesh.
+
+    global_nodes : array
+        The int32 array of the number in the whole mesh of every node of the
+            submesh.
+    '''
+    width = mesh.dim + 1
+    faces = array('i', [0]) * (width * len(cells))
+    for k in range(0, width):
+        faces[k::width] = array('i', map(columns[k].__getitem__, cells))
+    global_nodes = array('i', sorted(set(faces)))
+    local_of = dict((node, local) for local, node in enumerate(global_nodes))
+    node_list = array('d', [0.0]) * (3 * len(global_nodes))
+    for k in range(0, 3):
+        node_list[k::3] = array('d', map(node_columns[k].__getitem__, \
+        global_nodes))
+
+    submesh = Mesh(node_list, array('i', map(local_of.__getitem__, faces)), \
+    array('i', map(mesh.region_list.__getitem__, cells)), \
+    mesh.region_registry, mesh.dim)
+    submesh.line_region_registry = mesh.line_region_registry
+
+    if mesh.facet_keys is not None:
+        # the facets of the submesh, looked up in the whole mesh
+        if mesh.dim == 3:
+            submesh.facet_keys = retrieve_triangle_information( \
+            submesh.face_list, submesh.number_of_nodes)
+        else:
+            submesh.facet_keys = retrieve_edge_information( \
+            submesh.face_list, submesh.number_of_nodes)
+        facets = array('i', map(global_nodes.__getitem__, \
+        decode_facet_keys(submesh.facet_keys, submesh.number_of_nodes, \
+        mesh.dim)))
+        keys = compute_facet_keys([facets[k::mesh.dim] \
+        for k in range(0, mesh.dim)], mesh.number_of_nodes)
+        submesh.facet_region_list = array('i', [mesh.facet_region_list[ \
+        bisect_left(mesh.facet_keys, key)] for key in keys])
+
+    return submesh, global_nodes
+
+def select_regions(mesh, names):
+    '''
+    Extract the mesh of the cells of some physical regions of a `Mesh`.
+
+    The cells are selected by their physical region numbers, as given by
+        `retrieve_face_information`, and extracted by `extract_submesh`, so that
+        only the nodes they refer to are kept. The region numbers of the
+        submesh are those of the whole mesh.
+
+    Parameters
+    ----------
+    mesh : Mesh
+        The mesh, as returned by `convert`.
+
+    names : list
+        The names of the physical regions to select.
+
+    Returns
+    -------
+    submesh : Mesh
+        The mesh of the cells of the regions.
+
+    global_nodes : array
+        The int32 array of the number in the whole mesh of every node of the
+            submesh.
+
+    global_cells : array
+        The int32 array of the number in the whole mesh of every cell of the
+            submesh.
+
+    Raises
+    ------
+    ValueError
+        If a name is not one of the physical regions of the mesh.
+    '''
+    unknown = [name for name in names if name not in mesh.region_registry]
+    if unknown:
+        raise ValueError('No physical region named %s, the regions being %s' \
+        % (', '.join(unknown), ', '.join(mesh.region_registry)))
+    selected = set(mesh.region_registry[name] for name in names)
+    cells = array('i', compress(range(0, mesh.number_of_faces), \
+    map(selected.__contains__, mesh.region_list)))
+
+    width = mesh.dim + 1
+    submesh, global_nodes = extract_submesh(mesh, cells, \
+    [mesh.face_list[k::width] for k in range(0, width)], \
+    [mesh.node_list[k::3] for k in range(0, 3)])
+
+    return submesh, global_nodes, cells
+
+def partition_filename(outputfile, partition, suffix='', extension=None):
+    '''
+    Return the name of an output file of a partition.
+
+    The number of the partition, and the suffix, are put before the extension,
+        which is kept whole for compressed files, so that "mesh.xml.gz" gives
+        "mesh_3.xml.gz" for the partition 3. A partition of None only puts the
+        suffix, so that "mesh.xml" gives "mesh_global_nodes.xml" for the suffix
+        "_global_nodes" and the extension ".xml".
+    '''
+    base, compression = outputfile, ''
+    if base.endswith('.gz'):
+        base, compression = base[:-3], '.gz'
+    base, kept = os.path.splitext(base)
+    if extension is None:
+        extension = kept + compression
+    if partition is not None:
+        base = '%s_%d' % (base, partition)
+    return base + suffix + extension
+
+def write_partition_files(mesh, membership, parts, outputfiles, \
+output_format='xml', precision=16, chunk_rows=None):
+    '''
+    Write the meshes of the partitions of a `Mesh`, each into its own files.
+
+    Every partition, as given by `split_partitions`, is written by
+        `write_mesh_files` into the output files named by `partition_filename`,
+        so that every MPI rank only reads its own partition. Three mesh
+        functions are written along, as xml files whatever the output format:
+        the number in the whole mesh of every node, "mesh_3_global_nodes.xml",
+        the partition that owns every node, "mesh_3_node_owners.xml", whose
+        nodes owned by other partitions are the shared ones, and the number in
+        the whole mesh of every cell, "mesh_3_global_cells.xml".
+
+    Parameters
+    ----------
+    mesh : Mesh
+        The mesh, as returned by `convert`.
+
+    membership : array
+        The int32 array of the partition of every cell, as given by
+            `partition_mesh`.
+
+    parts : int
+        The number of partitions.
+
+    outputfiles : list
+        The names of the mesh file, of the physical region file, and optionally
+            of the facet region file of the whole mesh.
+
+    output_format : string
+        Either 'xml' or 'xdmf', as for `write_mesh_files`.
+
+    precision : int
+        The number of digits after the decimal point of the coordinates in the
+            xml mesh files.
+
+    chunk_rows : int
+        The number of rows per chunk of the HDF5 datasets, or None.
+
+    Returns
+    -------
+    ghost_nodes : int
+        The total number of nodes written into partitions which don't own them,
+            that is, of the copies of the shared nodes.
+    '''
+    ghost_nodes = 0
+    for partition, (submesh, global_nodes, owners, global_cells) in \
+    enumerate(split_partitions(mesh, membership, parts)):
+        write_mesh_files(submesh, [partition_filename(outputfile, partition) \
+        for outputfile in outputfiles], output_format, precision, chunk_rows)
+        write_physical_region(partition_filename(outputfiles[0], partition, \
+        '_global_nodes', '.xml'), global_nodes, 0)
+        write_physical_region(partition_filename(outputfiles[0], partition, \
+        '_node_owners', '.xml'), owners, 0)
+        write_physical_region(partition_filename(outputfiles[0], partition, \
+        '_global_cells', '.xml'), global_cells, mesh.dim)
+        ghost_nodes += len(owners) - owners.count(partition)
+
+    return ghost_nodes
+
+def flux_region_names(entities):
+    '''
+    Gather the physical region names of all geometric entities of Flux at once.
+
+    All the entities are fetched with a single `entities[ALL]` query, instead of
+        being probed one by one up to the first number that doesn't exist. Every
+        name is put at the place of the number of its entity, so that the gaps
+        left in the numbering by deleted entities don't shift the names. The
+        name is left empty for the entities which are not assigned to any
+        region, and for the numbers without entity. Only runs within Flux.
+
+    Parameters
+    ----------
+    entities : PyFlux collection
+        The geometric entities, `Face`, `Line` or `Volume`.
+
+    Returns
+    -------
+    names : list
+        The physical region names of the entities, the one of entity number n
+            at `names[n-1]`, as read by `register_physical_regions`.
+    '''
+    names = []
+    for entity in entities[ALL]:
+        try:
+            name = entity.region.name
+        except:
+            name = ''
+        number = flux_number(entity)
+        if number > len(names):
+            names.extend([''] * (number - len(names)))
+        names[number - 1] = name
+    return names
+
+def describe_regions(entities, label, description_file):
+    '''
+    Write the physical region names of the geometric entities of Flux into a file.
+
+    Every entity gets a line "Face 1 is : NAME", with its label and number,
+        which `register_physical_regions` reads back. The names are gathered
+        by `flux_region_names`, by number, and the numbers without entity get
+        an empty name, so that every line stays at the place of its number.
+        Only runs within Flux.
+
+    Parameters
+    ----------
+    entities : PyFlux collection
+        The geometric entities, `Face`, `Line` or `Volume`.
+
+    label : string
+        The label of the lines, "Face", "Line" or "Volume".
+
+    description_file : string
+        The name of the txt file to create.
+    '''
+    with open(description_file, 'w') as description:
+        for number, name in enumerate(flux_region_names(entities), 1):
+            description.write('%s %d is : ' % (label, number))
+            description.write(name)
+            description.write('\n')
+
+def flux_number(entity):
+    '''
+    Return the number of a numbered PyFlux entity, like a Node or a Face.
+
+    Entities listing a single entity, like the LOC of a mesh element, are
+        taken for the entity they list. Plain numbers are returned as they
+        are.
+    '''
+    if isinstance(entity, (list, tuple)):
+        entity, = entity
+    try:
+        return int(entity)
+    except TypeError:
+        return int(entity.name)
+
+def read_flux_nodes():
+    '''
+    Read the xyz-coordinates of all the nodes of the mesh open in Flux.
+
+    The nodes are fetched with a single `Node[ALL]` query, in the order of their
+        numbers, and their coordinates are stored as `retrieve_node_information`
+        stores the ones of the node export. Only runs within Flux.
+
+    Returns
+    -------
+    node_list : array
+        The float64 array containing the xyz-coordinates of the nodes.
+
+    Raises
+    ------
+    ValueError
+        If a node doesn't have three coordinates.
+    '''
+    node_list = array('d') # initilize as an empty float64 array
+    number_of_nodes = 0
+    for node in Node[ALL]:
+        node_list.extend(map(float, node.coordinates))
+        number_of_nodes += 1
+    if len(node_list) != 3 * number_of_nodes:
+        raise ValueError('Node[ALL]: %d coordinates found for %d nodes' \
+        % (len(node_list), number_of_nodes))
+
+    return node_list
+
+def read_flux_elements(elements, splits, name):
+    '''
+    Read the node numbers and the LOC of all the mesh elements open in Flux.
+
+    This is `read_element_records` for the mesh elements of PyFlux, which are
+        fetched with a single `elements[ALL]` query, instead of being exported
+        into a text file and parsed back. The function is a generator, and
+        only runs within Flux.
+
+    Parameters
+    ----------
+    elements : PyFlux collection
+        The mesh elements, `FaceElement`, `LineElement` or `VolumeElement`.
+
+    splits : dict
+        The kinds of the elements, as in `FACE_ELEMENT_SPLITS`.
+
+    name : string
+        The name of the elements, for error messages.
+
+    Yields
+    ------
+    nodes : array
+        An int32 array of the node numbers of the simplices, shifted to the
+            zero-index ordering of `node_list`.
+
+    locs : array
+        An int32 array of the geometric entity numbers of the simplices.
+    '''
+    nodes, locs, counts = array('i'), array('i'), []
+    for element in elements[ALL]:
+        element_nodes = element.nodes
+        nodes.extend([flux_number(node) - 1 for node in element_nodes])
+        locs.append(flux_number(element.loc))
+        counts.append(len(element_nodes))
+
+    for simplices in split_element_runs(nodes, locs, counts, splits, name):
+        yield simplices
+
+def extract_flux_mesh(dim=2, reorder=None, merge_tolerance=None, monitor=None):
+    '''
+    Read the mesh open in Flux straight into a `Mesh`, without any txt export.
+
+    The nodes, the cells and the facet elements are read from PyFlux by
+        `read_flux_nodes` and `read_flux_elements`, and the names of the
+        physical regions by `flux_region_names`, with one query each. They
+        then go through `assemble_mesh`, like the parsed exports do in
+        `convert`. Only runs within Flux.
+
+    Parameters
+    ----------
+    dim : int
+        The topological dimension of the mesh, 2 for Flux2D, where the cells
+            are the face elements and the facets the line elements, and 3 for
+            Flux3D, where the cells are the volume elements and the facets the
+            face elements.
+
+    reorder : string
+        The method of `reorder_mesh`, one of `REORDER_METHODS`, or None.
+
+    merge_tolerance : float
+        The distance of `merge_duplicate_nodes`, or None.
+
+    monitor : ConversionMonitor
+        The monitor to record the stages into, or None.
+
+    Returns
+    -------
+    mesh : Mesh
+        The nodes, cells and physical regions of the mesh, along with the
+            facets and their physical regions.
+    '''
+    if dim == 3:
+        cells, cell_regions, cell_splits, cell_name = VolumeElement, Volume, \
+        VOLUME_ELEMENT_SPLITS, 'VolumeElement[ALL]'
+        facets, facet_regions, facet_splits, facet_name = FaceElement, Face, \
+        FACE_ELEMENT_SPLITS, 'FaceElement[ALL]'
+    else:
+        cells, cell_regions, cell_splits, cell_name = FaceElement, Face, \
+        FACE_ELEMENT_SPLITS, 'FaceElement[ALL]'
+        facets, facet_regions, facet_splits, facet_name = LineElement, Line, \
+        LINE_ELEMENT_SPLITS, 'LineElement[ALL]'
+
+    if monitor is None:
+        monitor = ConversionMonitor()
+    with monitor.stage('read_flux_nodes') as stage:
+        node_list = read_flux_nodes()
+        stage['records'] = len(node_list) // 3
+    with monitor.stage('read_flux_elements') as stage:
+        face_list, loc_list = retrieve_face_locations(cell_name, \
+        read_flux_elements(cells, cell_splits, cell_name), cell_splits)
+        stage['records'] = len(loc_list)
+
+    return assemble_mesh(node_list, face_list, loc_list, \
+    flux_region_names(cell_regions), facet_name, flux_region_names(facet_regions), \
+    True, dim, read_flux_elements(facets, facet_splits, facet_name), reorder, \
+    merge_tolerance, monitor)
+
+def flux_dimension():
+    '''
+    Tell Flux3D from Flux2D by the volume elements being there.
+    '''
+    try:
+        VolumeElement[ALL]
+        return 3
+    except:
+        return 2
+
+def flux_commands():
+    '''
+    Commands that are executed when the script is executed within Flux.
+
+    Following commands specify the .txt and .xml filenames for the script, for
+        future use by other function within the script. Further, the commands
+        below export all node and face element information into a txt file in the
+        working directory. Lastly, it compiles the names of different physical
+        faces in the given Flux geometry. The line elements and the names of the
+        physical lines are exported in the same way, for tagging the edges of
+        the mesh in the facet region file.
+
+    Within Flux3D, which is told by the volume elements being there, the volume
+        elements and the names of the physical volumes are exported instead of
+        the face elements and the physical faces, and the face elements and
+        the names of the physical faces instead of the line elements and the
+        physical lines, for tagging the triangles of the mesh.
+
+    Returns
+    -------
+    inputfile : list
+        A list of strings which contains only the filenames that the script
+            will use to read informaion from.
+
+    outputfile : list
+        A list of strings which contains only the filenames that the script
+            will use to write information into.
+
+    options : dict
+        The default options, with the key `dim` set to 3 within Flux3D.
+
+    Creates
+    -------
+    node_element_file : .txt file
+        A txt file exported from Flux containing the various information about
+            the nodes in a given Flux geometry.
+
+    face_element_file : .txt file
+        A txt file exported from Flux containing the various information about
+            the faces in a given Flux geometry.
+
+    face_physical_description : .txt file
+        A txt file containing the names of the various physical regions in a
+            given Flux geometry.
+
+    line_element_file : .txt file
+        A txt file exported from Flux containing the various information about
+            the line elements in a given Flux geometry.
+
+    line_physical_description : .txt file
+        A txt file containing the names of the physical line regions of the
+            geometric lines in a given Flux geometry.
+
+    volume_element_file : .txt file
+        A txt file exported from Flux3D containing the various information
+            about the volume elements in a given Flux geometry.
+
+    volume_physical_description : .txt file
+        A txt file containing the names of the physical volume regions of the
+            geometric volumes in a given Flux3D geometry.
+    '''
+    options = dict(DEFAULT_OPTIONS)
+    options['dim'] = flux_dimension()
+
+    # define filenames
+    mesh_output, physical_region, facet_region = OUTPUT_FILENAMES
+    if options['dim'] == 3:
+        node_element_file, volume_element_file, volume_physical_description, \
+        face_element_file, face_physical_description = VOLUME_EXPORT_FILENAMES
+
+        # Flux commands to export node, volume and face information into txt files
+        Node[ALL].exportTXT(txtFile=node_element_file, mode='replace')
+        VolumeElement[ALL].exportTXT(txtFile=volume_element_file, mode='replace')
+        FaceElement[ALL].exportTXT(txtFile=face_element_file, mode='replace')
+
+        # create text files describing the physical region names and the
+        #   corresponding geometric volume and face entities
+        describe_regions(Volume, 'Volume', volume_physical_description)
+        describe_regions(Face, 'Face', face_physical_description)
+
+        inputfile = [node_element_file, volume_element_file, \
+        volume_physical_description, face_element_file, face_physical_description]
+        outputfile = [mesh_output, physical_region, facet_region]
+
+        return inputfile, outputfile, options
+
+    node_element_file, face_element_file, face_physical_description, \
+    line_element_file, line_physical_description = EXPORT_FILENAMES
+
+    # Flux commands to export node, face and line information into txt files
+    Node[ALL].exportTXT(txtFile=node_element_file, mode='replace')
+    FaceElement[ALL].exportTXT(txtFile=face_element_file, mode='replace')
+    LineElement[ALL].exportTXT(txtFile=line_element_file, mode='replace')
+
+    # create text files describing the physical region names and the
+    #   corresponding geometric face and line entities, leaving the name empty
+    #   for the entities which are not assigned to any region
+    describe_regions(Face, 'Face', face_physical_description)
+    describe_regions(Line, 'Line', line_physical_description)
+
+    inputfile = [node_element_file, face_element_file, face_physical_description, \
+    line_element_file, line_physical_description]
+    outputfile = [mesh_output, physical_region, facet_region]
+
+    return inputfile, outputfile, options
+
+def convert_files(inputfiles, outputfiles, options, directory='', monitor=None):
+    '''
+    Convert the Flux exports named by the script call into the output files.
+
+    This is a thin layer over `convert` and `write_mesh_files`, which also
+        writes the intermediate files asked for by the `-k` flag, and the
+        region number references, into the given directory, and keeps the
+        conversion cache asked for by the `--cache-dir` flag. With the
+        `--partitions` flag, the partitions of the mesh are written by
+        `write_partition_files` instead of the whole mesh.
+
+    Parameters
+    ----------
+    inputfiles : list
+        The names of the node, face element and face physical description
+            exports, optionally followed by the names of the line element and
+            line physical description exports. For a 3D mesh, the names of the
+            node, volume element and volume physical description exports,
+            optionally followed by the names of the face element and face
+            physical description exports.
+
+    outputfiles : list
+        The names of the mesh and physical region files, optionally followed by
+            the name of the facet region file.
+
+    options : dict
+        The options of the script call, as in `DEFAULT_OPTIONS`.
+
+    directory : string
+        The directory to write the intermediate files and the region number
+            references into. The working directory by default.
+
+    monitor : ConversionMonitor
+        The monitor to record the stages of the conversion into, as printed by
+            `main`. If None, they are not recorded.
+
+    Returns
+    -------
+    mesh : Mesh
+        The converted mesh.
+    '''
+    if monitor is None:
+        monitor = ConversionMonitor()
+    if options['keep_intermediates']:
+        # write the intermediate txt files for debugging
+        with monitor.stage('scrub_node_element_file'):
+            scrub_node_element_file(inputfiles, directory)
+        with monitor.stage('scrub_face_element_file'):
+            scrub_face_element_file(inputfiles, directory)
+
+    cache, recipes, skip = None, {}, []
+    if options['cache_dir'] is not None:
+        cache = ConversionCache(options['cache_dir'], options['cache_size'])
+        # the exports and the settings that each output file depends on
+        settings = (options['format'], options['precision'], options['chunk_rows'], \
+        options['dim'], options['reorder'], options['partitions'], \
+        options['partitioner'], options['merge_tolerance'], options['regions'])
+        # the selection of regions goes by the physical description, and the
+        #   reordering and the merge of the nodes by the coordinates
+        mesh_sources = inputfiles[:2]
+        region_sources = inputfiles[1:3]
+        if options['regions'] is not None:
+            mesh_sources = inputfiles[:3]
+        if options['reorder'] is not None \
+        or options['merge_tolerance'] is not None:
+            region_sources = inputfiles[:3]
+        recipes[outputfiles[0]] = cache.recipe(mesh_sources, settings)
+        if len(outputfiles) > 1:
+            recipes[outputfiles[1]] = cache.recipe(region_sources, \
+            settings + (outputfiles[0],))
+        if len(outputfiles) > 2:
+            recipes[outputfiles[2]] = cache.recipe(mesh_sources + inputfiles[3:5], \
+            settings + (outputfiles[0],))
+        skip = [outputfile for outputfile in outputfiles \
+if cache.is_current(outputfile, recipes[outputfile])]
+        if skip:
+            print('Unchanged output files are : ', skip)
+
+    mesh = convert(*inputfiles[:5], facets=len(outputfiles) > 2, \
+jobs=options['jobs'], cache=cache, dim=options['dim'], reorder=options['reorder'], \
+merge_tolerance=options['merge_tolerance'], monitor=monitor, \
+measure_quality=options['quality'])
+    report_mesh_cleanup(mesh, options['strict'])
+    if options['quality']:
+        report_mesh_quality(mesh)
+
+    write_number_references(mesh, directory)
+    if options['regions'] is not None:
+        # write the mesh of the selected regions, instead of the whole mesh
+        mesh = write_region_selection(mesh, options['regions'], outputfiles[0], \
+        monitor)
+    if options['partitions'] is not None:
+        # write every partition into its own files, instead of the whole mesh
+        with monitor.stage('partition_mesh') as stage:
+            membership = partition_mesh(mesh, options['partitions'], \
+            options['partitioner'])
+            stage['records'] = mesh.number_of_faces
+        with monitor.stage('write_partition_files') as stage:
+            ghost_nodes = write_partition_files(mesh, membership, \
+            options['partitions'], outputfiles, options['format'], \
+            options['precision'], options['chunk_rows'])
+            stage['records'] = mesh.number_of_faces
+        print('Copies of the nodes shared by the partitions : ', ghost_nodes)
+        return mesh
+
+    write_mesh_files(mesh, outputfiles, options['format'], options['precision'], \
+options['chunk_rows'], skip, monitor)
+
+    if cache is not None:
+        for outputfile in outputfiles:
+            if outputfile not in skip and os.path.isfile(outputfile):
+                cache.record(outputfile, recipes[outputfile])
+
+    return mesh
+
+def write_region_selection(mesh, names, outputfile, monitor=None):
+    '''
+    Select some physical regions of a mesh, to write them instead of the mesh.
+
+    The mesh of the regions is extracted by `select_regions`. The number in the
+        whole mesh of every node and of every cell of it is written next to
+        the mesh file, as mesh functions in xml files whatever the format, for
+        instance "mesh_global_nodes.xml" and "mesh_global_cells.xml" for
+        "mesh.xml", so that the results on the regions can be transferred to
+        the whole mesh, as converted without the selection.
+
+    Parameters
+    ----------
+    mesh : Mesh
+        The mesh, as returned by `convert`.
+
+    names : list
+        The names of the physical regions to select.
+
+    outputfile : string
+        The name of the mesh file.
+
+    monitor : ConversionMonitor
+        The monitor to record the selection into, or None.
+
+    Returns
+    -------
+    submesh : Mesh
+        The mesh of the regions.
+    '''
+    if monitor is None:
+        monitor = ConversionMonitor()
+    with monitor.stage('select_regions') as stage:
+        submesh, global_nodes, global_cells = select_regions(mesh, names)
+        stage['records'] = submesh.number_of_faces
+    write_physical_region(partition_filename(outputfile, None, '_global_nodes', \
+    '.xml'), global_nodes, 0)
+    write_physical_region(partition_filename(outputfile, None, '_global_cells', \
+    '.xml'), global_cells, mesh.dim)
+    print('Selected cells and nodes are : ', (submesh.number_of_faces, \
+submesh.number_of_nodes))
+
+    return submesh
+
+def report_mesh_cleanup(mesh, strict=False):
+    '''
+    Print the numbers of merged and pruned nodes, and the bandwidths of a mesh.
+
+    Only what has been changed or found in the mesh, as recorded by
+        `assemble_mesh`, is printed, but for the numbers of merged and pruned
+        nodes, which are printed whenever the mesh was cleaned up, even if
+        none. The degenerate cells are printed along
+        with the numbers of the first of them, or raise an error if `strict`.
+
+    Raises
+    ------
+    ValueError
+        If a cell is degenerate, and `strict` is True.
+    '''
+    if mesh.degenerate_cells:
+        numbers = [cell + 1 for cell in mesh.degenerate_cells[:10]]
+        if strict:
+            raise ValueError('Degenerate elements, of zero area or volume : %s' \
+            % ', '.join('%d' % number for number in numbers))
+        print('Degenerate cells, and the first of them, are : ', \
+(len(mesh.degenerate_cells), numbers))
+    if mesh.merged_nodes is not None:
+        print('Merged and pruned nodes are : ', (mesh.merged_nodes, \
+mesh.pruned_nodes))
+    if mesh.reoriented_cells:
+        print('Reoriented cells are : ', mesh.reoriented_cells)
+    if mesh.bandwidths is not None:
+        print('Bandwidth before and after reordering : ', mesh.bandwidths)
+
+def report_mesh_quality(mesh):
+    '''
+    Print the quality of the cells of every physical region of a mesh.
+
+    Every region is printed with its number of cells, its smallest angle and
+        largest aspect ratio, and the counts of its cells in the bins of
+        `ANGLE_BINS` and `ASPECT_BINS`, as measured by `validate_mesh`.
+    '''
+    if mesh.quality is None:
+        print('The quality of the mesh is only measured with numpy installed.')
+        return
+    print('Smallest angle bins, in degrees : ', ANGLE_BINS)
+    print('Aspect ratio bins : ', ASPECT_BINS)
+    for name, quality in mesh.quality.items():
+        print('%s : %d cells, angles from %.2f, aspect ratios up to %.2f, \
+angles %s, aspect ratios %s' % (name, quality['cells'], quality['min_angle'], \
+quality['max_aspect'], quality['angle_histogram'], quality['aspect_histogram']))
+
+def profile_conversion(inputfiles, outputfiles, options, monitor):
+    '''
+    Convert the Flux exports with `convert_files`, under the `cProfile` profiler.
+
+    The statistics are written into the JSON file given for the `--profile`
+        flag: the stages recorded by the monitor, as given by
+        `ConversionMonitor.statistics`, and the `PROFILE_FUNCTIONS` functions
+        that took the most cumulative time. The raw `cProfile` statistics are
+        written along, into the same name with the `.prof` extension, for
+        `pstats` or any of its viewers. The worker processes of the `-j` flag
+        are not profiled.
+
+    Returns
+    -------
+    mesh : Mesh
+        The converted mesh.
+    '''
+    import cProfile, pstats, json
+
+    profiler = cProfile.Profile()
+    mesh = profiler.runcall(convert_files, inputfiles, outputfiles, options, \
+    monitor=monitor)
+    profiler.dump_stats(os.path.splitext(options['profile'])[0] + '.prof')
+
+    functions = []
+    for (filename, line, name), (primitive_calls, calls, own_time, \
+    cumulative_time, _) in pstats.Stats(profiler).stats.items():
+        functions.append({'function': name, 'file': filename, 'line': line, \
+        'calls': calls, 'primitive_calls': primitive_calls, \
+        'seconds': own_time, 'cumulative_seconds': cumulative_time})
+    functions.sort(key=lambda function: -function['cumulative_seconds'])
+    statistics = monitor.statistics()
+    statistics['functions'] = functions[:PROFILE_FUNCTIONS]
+    with open(options['profile'], 'w') as profile:
+        json.dump(statistics, profile, indent=2, sort_keys=True)
+    print('Profile statistics are written into : ', options['profile'])
+
+    return mesh
+
+def write_number_references(mesh, directory=''):
+    '''
+    Write the region number references of the cells and of the facets of a mesh.
+
+    The names of the files are given by `REFERENCE_FILENAMES`. The reference of
+        the facets is only written when the facets have been tagged from a
+        line export, or a face export for a 3D mesh.
+
+    Parameters
+    ----------
+    mesh : Mesh
+        The mesh, as returned by `convert`.
+
+    directory : string
+        The directory to write the references into. The working directory by
+            default.
+    '''
+    cell_reference, facet_reference = REFERENCE_FILENAMES[mesh.dim]
+    write_number_reference(os.path.join(directory, cell_reference), \
+    mesh.region_registry)
+    if mesh.line_region_registry is not None:
+        write_number_reference(os.path.join(directory, facet_reference), \
+        mesh.line_region_registry)
+
+def flux_conversion(monitor=None):
+    '''
+    Convert the mesh open in Flux into the output files in the working directory.
+
+    The mesh is read straight from PyFlux by `extract_flux_mesh`, and written
+        into the files of `OUTPUT_FILENAMES`, along with the region number
+        references. If that fails, or if the `flux_export` option is set, the
+        mesh is exported into txt files by `flux_commands` instead, and
+        converted from them by `convert_files`, as with any other export.
+
+    Parameters
+    ----------
+    monitor : ConversionMonitor
+        The monitor to record the stages of the conversion into, or None.
+
+    Returns
+    -------
+    mesh : Mesh
+        The converted mesh.
+    '''
+    options = dict(DEFAULT_OPTIONS)
+    if not options['flux_export']:
+        try:
+            mesh = extract_flux_mesh(flux_dimension(), options['reorder'], \
+            options['merge_tolerance'], monitor)
+        except:
+            print('Reading the mesh from PyFlux failed, exporting it instead : ', \
+sys.exc_info()[1])
+        else:
+            report_mesh_cleanup(mesh, options['strict'])
+            write_number_references(mesh)
+            if options['regions'] is not None:
+                mesh = write_region_selection(mesh, options['regions'], \
+                OUTPUT_FILENAMES[0], monitor)
+            write_mesh_files(mesh, OUTPUT_FILENAMES, options['format'], \
+options['precision'], options['chunk_rows'], monitor=monitor)
+            return mesh
+
+    inputfiles, outputfiles, options = flux_commands()
+    return convert_files(inputfiles, outputfiles, options, monitor=monitor)
+
+def check_batch_arguments(script_arguments):
+    '''
+    Check for the arguments of the `batch` subcommand.
+
+    The first argument is either a directory to look for Flux exports in, or a
+        manifest file listing them, as read by `discover_batch_jobs`. The `-o`
+        flag names the directory that the output directories of the jobs are
+        created in, "fenics-meshes" by default. The `-j` flag sets the number
+        of worker processes that convert the meshes, one mesh per worker. The
+        other optional switches are the ones of the conversion of a single
+        mesh, and apply to every job.
+
+    Parameters
+    ----------
+    script_arguments : list
+        The arguments of the script call following "batch".
+
+    Returns
+    -------
+    source : string
+        The directory or the manifest file to take the jobs from.
+
+    output_directory : string
+        The directory to create the output directories of the jobs in.
+
+    options : dict
+        A dictionary of the optional switches of the script call, which starts
+            as a copy of `DEFAULT_OPTIONS`.
+    '''
+    usage = 'flux_to_fenics_mesh_transfer.py batch <DIRECTORY|MANIFEST> \
+[-o <output_directory>] [-j <jobs>] [-k] [-p <digits>] [-f xml|xdmf] \
+[--chunk-rows <rows>] [--cache-dir <directory>] [--cache-size <MB>] [-d 2|3] \
+[--reorder rcm|hilbert|morton] [--partitions <parts>] [--partitioner rcb|metis] \
+[--merge-tolerance <distance>] [--regions <name,...>] [--strict]'
+    import getopt
+
+    output_directory = 'fenics-meshes'
+    options = dict(DEFAULT_OPTIONS)
+    try:
+        opts, args = getopt.gnu_getopt(script_arguments, "hko:p:f:j:d:", \
+["output-dir=", "keep-intermediates", "precision=", "format=", "chunk-rows=", \
+"jobs=", "cache-dir=", "cache-size=", "dim=", "reorder=", "partitions=", \
+"partitioner=", "merge-tolerance=", "regions=", "strict"])
+    except getopt.GetoptError:
+        sys.exit('Error: Unrecognized option specified!')
+    for opt, arg in opts:
+        if opt == '-h':
+            # display help
+            sys.exit(usage)
+        elif opt in ("-o", "--output-dir"):
+            # store the output directory
+            output_directory = arg
+        elif not apply_option(options, opt, arg):
+            sys.exit('Error: Unrecognized option specified!')
+
+    if len(args) != 1:
+        sys.exit('Error: A single export directory or manifest is expected!')
+    if not os.path.exists(args[0]):
+        sys.exit('Error: %s does not exist!' % args[0])
+
+    return args[0], output_directory, options
+
+def discover_batch_jobs(source, export_filenames=EXPORT_FILENAMES):
+    '''
+    Find the Flux exports to convert in a directory tree, or in a manifest.
+
+    In a directory tree, every directory holding the node, face element and
+        face physical description exports under the names of
+        `EXPORT_FILENAMES` is a job, which also gets the line exports if both
+        are there. For 3D meshes, the names of `VOLUME_EXPORT_FILENAMES` are
+        looked for instead. The job is named after the path of the directory, relative
+        to `source`.
+
+    A manifest is a text file with one job per line: the name of the job,
+        followed by the names of the node, face element and face physical
+        description exports, and optionally by the names of the line element
+        and line physical description exports, separated by whitespace. Relative
+        names are taken from the directory of the manifest. Empty lines and
+        lines starting with "#" are skipped.
+
+    Parameters
+    ----------
+    source : string
+        The directory or the manifest file.
+
+    export_filenames : list
+        The names of the exports to look for in a directory tree,
+            `EXPORT_FILENAMES` or `VOLUME_EXPORT_FILENAMES`.
+
+    Returns
+    -------
+    jobs : list
+        A list of (name, inputfiles) tuples, in the order they were found.
+    '''
+    jobs = []
+    if os.path.isdir(source):
+        for dirpath, dirnames, filenames in os.walk(source):
+            dirnames.sort() # walk the tree in a stable order
+            if not all(name in filenames for name in export_filenames[:3]):
+                continue
+            names = export_filenames if all(name in filenames \
+for name in export_filenames[3:]) else export_filenames[:3]
+            name = os.path.relpath(dirpath, source)
+            if name == os.curdir:
+                name = os.path.basename(os.path.abspath(source))
+            jobs.append((name, [os.path.join(dirpath, export) for export in names]))
+    else:
+        base = os.path.dirname(source)
+        with open(source, 'r') as manifest: # open read-only
+            for number, line in enumerate(manifest, 1):
+                fields = line.split()
+                if not fields or fields[0].startswith('#'):
+                    continue
+                if len(fields) not in (4, 6):
+                    sys.exit('Error: Manifest line %d must name a job and 3 or 5 \
+input files!' % number)
+                jobs.append((fields[0], [os.path.join(base, export) \
+for export in fields[1:]]))
+
+    return jobs
+
+def run_batch_job(job):
+    '''
+    Convert the exports of a single batch job into its own output directory.
+
+    The job is converted in a single process, since the meshes themselves are
+        converted in parallel. The errors are reported back instead of raised,
+        so that a broken export doesn't stop the other jobs.
+
+    Parameters
+    ----------
+    job : tuple
+        The (name, inputfiles, directory, options) of the job, where `directory`
+            is the output directory of the job.
+
+    Returns
+    -------
+    result : tuple
+        The (name, number_of_faces, seconds, error) of the job, where `error` is
+            None on success, and the error message otherwise.
+    '''
+    name, inputfiles, directory, options = job
+    start = time.time()
+    extension = '.xdmf' if options['format'] == 'xdmf' else '.xml'
+    outputfiles = [os.path.join(directory, os.path.splitext(output)[0] + extension) \
+for output in OUTPUT_FILENAMES[:3 if len(inputfiles) > 3 else 2]]
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        mesh = convert_files(inputfiles, outputfiles, dict(options, jobs=1), \
+        directory)
+    except (Exception, SystemExit) as error:
+        return name, 0, time.time() - start, str(error) or repr(error)
+
+    return name, mesh.number_of_faces, time.time() - start, None
+
+def batch_conversion(script_arguments):
+    '''
+    Convert every mesh of a directory tree, or of a manifest, with a worker pool.
+
+    This is the `batch` subcommand. The jobs found by `discover_batch_jobs`
+        are converted by `run_batch_job`, each into its own directory under the
+        output directory, so that the output files, the intermediate files and
+        the region number references of different jobs never clash. A line is
+        printed as every job finishes, and the throughput of the whole batch is
+        printed at the end.
+
+    Parameters
+    ----------
+    script_arguments : list
+        The arguments of the script call following "batch".
+    '''
+    source, output_directory, options = check_batch_arguments(script_arguments)
+    jobs = [(name, inputfiles, os.path.join(output_directory, name), options) \
+for name, inputfiles in discover_batch_jobs(source, \
+VOLUME_EXPORT_FILENAMES if options['dim'] == 3 else EXPORT_FILENAMES)]
+    if not jobs:
+        sys.exit('Error: No Flux exports found in %s!' % source)
+
+    print('Batch of %d meshes, written into : %s' % (len(jobs), output_directory))
+    start = time.time()
+    pool = None
+    if options['jobs'] != 1 and len(jobs) > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(options['jobs'] or multiprocessing.cpu_count())
+        results = pool.imap_unordered(run_batch_job, jobs)
+    else:
+        results = map(run_batch_job, jobs)
+
+    converted, elements, failed = 0, 0, []
+    try:
+        for name, number_of_faces, seconds, error in results:
+            if error is None:
+                converted += 1
+                elements += number_of_faces
+                print('Converted %s : %d elements in %.2f s' \
+% (name, number_of_faces, seconds))
+            else:
+                failed.append(name)
+                print('Failed %s : %s' % (name, error))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    elapsed = max(time.time() - start, 1e-9)
+
+    print('Converted %d meshes, %d elements in %.2f s : %.2f meshes/s, \
+%.0f elements/s' % (converted, elements, elapsed, converted / elapsed, \
+elements / elapsed))
+    if failed:
+        sys.exit('Error: %d of %d conversions failed!' % (len(failed), len(jobs)))
+
+def main():
+    '''
+    The main function calling all the other functions.
+
+    The first if-else block below checks for whether the script is being called
+        from a linux/windows terminal, or from within the Flux, which is left to
+        `flux_conversion`, and hands the `batch` subcommand over to
+        `batch_conversion`. The rest is left to `convert_files`, which writes
+        the region number references into the working directory, or to
+        `profile_conversion` with the `--profile` flag. The stages of the
+        conversion are recorded by a `ConversionMonitor`, and printed at the
+        end. A missing optional package, such as h5py for the xdmf output
+        format, ends the script with an error message.
+    '''
+
+    # the stages are printed at the end, with a progress indicator on terminals
+    isatty = getattr(sys.stderr, 'isatty', None)
+    monitor = ConversionMonitor(progress=isatty is not None and isatty())
+    try:
+        if sys.argv == ['pydb.py']:
+            flux_conversion(monitor)
+            monitor.report()
+            return
+        elif sys.argv[1:2] == ['batch']:
+            batch_conversion(sys.argv[2:])
+            return
+        else:
+            inputfiles, outputfiles, options = \
+            check_inputoutput_arguments(sys.argv[1:])
 
-    write_physical_region(outputfiles[1] ,face_list)
+        if options['profile'] is not None:
+            profile_conversion(inputfiles, outputfiles, options, monitor)
+        else:
+            convert_files(inputfiles, outputfiles, options, monitor=monitor)
+    except ImportError as error:
+        sys.exit('Error: %s' % error)
+    monitor.report()
 
 # RUN MAIN
-main()
+# only when run as a script, from a terminal or from within Flux, and not when
+#   imported as a module
+if __name__ == '__main__' or sys.argv == ['pydb.py']:
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+DOLFIN XML READER TEST
+
+Checks that the comparison of two meshes reports only the vertices that moved,
+both when the meshes are numbered alike, and when one of them is renumbered,
+like by the `--reorder` flag of the converter, which must not make the meshes
+differ otherwise.
+
+USAGE=============
+python3 -m unittest discover tests
+"""
+
+
+# IMPORT PYTHON LIBRARIES
+import os, sys              # for the paths of the reader and the example mesh
+import shutil, tempfile     # for the scratch directory of the meshes
+import unittest             # for the test case
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+os.pardir))
+import dolfin_xml_reader as reader
+
+
+# DEFINE CONSTANTS
+# the example mesh, and the vertex moved in it
+EXAMPLE_MESH = os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+os.pardir, 'example_xml_files', 'Mesh_CMag_2D_by_SW.xml')
+MOVED_VERTEX = 100
+MOVE = 1e-3
+
+
+# DEFINE TESTS
+class DiffMeshesTest(unittest.TestCase):
+    '''
+    The differences of `diff_meshes` between the example mesh and its copies.
+    '''
+    def setUp(self):
+        try:
+            self.numpy = reader.import_numpy()
+        except ImportError:
+            self.skipTest('needs numpy')
+        self.directory = tempfile.mkdtemp(prefix='dolfin-diff-')
+        self.mesh = reader.read_mesh(EXAMPLE_MESH)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_mesh(self, name, vertices, cells):
+        '''
+        Write a triangle mesh to the scratch directory, and return its path.
+        '''
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as mesh:
+            mesh.write('<?xml version="1.0" encoding="UTF-8"?>\n\n<dolfin '
+            'xmlns:dolfin="http://www.fenicsproject.org">\n  <mesh '
+            'celltype="triangle" dim="2">\n    <vertices size="%d">\n' \
+            % len(vertices))
+            for index, (x, y, z) in enumerate(vertices):
+                mesh.write('      <vertex index="%d" x="%.16e" y="%.16e" '
+                'z="%.16e"/>\n' % (index, x, y, z))
+            mesh.write('    </vertices>\n    <cells size="%d">\n' % len(cells))
+            for index, (v0, v1, v2) in enumerate(cells):
+                mesh.write('      <triangle index="%d" v0="%d" v1="%d" '
+                'v2="%d"/>\n' % (index, v0, v1, v2))
+            mesh.write('    </cells>\n  </mesh>\n</dolfin>\n')
+        return path
+
+    def renumbered(self, vertices):
+        '''
+        Return the vertices and the cells of the example mesh, renumbered.
+        '''
+        vertex_order = self.numpy.random.RandomState(0).permutation(len( \
+        vertices))
+        numbers = self.numpy.empty_like(vertex_order)
+        numbers[vertex_order] = self.numpy.arange(len(vertex_order))
+        cells = numbers[self.mesh.cells][::-1]
+        return vertices[vertex_order], cells
+
+    def moved(self):
+        vertices = self.mesh.vertices.copy()
+        vertices[MOVED_VERTEX, 0] += MOVE
+        return vertices
+
+    def test_same_mesh(self):
+        self.assertEqual(reader.diff_meshes(EXAMPLE_MESH, EXAMPLE_MESH), [])
+
+    def test_moved_vertex(self):
+        moved = self.write_mesh('moved.xml', self.moved(), self.mesh.cells)
+        differences = reader.diff_meshes(EXAMPLE_MESH, moved)
+        self.assertEqual(len(differences), 1)
+        self.assertTrue(differences[0].startswith('Vertices : 1 of %d differ, '
+        'the first being %d' % (len(self.mesh.vertices), MOVED_VERTEX)), \
+        differences[0])
+
+    def test_renumbered_mesh(self):
+        renumbered = self.write_mesh('renumbered.xml', \
+        *self.renumbered(self.mesh.vertices))
+        self.assertEqual(reader.diff_meshes(EXAMPLE_MESH, renumbered), [])
+        self.assertNotEqual(reader.diff_meshes(EXAMPLE_MESH, renumbered, \
+        strict=True), [])
+
+    def test_moved_vertex_of_renumbered_mesh(self):
+        moved = self.write_mesh('moved.xml', *self.renumbered(self.moved()))
+        differences = reader.diff_meshes(EXAMPLE_MESH, moved)
+        self.assertEqual(len(differences), 1)
+        self.assertTrue(differences[0].startswith('Vertices : 1 of %d differ, '
+        'the first being %d' % (len(self.mesh.vertices), MOVED_VERTEX)), \
+        differences[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+"""
+IMPORT TEST
+
+Checks that importing the script leaves out the modules that only some runs
+need, like the optional packages, which the script imports where they are
+used, and that it stays within the import budget of the import benchmark, so
+that it starts fast within Flux, which runs it once for every export.
+
+The import is traced in a fresh interpreter by `python -X importtime`, which
+lists every module imported along with the script, even those that an earlier
+import of the test runner would have brought in already.
+
+USAGE=============
+python3 -m unittest discover tests
+"""
+
+
+# IMPORT PYTHON LIBRARIES
+import os, sys              # for the paths of the script and the benchmarks
+import subprocess           # for tracing the import in a fresh interpreter
+import unittest             # for the test case
+
+# the modules that must be imported lazily are listed along with the benchmark
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+os.pardir, 'benchmarks'))
+from benchmark_import import ROOT, MODULE, LAZY_MODULES, DEFAULT_BUDGET, \
+compile_script, import_time
+
+
+# DEFINE CONSTANTS
+# the number of imports to keep the best time of, and the margin given to the
+#   budget for the noise of shared machines
+REPEAT = 5
+BUDGET_MARGIN = 1.5
+
+
+# DEFINE TESTS
+@unittest.skipIf(sys.version_info < (3, 7), 'needs python -X importtime')
+class ImportTest(unittest.TestCase):
+    '''
+    The import of the script, as traced by `python -X importtime`.
+    '''
+    def imported_modules(self):
+        '''
+        Return the top-level names of the modules imported with the script.
+        '''
+        report = subprocess.run([sys.executable, '-X', 'importtime', '-c', \
+        'import ' + MODULE], cwd=ROOT, stdout=subprocess.DEVNULL, \
+        stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+        modules = set()
+        for line in report.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and line.startswith('import time:'):
+                modules.add(fields[2].strip().split('.')[0])
+        return modules
+
+    def test_script_is_imported(self):
+        self.assertIn(MODULE, self.imported_modules())
+
+    def test_lazy_modules_are_deferred(self):
+        eager = sorted(self.imported_modules() & set(LAZY_MODULES))
+        self.assertEqual(eager, [], 'imported along with the script : %s' \
+        % ', '.join(eager))
+
+    def test_import_is_within_budget(self):
+        compile_script()
+        milliseconds = import_time(REPEAT)
+        self.assertLess(milliseconds, DEFAULT_BUDGET * BUDGET_MARGIN, \
+        'the import takes %.1f ms, over its budget of %.1f ms' \
+        % (milliseconds, DEFAULT_BUDGET))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+"""
+RECORD RANGES TEST
+
+Checks that the exports are split into byte ranges of whole records, and
+converted the same by the worker processes as by the script alone, also for the
+exports that cannot be memory-mapped, like the empty files and the file
+objects, which make a single range.
+
+USAGE=============
+python3 -m unittest discover tests
+"""
+
+
+# IMPORT PYTHON LIBRARIES
+import os, sys              # for the paths of the script and the benchmarks
+import io                   # for the file objects of the exports
+import shutil, tempfile     # for the scratch directory of the exports
+import unittest             # for the test case
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+os.pardir))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+os.pardir, 'benchmarks'))
+import flux_to_fenics_mesh_transfer as transfer
+from synthetic_exports import generate_exports
+
+
+# DEFINE CONSTANTS
+# the number of face elements of the synthetic exports
+FACE_ELEMENTS = 2000
+
+
+# DEFINE TESTS
+class RecordRangesTest(unittest.TestCase):
+    '''
+    The ranges of `split_record_ranges`, and the conversions in parallel.
+    '''
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='flux-ranges-')
+        self.inputfiles, _ = generate_exports(self.directory, FACE_ELEMENTS)
+        self.empty = os.path.join(self.directory, 'empty.txt')
+        open(self.empty, 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertSameMesh(self, first, second):
+        self.assertEqual(first.node_list, second.node_list)
+        self.assertEqual(first.face_list, second.face_list)
+        self.assertEqual(first.region_list, second.region_list)
+
+    def test_ranges_cover_the_file(self):
+        node_file = self.inputfiles[0]
+        ranges = transfer.split_record_ranges(node_file, b' coordinates ', 4)
+        self.assertEqual(ranges[0][1], 0)
+        self.assertEqual(ranges[-1][2], os.path.getsize(node_file))
+        for first, second in zip(ranges, ranges[1:]):
+            self.assertEqual(first[2], second[1])
+
+    def test_empty_export_is_a_single_range(self):
+        self.assertEqual(transfer.split_record_ranges(self.empty, b'NODES', 2), \
+        [(self.empty, 0, 0)])
+
+    def test_file_object_is_a_single_range(self):
+        with open(self.inputfiles[0], 'rb') as export:
+            ranges = transfer.split_record_ranges(export, b' coordinates ', 2)
+            self.assertEqual(ranges, [(export, 0, None)])
+            coordinates = transfer.parse_node_range(ranges[0])
+        self.assertEqual(coordinates, \
+        transfer.retrieve_node_information(self.inputfiles[0]))
+
+    def test_parallel_conversion(self):
+        self.assertSameMesh(transfer.convert(*self.inputfiles[:3], jobs=2), \
+        transfer.convert(*self.inputfiles[:3]))
+
+    def test_parallel_conversion_of_empty_exports(self):
+        exports = (self.empty, self.empty, self.inputfiles[2])
+        mesh = transfer.convert(*exports, jobs=2)
+        self.assertEqual(mesh.number_of_nodes, 0)
+        self.assertSameMesh(mesh, transfer.convert(*exports))
+
+    def test_parallel_conversion_of_file_objects(self):
+        with open(self.inputfiles[0], 'rb') as nodes, \
+        open(self.inputfiles[1], 'rb') as faces:
+            mesh = transfer.convert(nodes, faces, self.inputfiles[2], jobs=2)
+        self.assertSameMesh(mesh, transfer.convert(*self.inputfiles[:3]))
+
+if __name__ == '__main__':
+    unittest.main()